@@ -1,19 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from fastapi.middleware.cors import CORSMiddleware  # Import CORS middleware
 
 # Import your backtesting modules. Adjust the import paths as needed.
 from config.config_parser import update_underlying_asset_config
-from data.constants import OPTION_DB_PATH
 from main import create_strategy_from_config
 from engine.backtest_engine import BacktestEngine
-from data.panda import PandaAccessor
-from utils.data_cleaning import clean_underlying_data
+from engine.charts import ChartRenderer, prepare_chart_data, run_id_for
+from engine.metrics import json_safe
+from data.accessor import data_version
+from data.tiered_accessor import create_default_accessor, BatchAccessor
+from data.async_accessor import AsyncAccessor
+from utils.data_cleaning import prepare_underlying_data
+from data.bars import parse_frequency
 
 app = FastAPI(title="Turbo Trade Backtesting API")
 
+# Shared across requests so the in-memory tier is reused between backtests
+accessor = create_default_accessor()
+# Handlers await data reads on the async view's bounded pool instead of blocking the event loop
+async_accessor = AsyncAccessor(accessor)
+# Charts render on a background worker and are cached on disk by run id
+chart_renderer = ChartRenderer()
+CHART_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+# Backtests (CPU-bound) run on these threads; a /run_backtests batch shares one fetch cache
+BACKTEST_WORKERS = 4
+backtest_executor = ThreadPoolExecutor(max_workers=BACKTEST_WORKERS)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -42,49 +61,126 @@ class BacktestConfigModel(BaseModel):
     entry_conditions: Dict[str, Any]
     exit_conditions: Dict[str, Any]
     backtest_settings: Dict[str, Any]
+    reporting: Optional[Dict[str, Any]] = None  # e.g. {"metrics": ["sharpe_ratio", "max_drawdown"]}
     # You can add other keys as needed
 
 
+def run_config(config_dict: dict, underlying_df: pd.DataFrame, source, chart_format: str) -> bytes:
+    """Runs one backtest and returns its JSON body (run id, plot url, metrics, trades)"""
+    strategy = create_strategy_from_config(config_dict)
+    engine = BacktestEngine(underlying_df, strategy, source, config_dict)
+    trades = engine.run_backtest()
+    metrics = engine.performance_metrics()
+
+    # --- Queue the plot ---
+    # Rendering happens off the request path; clients fetch it from /charts/{run_id}
+    run_id = run_id_for(config_dict, data_version(source))
+    chart_renderer.submit(run_id, prepare_chart_data(engine), chart_format)
+    plot_url = f"/charts/{run_id}?fmt={chart_format}"
+
+    # Trades are serialized straight from the TradeLog arrays, bypassing FastAPI's generic encoder
+    return (b'{"run_id":' + json.dumps(run_id).encode("utf-8")
+            + b',"plot":' + json.dumps(plot_url).encode("utf-8")
+            + b',"metrics":' + json.dumps(json_safe(metrics), allow_nan=False).encode("utf-8")
+            + b',"trades":' + trades.to_json_bytes() + b'}')
+
+
+async def load_underlying(source: AsyncAccessor, symbol: str, resolution) -> pd.DataFrame:
+    """Cleaned underlying bars of `symbol`; the read and the cleaning both run off the event loop"""
+    underlying_df = await source.get_equity_data(symbol, resolution)
+    if underlying_df.empty:
+        raise ValueError(f"No underlying data for {symbol}")
+    return await asyncio.get_running_loop().run_in_executor(backtest_executor, prepare_underlying_data, underlying_df)
+
+
+async def run_config_async(config_dict: dict, underlying_df: pd.DataFrame, source, chart_format: str) -> bytes:
+    return await asyncio.get_running_loop().run_in_executor(
+        backtest_executor, run_config, config_dict, underlying_df, source, chart_format)
+
+
+def check_chart_format(chart_format: str) -> None:
+    # Checked before any work: a bad format would otherwise only fail on the chart worker
+    if chart_format not in CHART_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported chart format: {chart_format}")
+
+
 @app.post("/run_backtest")
-def run_backtest(config: BacktestConfigModel):
+async def run_backtest(config: BacktestConfigModel, chart_format: str = "png"):
+    check_chart_format(chart_format)
     try:
         # Convert the Pydantic model to a dictionary
         config_dict = config.dict()
         config_dict = update_underlying_asset_config(config_dict)
         symbol = config_dict["underlying_asset"]["symbol"]
+        resolution = parse_frequency(config_dict["backtest_settings"].get("data_frequency"))
 
-        # Create the strategy object from config
-        strategy = create_strategy_from_config(config_dict)
-
-        # --- Instantiate Data Accessor ---
-        # Update the DB path accordingly
-        accessor = PandaAccessor(OPTION_DB_PATH)
-
-        # --- Load underlying data ---
-        underlying_df = accessor.get_equity_data(symbol)
-        underlying_df = underlying_df.rename(columns={'timestamp': 'DateTime', 'price': 'Price', 'symbol': 'Symbol'})
-        underlying_df["DateTime"] = pd.to_datetime(underlying_df["DateTime"], unit='s', utc=True).dt.tz_convert('Asia/Kolkata').dt.tz_localize(None)
-
-        # Clean underlying data
-        underlying_df = clean_underlying_data(underlying_df, time_col="DateTime", price_col="Price")
-
-        # --- Run the backtest ---
-        engine = BacktestEngine(underlying_df, strategy, accessor, config_dict)
-        trades = engine.run_backtest()
-        metrics = engine.performance_metrics()
-
-        # # --- Generate the plot ---
-        # # Ensure your plot_results method returns a matplotlib figure when return_fig=True.
-        # fig = engine.plot_results(return_fig=True)
-        # buf = io.BytesIO()
-        # fig.savefig(buf, format="png")
-        # buf.seek(0)
-        # img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-
-        return {
-            "metrics": metrics,
-            "trades": trades,
-            # "plot": img_base64
-        }
+        underlying_df = await load_underlying(async_accessor, symbol, resolution)
+        body = await run_config_async(config_dict, underlying_df, accessor, chart_format)
+        return Response(content=body, media_type="application/json")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _error_body(error: Exception) -> bytes:
+    return b'{"error":' + json.dumps(str(error)).encode("utf-8") + b'}'
+
+
+@app.post("/run_backtests")
+async def run_backtests(configs: List[BacktestConfigModel], chart_format: str = "png"):
+    """
+    Runs a batch of configs (e.g. variants of one strategy) in parallel. Configs on the same
+    symbol and bar size share one underlying load (each engine cuts its own date range from
+    it), and all contract fetches go through one per-batch cache so a contract needed by
+    several variants is read once. Results come back in request order; a failing config
+    gets an "error" entry instead of failing the batch.
+    """
+    check_chart_format(chart_format)
+    batch = BatchAccessor(accessor)
+    async_batch = AsyncAccessor(batch, executor=async_accessor.executor)
+    results = [None] * len(configs)
+    groups = {}
+    for index, config in enumerate(configs):
+        try:
+            config_dict = update_underlying_asset_config(config.dict())
+            symbol = config_dict["underlying_asset"]["symbol"]
+            resolution = parse_frequency(config_dict["backtest_settings"].get("data_frequency"))
+        except Exception as e:
+            results[index] = _error_body(e)
+            continue
+        groups.setdefault((symbol, resolution), []).append((index, config_dict))
+
+    async def run_group(symbol, resolution, members):
+        try:
+            underlying_df = await load_underlying(async_batch, symbol, resolution)
+        except Exception as e:
+            for index, _ in members:
+                results[index] = _error_body(e)
+            return
+        outcomes = await asyncio.gather(
+            *(run_config_async(config_dict, underlying_df, batch, chart_format) for _, config_dict in members),
+            return_exceptions=True)
+        for (index, _), outcome in zip(members, outcomes):
+            results[index] = _error_body(outcome) if isinstance(outcome, Exception) else outcome
+
+    await asyncio.gather(*(run_group(symbol, resolution, members)
+                           for (symbol, resolution), members in groups.items()))
+
+    body = (b'{"results":[' + b','.join(results) + b']'
+            + b',"data_fetches":' + json.dumps(batch.stats()).encode("utf-8") + b'}')
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/charts/{run_id}")
+async def get_chart(run_id: str, fmt: str = "png", timeout: float = 30.0):
+    check_chart_format(fmt)
+    path = chart_renderer.cached(run_id, fmt)
+    if path is None:
+        # Still rendering: wait for the worker instead of rendering again
+        pending = chart_renderer.pending(run_id, fmt)
+        if pending is None:
+            raise HTTPException(status_code=404, detail="Chart not found; run the backtest first.")
+        try:
+            path = await asyncio.wait_for(asyncio.wrap_future(pending), timeout)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Chart rendering failed: {e}")
+    return FileResponse(path, media_type=CHART_MEDIA_TYPES[fmt])
\ No newline at end of file
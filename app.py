@@ -3,14 +3,21 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import os
 # Import configuration, engine, and data access from your project package.
 # Adjust the import paths as needed.
 from config.config_parser import get_strategy_config, update_underlying_asset_config
 from engine.backtest_engine import BacktestEngine
-from data.panda import PandaAccessor
+from data.accessor import data_version
+from data.tiered_accessor import MemoryTier, create_default_accessor
 from utils.data_cleaning import clean_underlying_data
+from data.bars import parse_frequency, resample_equity_ticks
 from main import create_strategy_from_config
+from engine.charts import ChartRenderer, prepare_chart_data, run_id_for
+
+RESULT_CACHE_ENTRIES = 32  # completed results kept for reruns, least recently shown dropped first
 
 # Set page config for better appearance
 st.set_page_config(page_title="Backtesting Engine UI", layout="wide")
@@ -52,8 +59,50 @@ st.markdown("## TURBO TRADE")
 # Sidebar: General Configuration Options
 st.sidebar.header("General Configuration")
 
+# ---------- Shared resources (survive reruns and are shared across sessions) ----------
+@st.cache_resource
+def get_accessor():
+    return create_default_accessor()
+
+
+@st.cache_resource
+def get_chart_renderer():
+    return ChartRenderer()
+
+
+@st.cache_resource
+def get_backtest_executor():
+    # Backtests run here so the script (and every widget) stays responsive while they execute
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="backtest")
+
+
+@st.cache_resource
+def get_result_cache():
+    # Completed results keyed by run_id_for(config, data version), so new data is never served a stale result
+    return MemoryTier(max_entries=RESULT_CACHE_ENTRIES)
+
+
+@st.cache_data(show_spinner="Loading underlying data...")
+def load_underlying_data(symbol: str, data_frequency: str = "intraday") -> pd.DataFrame:
+    # For demonstration, reading a CSV file from disk.
+    read_file = "/Users/prabhu/PycharmProjects/turbo-trade/new_backtest/" + symbol + '.csv'
+    underlying_df = pd.read_csv(read_file)
+    # Rename columns if necessary
+    underlying_df = underlying_df.rename(columns={'Date/Time': 'DateTime', 'CLose': 'Price'})
+    underlying_df['DateTime'] = pd.to_datetime(underlying_df['DateTime'])
+    underlying_df['Symbol'] = symbol
+    resolution = parse_frequency(data_frequency)
+    if resolution:
+        # Bars are built on the epoch grid like the DB bar tables; the CSV times are IST
+        epoch = underlying_df['DateTime'].dt.tz_localize('Asia/Kolkata').astype('int64') // 10 ** 9
+        underlying_df = resample_equity_ticks(underlying_df.assign(DateTime=epoch), resolution)
+        underlying_df['DateTime'] = pd.to_datetime(underlying_df['DateTime'], unit='s', utc=True).dt.tz_convert('Asia/Kolkata').dt.tz_localize(None)
+    return clean_underlying_data(underlying_df, time_col="DateTime", price_col="Price")
+
+
 # ---------- Build Config Dictionary ----------
-config = get_strategy_config()
+# Deep copy: the module-level default config must not be mutated while a run uses it
+config = copy.deepcopy(get_strategy_config())
 config = update_underlying_asset_config(config)
 
 # ---------- Underlying Asset Configuration ----------
@@ -86,6 +135,7 @@ st.sidebar.header("Strategy Parameters")
 # ---------- Backtest Settings ----------
 st.sidebar.header("Backtest Settings")
 capital = st.sidebar.number_input("Capital", value=100000, step=1000)
+data_frequency = st.sidebar.selectbox("Data Frequency", options=["intraday", "1min", "5min", "15min", "60min"], index=0)
 start_date = st.sidebar.date_input("Start Date", value=datetime(2022, 8, 1))
 end_date = st.sidebar.date_input("End Date", value=datetime(2022, 12, 30))
 
@@ -127,6 +177,7 @@ config["backtest_settings"]["capital"] = str(capital)
 config["backtest_settings"]["start_date"] = start_date.strftime("%Y-%m-%d")
 config["backtest_settings"]["end_date"] = end_date.strftime("%Y-%m-%d")
 config["backtest_settings"]["trading_days"] = trading_days
+config["backtest_settings"]["data_frequency"] = data_frequency
 
 # Update exit conditions with stoploss, take profit, trailing stoploss.
 # config["exit_conditions"]["stoploss"] = stoploss
@@ -149,46 +200,76 @@ st.sidebar.subheader("Current Config")
 st.sidebar.json(config)
 
 # ---------- Run Backtest Button ----------
-if st.sidebar.button("Run Backtest"):
-    st.write("Running backtest with the following configuration:")
-    st.json(config)
+def show_results(result):
+    st.write("Performance Metrics:", result["metrics"])
+    st.write("Trades Executed:", result["trades"])
+    st.image(result["chart"])
 
-    # Instantiate the data accessor – update DB_PATH as necessary.
-    # DB_PATH = os.path.join(os.getcwd(), "data", "sqlite", "options.db")
-    accessor = PandaAccessor("/Users/prabhu/PycharmProjects/turbo-trade/data/sqlite/options.db")
 
-    # Fetch underlying equity data.
+@st.fragment(run_every=1.0)
+def show_backtest_job():
+    job = st.session_state.get("backtest_job")
+    if job is None:
+        return
+    engine, future = job["engine"], job["future"]
+    if not future.done():
+        # Live view of the run: progress and the trades closed so far
+        st.progress(engine.progress, text=f"Running backtest... {engine.progress:.0%}")
+        # The worker is still appending, so take a consistent copy rather than views of the live arrays
+        st.write("Trades so far:", engine.trades.snapshot())
+        return
+
+    del st.session_state["backtest_job"]
     try:
-        # For demonstration, reading a CSV file from disk.
-        read_file = "/Users/prabhu/PycharmProjects/turbo-trade/new_backtest/" + underlying_symbol+'.csv'
-        underlying_df = pd.read_csv(read_file)
-        # Rename columns if necessary
-        underlying_df = underlying_df.rename(columns={'Date/Time': 'DateTime', 'CLose': 'Price'})
-        underlying_df['DateTime'] = pd.to_datetime(underlying_df['DateTime'])
-        underlying_df['Symbol'] = underlying_symbol
+        future.result()
     except Exception as e:
-        st.error(f"Error fetching underlying data: {e}")
-        underlying_df = None
-
-    if underlying_df is None or underlying_df.empty:
-        st.error("No underlying data found.")
+        st.session_state["backtest_error"] = str(e)
     else:
-        # Clean the underlying data
-        underlying_df = clean_underlying_data(underlying_df, time_col="DateTime", price_col="Price")
+        # Render the downsampled plot on the chart worker; reruns with the same config reuse the cached PNG
+        chart = get_chart_renderer().submit(job["run_id"], prepare_chart_data(engine))
+        get_result_cache().store("result", (job["run_id"],), {
+            "metrics": engine.performance_metrics(),
+            "trades": engine.trades.to_frame(),
+            "chart": chart.result(),
+        })
+    # Full rerun so the page body shows the finished result
+    st.rerun()
+
+
+if st.sidebar.button("Run Backtest"):
+    st.write("Running backtest with the following configuration:")
+    st.json(config)
 
-        # Create the strategy from the updated config
-        strategy = create_strategy_from_config(config)
+    run_id = run_id_for(config, data_version(get_accessor()))
+    st.session_state["last_run_id"] = run_id
+    st.session_state.pop("backtest_error", None)
+    if get_result_cache().lookup("result", (run_id,)) is None:
+        # Fetch underlying equity data.
+        try:
+            underlying_df = load_underlying_data(underlying_symbol, data_frequency)
+        except Exception as e:
+            st.error(f"Error fetching underlying data: {e}")
+            underlying_df = None
 
-        # Instantiate the backtest engine
-        engine = BacktestEngine(underlying_df, strategy, accessor, config)
+        if underlying_df is None or underlying_df.empty:
+            st.error("No underlying data found.")
+        else:
+            # Create the strategy from the updated config
+            strategy = create_strategy_from_config(config)
 
-        # Run the backtest
-        trades = engine.run_backtest()
-        metrics = engine.performance_metrics()
+            # Instantiate the backtest engine and run it on the background worker
+            engine = BacktestEngine(underlying_df, strategy, get_accessor(), config)
+            st.session_state["backtest_job"] = {
+                "run_id": run_id,
+                "engine": engine,
+                "future": get_backtest_executor().submit(engine.run_backtest),
+            }
 
-        st.write("Performance Metrics:", metrics)
-        st.write("Trades Executed:", trades)
+show_backtest_job()
 
-        # Generate the plot (ensure plot_results accepts return_fig argument)
-        fig = engine.plot_results(return_fig=True)
-        st.pyplot(fig)
\ No newline at end of file
+if "backtest_error" in st.session_state:
+    st.error(f"Backtest failed: {st.session_state['backtest_error']}")
+elif "backtest_job" not in st.session_state:
+    result = get_result_cache().lookup("result", (st.session_state.get("last_run_id"),))
+    if result is not None:
+        show_results(result)
@@ -0,0 +1,81 @@
+# build_bars.py
+import argparse
+import logging
+import sqlite3
+import sys
+import time
+
+import data.query as queries
+from data.bars import parse_frequency
+from data.constants import OPTION_DB_PATH, BAR_FREQUENCIES
+from data.panda import get_bar_builds, get_tick_layouts
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[logging.StreamHandler(sys.stdout)])
+logger = logging.getLogger(__name__)
+
+# Tick table -> (bar table, build query, tick source per layout)
+BAR_TABLES = {
+    "EquityTick": ("EquityBar", queries.BUILD_EQUITY_BARS, queries.EQUITY_TICK_SOURCE_BY_LAYOUT),
+    "OptionsTick": ("OptionsBar", queries.BUILD_OPTIONS_BARS, queries.OPTIONS_TICK_SOURCE_BY_LAYOUT),
+}
+
+
+def build_bars(conn, resolutions, full=False):
+    """
+    Brings the bar tables up to date for every resolution (in seconds). Only ticks from
+    the start of the last bar built so far are re-aggregated, unless `full` is set.
+    """
+    for sql in (queries.CREATE_EQUITY_BAR, queries.CREATE_OPTIONS_BAR, queries.CREATE_BAR_BUILD):
+        conn.execute(sql)
+    layouts = get_tick_layouts(conn)
+    builds = get_bar_builds(conn)
+
+    for tick_table, (bar_table, build_query, sources) in BAR_TABLES.items():
+        layout = layouts.get(tick_table, queries.TICK_LAYOUT_RAW)
+        until = conn.execute(queries.FETCH_MAX_TICK_DATETIME_BY_LAYOUT[layout].format(table=tick_table)).fetchone()[0]
+        if until is None:
+            logger.info(f"{tick_table} is empty, skipping")
+            continue
+        query = build_query.format(source=sources[layout])
+        for resolution in resolutions:
+            start_time = time.time()
+            last = None if full else builds.get((tick_table, resolution))
+            if last is not None and last >= until:
+                logger.info(f"{bar_table} @ {resolution}s is up to date")
+                continue
+            with conn:
+                if last is None:
+                    conn.execute(queries.DELETE_BARS.format(table=bar_table), (resolution,))
+                    since = None
+                else:
+                    # The bar holding the last aggregated tick may have been partial; rebuild it
+                    since = last - last % resolution
+                cursor = conn.execute(query, {
+                    "resolution": resolution,
+                    "since": since if since is not None else -2 ** 63,
+                    "until": until,
+                })
+                conn.execute(queries.UPSERT_BAR_BUILD, (tick_table, resolution, until))
+            logger.info(f"{bar_table} @ {resolution}s: wrote {cursor.rowcount} bars "
+                        f"in {time.time() - start_time:.1f} seconds")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the materialized OHLC bar tables")
+    parser.add_argument("db_path", nargs="?", default=OPTION_DB_PATH, help="SQLite database to update")
+    parser.add_argument("--frequencies", nargs="+", default=BAR_FREQUENCIES,
+                        help="bar sizes as data_frequency values, e.g. 1min 5min 1h")
+    parser.add_argument("--full", action="store_true", help="rebuild from scratch instead of updating")
+    args = parser.parse_args()
+
+    resolutions = sorted({parse_frequency(frequency) for frequency in args.frequencies} - {None})
+    conn = sqlite3.connect(args.db_path)
+    try:
+        build_bars(conn, resolutions, full=args.full)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
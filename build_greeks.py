@@ -0,0 +1,128 @@
+# build_greeks.py
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+import data.query as queries
+from data.constants import OPTION_DB_PATH
+from data.panda import get_tick_layouts
+from engine.greeks import expiry_epoch, option_greeks, SECONDS_PER_YEAR
+from utils.helpers import get_date
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[logging.StreamHandler(sys.stdout)])
+logger = logging.getLogger(__name__)
+
+CONTRACTS_PER_TASK = 100  # contracts whose ticks one worker computes at a time
+MAX_IN_FLIGHT_FACTOR = 2  # pending tasks per worker, bounds the results held in memory
+GREEK_COLUMNS = ["Spot", "IV", "Delta", "Gamma", "Theta", "Vega"]
+SQLITE_TIMEOUT = 60  # seconds; workers read while the parent commits
+
+
+def compute_greeks_chunk(db_path, contracts, risk_free_rate):
+    """
+    Greeks of the ticks of `contracts` (rows of Id, Symbol, Type, StrikePrice, ExpiryDate,
+    Since) newer than each contract's Since. Runs in a worker process with its own
+    read-only connection. The spot of each tick is the last underlying tick at or before it.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=SQLITE_TIMEOUT)
+    try:
+        layouts = get_tick_layouts(conn)
+        option_source = queries.OPTIONS_TICK_SOURCE_BY_LAYOUT[layouts.get("OptionsTick", queries.TICK_LAYOUT_RAW)]
+        equity_source = queries.EQUITY_TICK_SOURCE_BY_LAYOUT[layouts.get("EquityTick", queries.TICK_LAYOUT_RAW)]
+        contracts = pd.DataFrame(contracts, columns=["Id", "Symbol", "Type", "StrikePrice", "ExpiryDate", "Since"])
+        query = queries.FETCH_GREEKS_INPUT_TICKS.format(
+            source=option_source, watermarks=",".join(["(?, ?)"] * len(contracts)),
+            placeholders=",".join("?" * len(contracts)))
+        watermarks = [int(value) for row in contracts[["Id", "Since"]].itertuples(index=False) for value in row]
+        ticks = pd.read_sql_query(query, conn, params=[*watermarks, *contracts["Id"].tolist()])
+        if ticks.empty:
+            return ticks.assign(**{column: [] for column in GREEK_COLUMNS})
+
+        ticks = ticks.merge(contracts, left_on="ContractId", right_on="Id", how="left")
+        ticks["Spot"] = np.nan
+        for symbol, rows in ticks.groupby("Symbol").groups.items():
+            times = ticks.loc[rows, "DateTime"]
+            # A week of lookback covers weekends and holidays before the first tick
+            spot = pd.read_sql_query(queries.FETCH_GREEKS_INPUT_SPOT.format(source=equity_source), conn,
+                                     params=(symbol, int(times.min()) - 7 * 86400, int(times.max())))
+            if spot.empty:
+                continue
+            position = np.searchsorted(spot["DateTime"].to_numpy(), times.to_numpy(), side="right") - 1
+            ticks.loc[rows, "Spot"] = np.where(position >= 0, spot["Price"].to_numpy()[np.maximum(position, 0)], np.nan)
+    finally:
+        conn.close()
+
+    expiry_close = ticks["ExpiryDate"].map({e: expiry_epoch(get_date(e)) for e in ticks["ExpiryDate"].unique()})
+    t = (expiry_close - ticks["DateTime"]).to_numpy(dtype=float) / SECONDS_PER_YEAR
+    greeks = option_greeks(ticks["Close"].to_numpy(dtype=float), ticks["Spot"].to_numpy(dtype=float),
+                           ticks["StrikePrice"].to_numpy(dtype=float), t, risk_free_rate,
+                           (ticks["Type"] == "CE").to_numpy())
+    return pd.DataFrame({"ContractId": ticks["ContractId"], "DateTime": ticks["DateTime"],
+                         "Spot": ticks["Spot"], **greeks})
+
+
+def _write(conn, frame):
+    # NaN -> NULL so missing greeks read back as missing
+    rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+    with conn:
+        conn.executemany(queries.INSERT_OPTIONS_GREEKS, rows)
+    return len(frame)
+
+
+def build_greeks(db_path, risk_free_rate=0.0, workers=None, full=False):
+    """
+    Computes the greeks of every option tick newer than its contract's latest one already
+    in OptionsGreeks (all ticks with `full`), fanning contract chunks out to worker processes.
+    The parent process is the only writer. The watermark is per contract so an interrupted
+    run resumes the contracts it never reached and late ticks of finished ones are picked up.
+    """
+    conn = sqlite3.connect(db_path, timeout=SQLITE_TIMEOUT)
+    try:
+        if full:
+            conn.execute("DROP TABLE IF EXISTS OptionsGreeks")
+        conn.execute(queries.CREATE_OPTIONS_GREEKS)
+        since = dict(conn.execute(queries.FETCH_MAX_GREEKS_DATETIME_BY_CONTRACT).fetchall())
+        contracts = [(*contract, since.get(contract[0], -1))
+                     for contract in conn.execute(queries.FETCH_ALL_CONTRACTS).fetchall()]
+        tasks = [contracts[i:i + CONTRACTS_PER_TASK] for i in range(0, len(contracts), CONTRACTS_PER_TASK)]
+        workers = workers or os.cpu_count() or 1
+        logger.info(f"Computing greeks for {len(contracts)} contracts in {len(tasks)} tasks on {workers} workers"
+                    + (f" ({len(since)} resumed after their latest greeks)" if since else ""))
+
+        written = 0
+        start_time = time.time()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            for task in tasks:
+                # Backpressure: keep a bounded number of results pending in memory
+                if len(in_flight) >= workers * MAX_IN_FLIGHT_FACTOR:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    written += sum(_write(conn, future.result()) for future in done)
+                in_flight.add(executor.submit(compute_greeks_chunk, db_path, task, risk_free_rate))
+            done, _ = wait(in_flight, return_when=ALL_COMPLETED)
+            written += sum(_write(conn, future.result()) for future in done)
+        logger.info(f"Wrote greeks for {written} ticks in {time.time() - start_time:.1f} seconds")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute IV and greeks of every option tick")
+    parser.add_argument("db_path", nargs="?", default=OPTION_DB_PATH, help="SQLite database to update")
+    parser.add_argument("--risk-free-rate", type=float, default=0.0, help="annual risk-free rate")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="recompute every tick instead of only new ones")
+    args = parser.parse_args()
+    build_greeks(args.db_path, risk_free_rate=args.risk_free_rate, workers=args.workers, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# clean_db.py
+import argparse
+import logging
+import sqlite3
+import sys
+import time
+
+import data.query as queries
+from data.constants import OPTION_DB_PATH
+from data.panda import get_tick_layouts
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[logging.StreamHandler(sys.stdout)])
+logger = logging.getLogger(__name__)
+
+# Tick table -> (series key column, price column the loaders carry forward)
+TICK_TABLES = {
+    "EquityTick": ("Symbol", "Price"),
+    "OptionsTick": ("ContractId", "Close"),
+}
+
+
+def clean_database(conn):
+    """
+    Removes duplicate (key, DateTime) ticks (keeping the first, as compact_db.py does),
+    carries the last known price forward into NULL prices, and records each table's
+    latest DateTime and row count in CleanMark. Loaders trust frames that end at or before
+    the mark while the row count still matches and skip their dedupe, sort and fill passes;
+    re-run after loading new ticks.
+    """
+    if conn.execute(queries.FETCH_CLEAN_MARK_TABLE).fetchone() is not None and \
+            "RowCount" not in {name for name, in conn.execute(queries.FETCH_CLEAN_MARK_COLUMNS)}:
+        conn.execute(queries.DROP_CLEAN_MARK)  # marks without row counts; every table is re-marked below
+    conn.execute(queries.CREATE_CLEAN_MARK)
+    layouts = get_tick_layouts(conn)
+    for table, (key, column) in TICK_TABLES.items():
+        if conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is None:
+            continue
+        start_time = time.time()
+        layout = layouts.get(table, queries.TICK_LAYOUT_RAW)
+        with conn:
+            removed = 0
+            if layout == queries.TICK_LAYOUT_RAW:
+                removed = conn.execute(queries.DELETE_DUPLICATE_TICKS.format(table=table, key=key)).rowcount
+            order = "Seq" if layout == queries.TICK_LAYOUT_COMPACT_DELTA else "DateTime"
+            filled = conn.execute(queries.FILL_NULL_TICK_PRICES.format(
+                table=table, key=key, column=column, order=order)).rowcount
+            through = conn.execute(queries.FETCH_MAX_TICK_DATETIME_BY_LAYOUT[layout].format(table=table)).fetchone()[0]
+            if through is not None:
+                row_count = conn.execute(queries.FETCH_TICK_ROW_COUNT.format(table=table)).fetchone()[0]
+                conn.execute(queries.UPSERT_CLEAN_MARK, (table, through, row_count))
+        logger.info(f"{table}: removed {removed} duplicate ticks, filled {filled} missing prices, "
+                    f"clean through DateTime {through} ({time.time() - start_time:.1f} seconds)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate and gap-fill the tick tables and mark them clean")
+    parser.add_argument("db_path", nargs="?", default=OPTION_DB_PATH, help="SQLite database to clean in place")
+    args = parser.parse_args()
+    conn = sqlite3.connect(args.db_path)
+    try:
+        clean_database(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
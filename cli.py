@@ -0,0 +1,424 @@
+# cli.py
+"""
+Command line entry point for headless backtests (cron, CI, batch jobs):
+
+  python cli.py run strategy.yaml --trades --output results/
+  python cli.py sweep strategy.yaml --set exit_conditions.time_exit=14:45,15:00 --set legs.0.lots=1,2
+  python cli.py sweep strategy.yaml --set ... --queue /shared/sweep1   (workers: python cli.py worker /shared/sweep1)
+  python cli.py stress strategy.yaml --shock spot_shock=-0.05,0,0.05
+  python cli.py warm-cache strategy.yaml
+  python cli.py bench strategy.yaml --repeat 5
+
+A config file (JSON, or YAML with PyYAML installed) only needs the keys that differ from
+config.config_parser.strategy_config. pandas, the engine, matplotlib and the remote
+client are imported inside the subcommands that use them, so `--help` and argument
+errors return immediately and headless runs never load matplotlib.
+"""
+import argparse
+import copy
+import itertools
+import json
+import logging
+import sys
+import time
+
+# Logs go to stderr so stdout carries only results (JSON lines / CSV) for the caller
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[logging.StreamHandler(sys.stderr)])
+logger = logging.getLogger(__name__)
+
+
+def merge_config(base: dict, overrides: dict) -> dict:
+    """Copy of `base` with `overrides` applied recursively; lists and scalars are replaced"""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_config(path=None) -> dict:
+    from config.config_parser import get_strategy_config, update_underlying_asset_config
+    overrides = {}
+    if path:
+        with open(path) as f:
+            if path.endswith((".yaml", ".yml")):
+                import yaml
+                overrides = yaml.safe_load(f) or {}
+            else:
+                overrides = json.load(f)
+    return update_underlying_asset_config(merge_config(get_strategy_config(), overrides))
+
+
+def parse_value(text: str):
+    """Numbers, booleans and JSON literals as such, anything else as a string"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def set_path(config: dict, path: str, value) -> None:
+    """Sets a dotted key such as "backtest_settings.capital" or "legs.0.lots" (list index)"""
+    *parents, last = path.split(".")
+    node = config
+    for key in parents:
+        node = node[int(key)] if isinstance(node, list) else node.setdefault(key, {})
+    if isinstance(node, list):
+        node[int(last)] = value
+    else:
+        node[last] = value
+
+
+def run_one(config: dict, accessor, underlying_cache: dict, checkpoint_path=None):
+    """Backtest of `config`; the underlying is loaded once per (symbol, bar size) via `underlying_cache`"""
+    from data.bars import parse_frequency
+    from engine.backtest_engine import BacktestEngine
+    from main import create_strategy_from_config, load_underlying
+
+    key = (config["underlying_asset"]["symbol"], parse_frequency(config["backtest_settings"].get("data_frequency")))
+    if key not in underlying_cache:
+        underlying_cache[key] = load_underlying(accessor, *key)
+    if underlying_cache[key].empty:
+        raise ValueError(f"No underlying data for {key[0]}")
+    engine = BacktestEngine(underlying_cache[key], create_strategy_from_config(config), accessor, config)
+    engine.run_backtest(checkpoint_path)
+    return engine
+
+
+def cmd_run(args) -> int:
+    from data.tiered_accessor import create_default_accessor
+
+    config = load_config(args.config)
+    if args.stream:
+        from engine.streaming import StreamingBacktestEngine
+        from main import create_strategy_from_config
+        # No in-memory cache tier: it would keep every streamed day alive
+        engine = StreamingBacktestEngine(create_strategy_from_config(config),
+                                         create_default_accessor(memory_entries=0), config)
+        engine.run_backtest()
+    else:
+        engine = run_one(config, create_default_accessor(), {}, args.checkpoint)
+    result = {"metrics": engine.performance_metrics(), "n_trades": len(engine.trades)}
+    n_resamples = args.robustness or config.get("reporting", {}).get("robustness_resamples", 0)
+    if n_resamples:
+        result["robustness"] = engine.robustness_report(n_resamples=n_resamples)
+    print(json.dumps(result, default=str))
+    if args.trades:
+        for trade in engine.trades:
+            print(json.dumps(trade, default=str))
+    if args.output:
+        from main import save_results
+        save_results(engine, args.output)
+    if args.plot:
+        engine.plot_results()
+    return 0
+
+
+def sweep_variants(assignments: list) -> list:
+    """Every combination of the --set PATH=V1,V2 values, each as [(path, value), ...]"""
+    grid = []
+    for assignment in assignments:
+        path, _, values = assignment.partition("=")
+        if not values:
+            raise SystemExit(f"--set expects PATH=V1,V2,...: {assignment}")
+        grid.append([(path, parse_value(value)) for value in values.split(",")])
+    return [list(variant) for variant in itertools.product(*grid)]
+
+
+def run_variant(base: dict, variant: list, accessor, underlying_cache: dict) -> dict:
+    """Result row of one sweep variant: its params with the metrics, or the error it raised"""
+    config = copy.deepcopy(base)
+    for path, value in variant:
+        set_path(config, path, value)
+    params = {path: value for path, value in variant}
+    try:
+        engine = run_one(config, accessor, underlying_cache)
+        return {"params": params, "metrics": engine.performance_metrics(), "n_trades": len(engine.trades)}
+    except Exception as e:
+        return {"params": params, "error": str(e)}
+
+
+def write_table(rows: list, path: str) -> None:
+    """Sweep result rows as one flat CSV table: a column per param and per metric"""
+    import pandas as pd
+    table = pd.json_normalize(rows)
+    table.columns = [column.split(".", 1)[-1] for column in table.columns]
+    table.to_csv(path, index=False)
+    logger.info(f"Wrote {len(table)} rows to {path}")
+
+
+def cmd_sweep(args) -> int:
+    base = load_config(args.config)
+    variants = sweep_variants(args.set)
+    logger.info(f"Sweeping {len(variants)} variants")
+    rows = []
+    if args.queue:
+        try:
+            rows = coordinate_sweep(args, base, variants)
+        except TimeoutError as e:
+            logger.error(str(e))
+            return 1
+        for row in rows:
+            print(json.dumps(row, default=str))
+    else:
+        from data.tiered_accessor import create_default_accessor
+        accessor = create_default_accessor()
+        underlying_cache = {}
+        for variant in variants:
+            rows.append(run_variant(base, variant, accessor, underlying_cache))
+            print(json.dumps(rows[-1], default=str))
+        logger.info(f"Data access: {accessor.stats()}")
+    if args.table:
+        write_table(rows, args.table)
+    return 1 if any("error" in row for row in rows) else 0
+
+
+def coordinate_sweep(args, base: dict, variants: list) -> list:
+    """
+    Coordinator of a distributed sweep: splits the variants into units of --unit-size in the
+    shared --queue directory, requeues units of workers that stop heartbeating, and returns
+    all result rows in variant order once every unit is done. Workers are `cli.py worker DIR`
+    processes on any host that sees the directory; --local-workers starts some here.
+    Raises TimeoutError when no unit finishes and no worker heartbeats for --idle-timeout seconds.
+    """
+    import subprocess
+    from utils.work_queue import DirectoryWorkQueue
+
+    queue = DirectoryWorkQueue(args.queue)
+    units = {}
+    for start in range(0, len(variants), args.unit_size):
+        units[f"unit-{start:08d}"] = {"variants": [{"index": index, "params": variants[index]}
+                                                   for index in range(start, min(start + args.unit_size, len(variants)))]}
+    queue.create({"base": base, "n_variants": len(variants)}, units)
+    logger.info(f"Queued {len(units)} units in {args.queue}")
+    workers = [subprocess.Popen([sys.executable, __file__, "worker", args.queue])
+               for _ in range(args.local_workers)]
+    try:
+        reported = None
+        last_activity = time.time()
+        while True:
+            for unit_id in queue.requeue_lost(args.heartbeat_timeout):
+                logger.warning(f"Requeued {unit_id}: its worker stopped sending heartbeats")
+            finished, total = queue.progress()
+            if finished != reported:
+                logger.info(f"{finished}/{total} units done")
+                reported = finished
+                last_activity = time.time()
+            if finished == total:
+                break
+            if queue.live_workers(args.heartbeat_timeout):
+                last_activity = time.time()
+            elif args.idle_timeout and time.time() - last_activity > args.idle_timeout:
+                raise TimeoutError(f"No worker heartbeat and no finished unit for {args.idle_timeout:.0f}s "
+                                   f"({finished}/{total} units done); start workers with `cli.py worker {args.queue}`")
+            time.sleep(args.poll)
+    finally:
+        queue.finish()
+        for worker in workers:
+            worker.wait()
+    rows = {}
+    for unit in queue.results():
+        rows.update({row["index"]: row["row"] for row in unit["rows"]})
+    return [rows[index] for index in sorted(rows)]
+
+
+def cmd_worker(args) -> int:
+    """Runs units of a distributed sweep (see coordinate_sweep) until its coordinator finishes"""
+    from data.tiered_accessor import create_default_accessor
+    from utils.work_queue import DirectoryWorkQueue, Heartbeat, new_worker_id
+
+    queue = DirectoryWorkQueue(args.queue)
+    worker = new_worker_id()
+    while not queue.ready():
+        time.sleep(args.poll)
+    base = queue.manifest()["base"]
+    accessor = create_default_accessor()
+    underlying_cache = {}
+    n_units = 0
+    with Heartbeat(queue, worker):
+        while not queue.done():
+            claimed = queue.claim(worker)
+            if claimed is None:
+                time.sleep(args.poll)
+                continue
+            unit_id, unit = claimed
+            rows = [{"index": variant["index"], "row": run_variant(base, variant["params"], accessor, underlying_cache)}
+                    for variant in unit["variants"]]
+            queue.complete(worker, unit_id, {"worker": worker, "rows": rows})
+            n_units += 1
+    logger.info(f"Worker {worker} finished {n_units} units")
+    return 0
+
+
+def cmd_stress(args) -> int:
+    """Backtests the config, then reprices its trades under a grid of stress scenarios"""
+    from data.tiered_accessor import create_default_accessor
+    from engine.scenarios import SCENARIO_FIELDS, scenario_grid
+
+    axes = {}
+    for assignment in args.shock:
+        field, _, values = assignment.partition("=")
+        if field not in SCENARIO_FIELDS or not values:
+            raise SystemExit(f"--shock expects one of {', '.join(SCENARIO_FIELDS)}=V1,V2,...: {assignment}")
+        axes[field] = [float(value) for value in values.split(",")]
+    engine = run_one(load_config(args.config), create_default_accessor(), {})
+    start_time = time.time()
+    summary = engine.stress_test(scenario_grid(**axes), n_paths=args.paths, seed=args.seed)["summary"]
+    logger.info(f"Repriced {len(engine.trades)} trades under {len(summary)} scenarios x {args.paths} paths "
+                f"in {time.time() - start_time:.2f} seconds")
+    for row in summary.to_dict(orient="records"):
+        print(json.dumps(row))
+    if args.table:
+        summary.to_csv(args.table, index=False)
+    return 0
+
+
+def cmd_warm_cache(args) -> int:
+    """
+    Fetches everything a run of the config reads (underlying bars and the contracts of every
+    weekly expiry in the date range near the traded price range) so they land in the local
+    columnar cache and later processes start warm.
+    """
+    import pandas as pd
+    from data.bars import parse_frequency
+    from data.tiered_accessor import create_default_accessor
+    from main import load_underlying
+    from utils.helpers import get_next_weekly_expiry, get_timestamp
+
+    config = load_config(args.config)
+    accessor = create_default_accessor()
+    symbol = config["underlying_asset"]["symbol"]
+    resolution = parse_frequency(config["backtest_settings"].get("data_frequency"))
+    start_time = time.time()
+    underlying = load_underlying(accessor, symbol, resolution)
+    if underlying.empty:
+        logger.error(f"No underlying data for {symbol}")
+        return 1
+
+    start = pd.to_datetime(config["backtest_settings"]["start_date"])
+    end = pd.to_datetime(config["backtest_settings"]["end_date"]) + pd.Timedelta(days=1)
+    window = underlying.loc[(underlying.index >= start) & (underlying.index < end), "Price"]
+    if window.empty:
+        logger.error("No underlying data in the configured date range")
+        return 1
+    low, high = window.min() * (1 - args.band), window.max() * (1 + args.band)
+    calendar = underlying.index.sort_values()
+    expiry_day = config["underlying_asset"].get("expiry_day", "THU")
+    expiries = sorted({get_next_weekly_expiry(day, expiry_day, calendar)
+                       for day in pd.DatetimeIndex(window.index.normalize().unique())})
+
+    fetched = 0
+    for expiry in expiries:
+        expiry_ts = get_timestamp(expiry)
+        contracts = accessor.get_contract_by_symbol_and_expiry(symbol, expiry_ts)
+        if contracts.empty:
+            continue
+        near = contracts[contracts["StrikePrice"].astype(float).between(low, high)]
+        for option_type, strike in near[["Type", "StrikePrice"]].drop_duplicates().itertuples(index=False):
+            try:
+                accessor.get_contract_prices(symbol, option_type, strike, expiry_ts, resolution)
+                accessor.get_contract_greeks(symbol, option_type, strike, expiry_ts)
+                fetched += 1
+            except ValueError:
+                continue
+    logger.info(f"Warmed {fetched} contracts over {len(expiries)} expiries in {time.time() - start_time:.1f} seconds")
+    logger.info(f"Data access: {accessor.stats()}")
+    return 0
+
+
+def cmd_bench(args) -> int:
+    """Times start-up (imports), underlying load, engine run and metrics, cold then warm"""
+    start_time = time.perf_counter()
+    from data.tiered_accessor import create_default_accessor
+    import engine.backtest_engine  # noqa: F401, timed as part of start-up
+    timings = {"imports": time.perf_counter() - start_time}
+
+    config = load_config(args.config)
+    accessor = create_default_accessor()
+    runs = []
+    for _ in range(args.repeat):
+        phase_start = time.perf_counter()
+        underlying_cache = {}
+        backtest = run_one(config, accessor, underlying_cache)
+        run_time = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+        backtest.performance_metrics()
+        runs.append({"run": run_time, "metrics": time.perf_counter() - phase_start})
+    timings["first_run"] = runs[0]
+    if len(runs) > 1:
+        timings["warm_run_min"] = {phase: min(run[phase] for run in runs[1:]) for phase in runs[0]}
+    timings["bars"] = len(backtest.underlying_data)
+    timings["data_access"] = accessor.stats()
+    print(json.dumps(timings))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Headless backtest runner")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="run one backtest and print its metrics as JSON")
+    run.add_argument("config", nargs="?", help="JSON/YAML config overriding the default strategy config")
+    run.add_argument("--plot", action="store_true", help="show the matplotlib charts (headless by default)")
+    run.add_argument("--trades", action="store_true", help="also print every trade as a JSON line")
+    run.add_argument("--output", help="directory to write equity curve and trade CSVs to")
+    # The streaming engine has no snapshot support, so the two are an argument error together
+    mode = run.add_mutually_exclusive_group()
+    mode.add_argument("--stream", action="store_true",
+                      help="read the underlying day by day (bounded memory for long tick-level ranges)")
+    mode.add_argument("--checkpoint", help="snapshot file: resume from it if it matches, save the final state to it")
+    run.add_argument("--robustness", type=int, default=0, help="bootstrap resamples for confidence intervals")
+    run.set_defaults(func=cmd_run)
+
+    sweep = subparsers.add_parser("sweep", help="run every combination of parameter values")
+    sweep.add_argument("config", nargs="?", help="base JSON/YAML config")
+    sweep.add_argument("--set", action="append", default=[], metavar="PATH=V1,V2",
+                       help="dotted config key and comma-separated values, e.g. legs.0.lots=1,2")
+    sweep.add_argument("--table", help="also write all results as one CSV table")
+    sweep.add_argument("--queue", help="shared directory to distribute the sweep through (coordinator mode)")
+    sweep.add_argument("--unit-size", type=int, default=4, help="variants per work unit (with --queue)")
+    sweep.add_argument("--local-workers", type=int, default=0, help="workers to start on this host (with --queue)")
+    sweep.add_argument("--heartbeat-timeout", type=float, default=60.0,
+                       help="seconds without a heartbeat before a worker's units are requeued")
+    sweep.add_argument("--idle-timeout", type=float, default=600.0,
+                       help="give up after this many seconds without a live worker or a finished unit (0: wait forever)")
+    sweep.add_argument("--poll", type=float, default=1.0, help="seconds between queue checks")
+    sweep.set_defaults(func=cmd_sweep)
+
+    worker = subparsers.add_parser("worker", help="run units of a distributed sweep from a shared directory")
+    worker.add_argument("queue", help="directory given to the coordinator's --queue")
+    worker.add_argument("--poll", type=float, default=1.0, help="seconds between queue checks when idle")
+    worker.set_defaults(func=cmd_worker)
+
+    stress = subparsers.add_parser("stress", help="PnL distribution of the run's trades under stress scenarios")
+    stress.add_argument("config", nargs="?", help="JSON/YAML config")
+    stress.add_argument("--shock", action="append", default=[], metavar="FIELD=V1,V2",
+                        help="scenario axis values, e.g. spot_shock=-0.05,0,0.05 (others use the default grid)")
+    stress.add_argument("--paths", type=int, default=200, help="intraday paths per scenario")
+    stress.add_argument("--seed", type=int, help="random seed of the paths")
+    stress.add_argument("--table", help="also write the summary as a CSV table")
+    stress.set_defaults(func=cmd_stress)
+
+    warm = subparsers.add_parser("warm-cache", help="prefetch the data a run reads into the local caches")
+    warm.add_argument("config", nargs="?", help="JSON/YAML config")
+    warm.add_argument("--band", type=float, default=0.05,
+                      help="strikes within this fraction of the traded price range are fetched")
+    warm.set_defaults(func=cmd_warm_cache)
+
+    bench = subparsers.add_parser("bench", help="time start-up and run phases")
+    bench.add_argument("config", nargs="?", help="JSON/YAML config")
+    bench.add_argument("--repeat", type=int, default=3, help="runs; the first is cold, the rest warm")
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# compact_db.py
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+import data.query as queries
+from data.constants import OPTION_DB_PATH
+from data.panda import get_tick_layouts
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[logging.StreamHandler(sys.stdout)])
+logger = logging.getLogger(__name__)
+
+# Tick tables that get rewritten; every other table and its indexes are copied as-is
+TICK_TABLES = ("OptionsTick", "EquityTick")
+
+
+def _page_count(conn, schema="main"):
+    return conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+
+
+def copy_other_tables(conn):
+    """Recreate the non-tick tables and their indexes from the source schema and copy their rows"""
+    tables = conn.execute(
+        "SELECT name, sql FROM src.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    for name, sql in tables:
+        if name in TICK_TABLES or name == "TickEncoding":
+            continue
+        conn.execute(sql)
+        conn.execute(f'INSERT INTO main."{name}" SELECT * FROM src."{name}"')
+        logger.info(f"Copied {name}")
+    indexes = conn.execute(
+        "SELECT tbl_name, sql FROM src.sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+    ).fetchall()
+    for table, sql in indexes:
+        if table not in TICK_TABLES:
+            conn.execute(sql)
+
+
+def compact_options_tick(conn, delta_time=False):
+    """Rewrite OptionsTick clustered on (ContractId, DateTime) with integer prices"""
+    conn.execute(queries.CREATE_COMPACT_OPTIONS_TICK)
+    conn.execute(queries.COPY_COMPACT_OPTIONS_TICK)
+    layout = queries.TICK_LAYOUT_COMPACT
+    if delta_time:
+        conn.execute(queries.CREATE_COMPACT_DELTA_OPTIONS_TICK)
+        conn.execute(queries.COPY_COMPACT_DELTA_OPTIONS_TICK)
+        conn.execute(queries.DROP_COMPACT_OPTIONS_TICK)
+        conn.execute(queries.RENAME_COMPACT_DELTA_OPTIONS_TICK)
+        layout = queries.TICK_LAYOUT_COMPACT_DELTA
+    conn.execute(queries.INSERT_TICK_ENCODING, ("OptionsTick", layout))
+    rows = conn.execute("SELECT COUNT(*) FROM main.OptionsTick").fetchone()[0]
+    logger.info(f"Compacted OptionsTick ({layout}): {rows} rows")
+
+
+def compact_equity_tick(conn):
+    """Rewrite EquityTick clustered on (Symbol, DateTime) with integer prices"""
+    conn.execute(queries.CREATE_COMPACT_EQUITY_TICK)
+    conn.execute(queries.COPY_COMPACT_EQUITY_TICK)
+    conn.execute(queries.INSERT_TICK_ENCODING, ("EquityTick", queries.TICK_LAYOUT_COMPACT))
+    rows = conn.execute("SELECT COUNT(*) FROM main.EquityTick").fetchone()[0]
+    logger.info(f"Compacted EquityTick: {rows} rows")
+
+
+def compact_database(source_path, target_path, delta_time=False):
+    """
+    Writes a copy of `source_path` to `target_path` with the tick tables in the compact
+    layout read by PandaAccessor: WITHOUT ROWID tables clustered on their key, prices as
+    integer paise and, with `delta_time`, OptionsTick timestamps stored as gaps.
+    """
+    with sqlite3.connect(source_path) as conn:
+        if get_tick_layouts(conn):
+            raise ValueError(f"{source_path} is already compact")
+
+    tmp_path = target_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("ATTACH DATABASE ? AS src", (source_path,))
+        source_pages = _page_count(conn, "src")
+        page_size = conn.execute("PRAGMA src.page_size").fetchone()[0]
+
+        conn.execute("BEGIN")
+        conn.execute(queries.CREATE_TICK_ENCODING)
+        copy_other_tables(conn)
+        compact_options_tick(conn, delta_time=delta_time)
+        compact_equity_tick(conn)
+        conn.execute("COMMIT")
+
+        conn.execute("DETACH DATABASE src")
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+        target_pages = _page_count(conn)
+    finally:
+        conn.close()
+    os.replace(tmp_path, target_path)
+    logger.info(
+        f"{source_pages * page_size / 1e6:.1f} MB -> {target_pages * page_size / 1e6:.1f} MB "
+        f"({target_pages / source_pages:.0%} of the original pages)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite the tick tables of a SQLite DB into the compact layout")
+    parser.add_argument("source", nargs="?", default=OPTION_DB_PATH, help="raw database to read")
+    parser.add_argument("target", nargs="?", help="output path (default: <source>.compact.db)")
+    parser.add_argument("--delta-time", action="store_true",
+                        help="store OptionsTick timestamps as the gap to the previous tick of the contract")
+    parser.add_argument("--replace", action="store_true",
+                        help="replace the source file with the compacted database once it is written")
+    args = parser.parse_args()
+
+    target = args.target or os.path.splitext(args.source)[0] + ".compact.db"
+    start_time = time.time()
+    compact_database(args.source, target, delta_time=args.delta_time)
+    if args.replace:
+        os.replace(target, args.source)
+        target = args.source
+    logger.info(f"Wrote {target} in {time.time() - start_time:.1f} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,29 @@
 # conditions/base.py
 
+import numpy as np
+
+
 class Condition:
+    # Bars of historical_data (up to and including the current one) that evaluate reads;
+    # the streaming engine keeps only the largest such lookback in memory
+    history_bars = 0
+    # Path-dependent exits (stops, targets) depend only on the bars since entry, so the
+    # engine can find their trigger for a whole trade at once with first_passage
+    path_dependent = False
+
     def evaluate(self, current_data, historical_data=None, context=None):
         raise NotImplementedError("Subclasses should implement this!")
+
+    def first_passage(self, bars, context):
+        """
+        Position in `bars` (the underlying bars checked after entry, in order) of the first
+        one where the condition holds, or None. Must agree with calling evaluate on each of
+        them in turn.
+        """
+        raise NotImplementedError("Only path-dependent conditions implement first_passage")
+
+
+def first_true(mask) -> int:
+    """Position of the first True in a boolean array, or None"""
+    hits = np.flatnonzero(mask)
+    return int(hits[0]) if len(hits) else None
@@ -1,12 +1,17 @@
 # conditions/technical_conditions.py
 
-from .base import Condition
+import numpy as np
+import pandas as pd
+
+from utils.helpers import get_nearest_option_prices
+from .base import Condition, first_true
 
 
 class MovingAverageCondition(Condition):
     def __init__(self, window, direction='above'):
         self.window = window
         self.direction = direction.lower()
+        self.history_bars = window
 
     def evaluate(self, current_data, historical_data=None, context=None):
         if historical_data is None or len(historical_data) < self.window:
@@ -18,6 +23,8 @@ class MovingAverageCondition(Condition):
 
 
 class StopLossCondition(Condition):
+    path_dependent = True
+
     def __init__(self,
                  account_stop_loss_pct: float = None,
                  strategy_stop_loss_pct: float = None,
@@ -49,64 +56,51 @@ class StopLossCondition(Condition):
         """
         if context is None:
             return False
+        prices = np.array([current_data.get("Price")], dtype=float)
+        return bool(self._triggered(prices, pd.DatetimeIndex([current_data.name]), context)[0])
+
+    def first_passage(self, bars, context):
+        return first_true(self._triggered(bars["Price"].to_numpy(dtype=float), bars.index, context))
 
+    def _triggered(self, prices: np.ndarray, times, context) -> np.ndarray:
+        """Stop flags for underlying `prices` at `times`, all stops checked at once"""
         entry_underlying = context.get("entry_underlying_price")
-        current_underlying = current_data.get("Price")
         entry_capital = context.get("current_capital")
-        option_data_series = context.get("option_data_series", [])
-        entry_option_prices = context.get("entry_option_prices", [])
         legs = context.get("legs", [])
-        contract_multiplier = context.get("contract_multiplier", 50)
-
-        # Compute estimated current profit from options for the entire trade
-        total_profit = 0
-        from new_backtest.utils.helpers import get_nearest_option_price
-        for idx, leg in enumerate(legs):
-            option_df = option_data_series[idx]
-            current_option_price = get_nearest_option_price(option_df, current_data.name)
-            entry_option_price = entry_option_prices[idx]
-            lots = leg.quantity
-            if leg.action.lower() == "buy":
-                profit = (current_option_price - entry_option_price) * contract_multiplier * lots
-            else:
-                profit = (entry_option_price - current_option_price) * contract_multiplier * lots
-            total_profit += profit
+        stop_triggered = np.zeros(len(prices), dtype=bool)
 
         # Determine overall strategy direction (simple majority: if more BUY than SELL, assume long)
         buy_count = sum(1 for leg in legs if leg.action.lower() == "buy")
         sell_count = sum(1 for leg in legs if leg.action.lower() == "sell")
         long_strategy = buy_count >= sell_count
 
-        stop_triggered = False
-
-        # Strategy-level stop loss: if underlying moves adversely by a percentage of the entry price.
-        if self.strategy_stop_loss_pct is not None and entry_underlying is not None and current_underlying is not None:
-            if long_strategy:
-                if (entry_underlying - current_underlying) / entry_underlying >= self.strategy_stop_loss_pct:
-                    stop_triggered = True
-            else:
-                if (current_underlying - entry_underlying) / entry_underlying >= self.strategy_stop_loss_pct:
-                    stop_triggered = True
-
-        # Underlying move stop loss: similar check (can be tuned differently)
-        if self.underlying_move_stop_pct is not None and entry_underlying is not None and current_underlying is not None:
-            if long_strategy:
-                if (entry_underlying - current_underlying) / entry_underlying >= self.underlying_move_stop_pct:
-                    stop_triggered = True
-            else:
-                if (current_underlying - entry_underlying) / entry_underlying >= self.underlying_move_stop_pct:
-                    stop_triggered = True
+        # Strategy-level and underlying move stop losses: the underlying moves adversely by a
+        # percentage of the entry price (two thresholds that can be tuned differently)
+        if entry_underlying is not None:
+            adverse_move = (entry_underlying - prices if long_strategy else prices - entry_underlying) / entry_underlying
+            for stop_pct in (self.strategy_stop_loss_pct, self.underlying_move_stop_pct):
+                if stop_pct is not None:
+                    stop_triggered |= adverse_move >= stop_pct
+
+        if self.absolute_stop_loss is None and (self.account_stop_loss_pct is None or entry_capital is None):
+            return stop_triggered
+
+        # Estimated profit from options for the entire trade at every timestamp
+        contract_multiplier = context.get("contract_multiplier", 50)
+        total_profit = np.zeros(len(prices))
+        for option_df, entry_option_price, leg in zip(context.get("option_data_series", []),
+                                                      context.get("entry_option_prices", []), legs):
+            move = get_nearest_option_prices(option_df, times) - entry_option_price
+            if leg.action.lower() != "buy":
+                move = -move
+            total_profit += move * contract_multiplier * leg.quantity
 
         # Absolute loss stop: if total estimated profit is below negative threshold.
         if self.absolute_stop_loss is not None:
-            if total_profit <= -self.absolute_stop_loss:
-                stop_triggered = True
-
+            stop_triggered |= total_profit <= -self.absolute_stop_loss
         # Account-level stop loss: if loss exceeds a percentage of entry capital.
         if self.account_stop_loss_pct is not None and entry_capital is not None:
-            if total_profit <= - (self.account_stop_loss_pct * entry_capital):
-                stop_triggered = True
-
+            stop_triggered |= total_profit <= -(self.account_stop_loss_pct * entry_capital)
         return stop_triggered
 
 
@@ -122,35 +116,52 @@ class VIXCondition(Condition):
         return vix > self.threshold if self.direction == 'above' else vix < self.threshold
 
 class TakeProfitCondition(Condition):
+    path_dependent = True
+
     def __init__(self, take_profit_pct=None, take_profit_abs=None):
         self.take_profit_pct = take_profit_pct
         self.take_profit_abs = take_profit_abs
 
     def evaluate(self, current_data, historical_data=None, context=None):
+        return bool(self._triggered(np.array([current_data['Price']], dtype=float), context or {})[0])
+
+    def first_passage(self, bars, context):
+        return first_true(self._triggered(bars["Price"].to_numpy(dtype=float), context))
+
+    def _triggered(self, prices: np.ndarray, context) -> np.ndarray:
         entry_price = context.get('entry_price')
-        current_price = current_data['Price']
         if entry_price is None:
-            return False
+            return np.zeros(len(prices), dtype=bool)
         if self.take_profit_pct is not None:
-            return (current_price - entry_price) / entry_price >= self.take_profit_pct
+            return (prices - entry_price) / entry_price >= self.take_profit_pct
         elif self.take_profit_abs is not None:
-            return current_price >= entry_price + self.take_profit_abs
-        return False
+            return prices >= entry_price + self.take_profit_abs
+        return np.zeros(len(prices), dtype=bool)
+
 
 class TrailingStoplossCondition(Condition):
+    path_dependent = True
+
     def __init__(self, trailing_stoploss_pct):
         self.trailing_stoploss_pct = trailing_stoploss_pct
+        # Running maximum of the current trade (bar-by-bar evaluation), reset on every new entry
         self.max_price = None
+        self.entry_time = None
 
     def evaluate(self, current_data, historical_data=None, context=None):
+        context = context or {}
         current_price = current_data['Price']
-        if self.max_price is None:
-            # Initialize max price as entry price
+        if self.max_price is None or context.get('entry_time') != self.entry_time:
+            # New trade: the maximum starts at the entry price
+            self.entry_time = context.get('entry_time')
             self.max_price = context.get('entry_price', current_price)
-        else:
-            # Update max price if current price exceeds it
-            if current_price > self.max_price:
-                self.max_price = current_price
+        self.max_price = max(self.max_price, current_price)
         # Check if current price has dropped by trailing_stoploss_pct from the maximum
         return (current_price - self.max_price) / self.max_price <= -self.trailing_stoploss_pct
 
+    def first_passage(self, bars, context):
+        prices = bars["Price"].to_numpy(dtype=float)
+        if not len(prices):
+            return None
+        max_price = np.maximum.accumulate(np.maximum(prices, context.get('entry_price', prices[0])))
+        return first_true((prices - max_price) / max_price <= -self.trailing_stoploss_pct)
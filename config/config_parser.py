@@ -65,6 +65,8 @@ strategy_config = {
         "start_date": "2022-05-30",
         "end_date": "2022-06-03",
         # "trading_days": ["Monday", "Tuesday", "Wednesday","Thursday"]
+        # "risk_free_rate": 0.065,  # annual rate for implied vol / delta strike selection, default 0
+        # "strike_tolerance": 100,  # points a strike without a contract may move to the nearest listed one, default 2 x multiplier
     },
     "logging": {
         "log_level": "INFO",
@@ -72,7 +74,9 @@ strategy_config = {
     },
     "reporting": {
         "metrics": ["sharpe_ratio", "win_rate", "max_drawdown", "profit_factor"],
-        "plot_styles": {"theme": "default"}
+        "plot_styles": {"theme": "default"},
+        # Bootstrap confidence intervals after each run (engine.robustness); 0 disables
+        "robustness_resamples": 0,
     }
 }
 
@@ -0,0 +1,34 @@
+# data/accessor.py
+from typing import Any, Protocol, runtime_checkable
+import pandas
+
+
+@runtime_checkable
+class DataAccessor(Protocol):
+    """
+    Interface shared by every data accessor the engine can consume
+    (PandaAccessor, SupabaseAccessor, TieredAccessor, ...).
+    All DateTime columns are epoch seconds, as stored in the SQLite tick tables.
+    `resolution` is a bar size in seconds (see data.bars); None returns raw ticks.
+    """
+
+    def get_contract_id(self, symbol, option_type, strike_price, expiry_date) -> Any: ...
+
+    def get_contract_prices(self, symbol, option_type, strike_price, expiry_date,
+                            resolution=None) -> pandas.DataFrame: ...
+
+    def get_contract_by_symbol_and_expiry(self, symbol, expiry_date) -> pandas.DataFrame: ...
+
+    def get_symbols(self) -> pandas.DataFrame: ...
+
+    def get_equity_data_by_date(self, symbol, start_date, end_date, resolution=None) -> pandas.DataFrame: ...
+
+    def get_equity_data(self, symbol, resolution=None) -> pandas.DataFrame: ...
+
+
+def data_version(accessor) -> str:
+    """
+    Fingerprint of the data currently behind `accessor` (its optional `data_version()`),
+    "" when it cannot tell. Results cached across runs are keyed on it as well as the config.
+    """
+    return accessor.data_version() if hasattr(accessor, "data_version") else ""
@@ -0,0 +1,48 @@
+# data/async_accessor.py
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from data.accessor import DataAccessor
+
+
+class AsyncAccessor:
+    """
+    Awaitable view of a blocking DataAccessor (PandaAccessor, TieredAccessor, ...) for
+    async code such as the FastAPI handlers. Every call runs on a dedicated, bounded
+    thread pool, so sqlite3 / pandas reads never block the event loop and at most
+    `max_workers` of them hit the database at once; awaiting callers just queue. Views of
+    other accessors (e.g. a per-request BatchAccessor) can share the pool via `executor`.
+    """
+
+    def __init__(self, accessor: DataAccessor, max_workers: int = 8, executor: ThreadPoolExecutor = None) -> None:
+        self.accessor = accessor
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="accessor")
+
+    async def _call(self, method: str, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(getattr(self.accessor, method), *args))
+
+    async def get_contract_id(self, symbol, option_type, strike_price, expiry_date):
+        return await self._call("get_contract_id", symbol, option_type, strike_price, expiry_date)
+
+    async def get_contract_prices(self, symbol, option_type, strike_price, expiry_date, resolution=None):
+        return await self._call("get_contract_prices", symbol, option_type, strike_price, expiry_date, resolution)
+
+    async def get_contract_by_symbol_and_expiry(self, symbol, expiry_date):
+        return await self._call("get_contract_by_symbol_and_expiry", symbol, expiry_date)
+
+    async def get_symbols(self):
+        return await self._call("get_symbols")
+
+    async def get_equity_data_by_date(self, symbol, start_date, end_date, resolution=None):
+        return await self._call("get_equity_data_by_date", symbol, start_date, end_date, resolution)
+
+    async def get_equity_data(self, symbol, resolution=None):
+        return await self._call("get_equity_data", symbol, resolution)
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
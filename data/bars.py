@@ -0,0 +1,72 @@
+# data/bars.py
+from typing import Optional
+
+import pandas
+
+# data_frequency values that mean "iterate the raw ticks"
+TICK_FREQUENCIES = (None, "", "tick", "intraday")
+
+
+def parse_frequency(data_frequency) -> Optional[int]:
+    """
+    Bar resolution in seconds for a backtest_settings.data_frequency value such as
+    "1min", "5min" or "1h"; None for raw ticks ("intraday", the default).
+    """
+    if isinstance(data_frequency, str):
+        data_frequency = data_frequency.strip().lower()
+    if data_frequency in TICK_FREQUENCIES:
+        return None
+    try:
+        seconds = int(pandas.to_timedelta(data_frequency).total_seconds())
+    except ValueError:
+        raise ValueError(f"Unsupported data_frequency: {data_frequency}")
+    if seconds <= 0:
+        raise ValueError(f"Unsupported data_frequency: {data_frequency}")
+    return seconds
+
+
+def bar_times(epoch_seconds: pandas.Series, resolution: int) -> pandas.Series:
+    """
+    Timestamp of the bar each tick falls in. Bars cover [t - resolution, t) on the epoch
+    grid and are stamped with their end time t, so a bar never holds prices from after
+    its timestamp (same convention as the materialized bar tables).
+    """
+    return epoch_seconds - epoch_seconds % resolution + resolution
+
+
+def _first_and_last(bars: pandas.Series):
+    # Ticks are sorted by time, so each bar is one contiguous run
+    return ~bars.duplicated(keep="first"), ~bars.duplicated(keep="last")
+
+
+def resample_option_ticks(df: pandas.DataFrame, resolution: int) -> pandas.DataFrame:
+    """OHLC/Volume/OI bars from option ticks (DateTime in epoch seconds), matching OptionsBar rows"""
+    df = df.sort_values("DateTime", kind="stable")
+    bars = bar_times(df["DateTime"], resolution)
+    first, last = _first_and_last(bars)
+    grouped = df.groupby(bars, sort=False)
+    return pandas.DataFrame({
+        "DateTime": bars[last].to_numpy(),
+        "Open": df["Open"][first].to_numpy(),
+        "High": grouped["High"].max().to_numpy(),
+        "Low": grouped["Low"].min().to_numpy(),
+        "Close": df["Close"][last].to_numpy(),
+        "Volume": grouped["Volume"].sum().to_numpy(),
+        "OI": df["OI"][last].to_numpy(),
+    })
+
+
+def resample_equity_ticks(df: pandas.DataFrame, resolution: int) -> pandas.DataFrame:
+    """OHLC bars from equity ticks (DateTime in epoch seconds); Price is the bar close, matching EquityBar rows"""
+    df = df.sort_values("DateTime", kind="stable")
+    bars = bar_times(df["DateTime"], resolution)
+    first, last = _first_and_last(bars)
+    grouped = df.groupby(bars, sort=False)
+    return pandas.DataFrame({
+        "Symbol": df["Symbol"][last].to_numpy(),
+        "DateTime": bars[last].to_numpy(),
+        "Open": df["Price"][first].to_numpy(),
+        "High": grouped["Price"].max().to_numpy(),
+        "Low": grouped["Price"].min().to_numpy(),
+        "Price": df["Price"][last].to_numpy(),
+    })
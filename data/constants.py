@@ -1,3 +1,21 @@
 # OPTION_DB_PATH='./data/sqlite/options.db'   # ensure db is placed at this location
 OPTION_DB_PATH='./data/sample/options.db'   # uncomment for inital setup
 OUTPUT_PATH='./.results'
+CHART_CACHE_PATH='./.results/charts'   # rendered charts keyed by run id
+
+REMOTE_CACHE_PATH='./.cache/remote'   # on-disk read-through cache for remote accessors
+REMOTE_VERSION_TTL_SECONDS=60   # how long SupabaseAccessor trusts the remote data version it last read
+# Unique key of each remote table and view: migrate_data.py upserts on it and
+# SupabaseAccessor orders pages by it, so Range requests never skip or repeat rows
+REMOTE_UNIQUE_KEYS={
+    'equity_data': 'symbol,timestamp',
+    'option_data': 'symbol,expiry_date,strike,option_type,timestamp',
+    'option_contracts': 'symbol,expiry_date,option_type,strike',
+    'equity_symbols': 'symbol',
+    'migration_watermarks': 'table_name',
+}
+LOCAL_COLUMNAR_CACHE_PATH='./.cache/columnar'   # on-disk columnar tier of TieredAccessor
+
+BAR_FREQUENCIES=['1min', '5min', '15min', '60min']   # bar tables built by build_bars.py by default
+
+IST_OFFSET_SECONDS=19800   # IST is UTC+05:30 all year (no DST), so epochs convert with a fixed shift
@@ -1,19 +1,117 @@
 import sqlite3
 import data.query as queries
+from data.bars import resample_equity_ticks, resample_option_ticks
 from typing import Optional
+import os
 import pandas
 
 # TODO: make the code strongly typed, according to the need of the layer
 
+def get_tick_layouts(conn) -> dict:
+    """Layout of each tick table rewritten by compact_db.py; tables not listed are raw"""
+    if conn.execute(queries.FETCH_TICK_ENCODING_TABLE).fetchone() is None:
+        return {}
+    return dict(conn.execute(queries.FETCH_TICK_LAYOUTS).fetchall())
+
+
+def get_bar_builds(conn) -> dict:
+    """(tick table, resolution) -> last tick DateTime aggregated into the bar tables by build_bars.py"""
+    if conn.execute(queries.FETCH_BAR_BUILD_TABLE).fetchone() is None:
+        return {}
+    return {(table, resolution): last for table, resolution, last in conn.execute(queries.FETCH_BAR_BUILDS)}
+
+
+def get_clean_marks(conn) -> dict:
+    """
+    Tick table -> latest DateTime cleaned by clean_db.py, for the tables whose row count
+    still matches the mark (rows inserted or deleted since may be duplicates or gaps)
+    """
+    if conn.execute(queries.FETCH_CLEAN_MARK_TABLE).fetchone() is None:
+        return {}
+    if "RowCount" not in {name for name, in conn.execute(queries.FETCH_CLEAN_MARK_COLUMNS)}:
+        return {}
+    return {table: through for table, through, row_count in conn.execute(queries.FETCH_CLEAN_MARKS).fetchall()
+            if conn.execute(queries.FETCH_TICK_ROW_COUNT.format(table=table)).fetchone()[0] == row_count}
+
+
 class PandaAccessor:
+    """
+    SQLite accessor. Price methods take an optional `resolution` (bar size in seconds):
+    bars are read from the materialized bar tables when built for that resolution and
+    resampled from the ticks otherwise. Frames read from tables cleaned by clean_db.py
+    carry `attrs["clean"]` so loaders can skip their dedupe/sort/fill passes.
+    The DB metadata (layouts, bar builds, greeks, clean marks) is re-read whenever
+    `data_version()` changes, since compact/build/clean runs rewrite it under a live accessor.
+    """
     def __init__(self, db_path: str) -> None:
         self.__db_path = db_path
+        self.__metadata_version = None
+        self.__layouts = None
+        self.__bar_builds = None
+        self.__has_greeks = None
+        self.__clean_marks = None
+    def data_version(self) -> str:
+        """Changes with every write to the DB file (new ticks, bar builds, clean marks, ...)"""
+        db_stat = os.stat(self.__db_path)
+        return f"{os.path.abspath(self.__db_path)}:{db_stat.st_size}:{db_stat.st_mtime_ns}"
+
     def _query(self, query: str, params: Optional[tuple] = None) -> pandas.DataFrame:
         with sqlite3.connect(self.__db_path) as conn:
             df = pandas.read_sql_query(query, conn, params=params)  # type: ignore
     
         return df
 
+    def _check_metadata_version(self) -> None:
+        # One stat per call; the metadata is dropped and lazily re-read after any write to the DB
+        version = self.data_version()
+        if version != self.__metadata_version:
+            self.__layouts = self.__bar_builds = self.__has_greeks = self.__clean_marks = None
+            self.__metadata_version = version
+
+    def _layout(self, table: str) -> str:
+        # Compact tick tables are decoded back to the raw columns by their queries
+        self._check_metadata_version()
+        layouts = self.__layouts
+        if layouts is None:
+            with sqlite3.connect(self.__db_path) as conn:
+                layouts = self.__layouts = get_tick_layouts(conn)
+        return layouts.get(table, queries.TICK_LAYOUT_RAW)
+
+    def _has_bars(self, table: str, resolution: int) -> bool:
+        self._check_metadata_version()
+        bar_builds = self.__bar_builds
+        if bar_builds is None:
+            with sqlite3.connect(self.__db_path) as conn:
+                bar_builds = self.__bar_builds = get_bar_builds(conn)
+        return (table, resolution) in bar_builds
+
+    def _greeks_built(self) -> bool:
+        self._check_metadata_version()
+        has_greeks = self.__has_greeks
+        if has_greeks is None:
+            with sqlite3.connect(self.__db_path) as conn:
+                has_greeks = self.__has_greeks = conn.execute(queries.FETCH_GREEKS_TABLE).fetchone() is not None
+        return has_greeks
+
+    def _mark_clean(self, df: pandas.DataFrame, table: str, resolution=None) -> pandas.DataFrame:
+        """
+        Flags `df` clean when all its rows come from ticks covered by the table's CleanMark
+        and its DateTime is strictly increasing (sorted, no duplicates)
+        """
+        self._check_metadata_version()
+        clean_marks = self.__clean_marks
+        if clean_marks is None:
+            with sqlite3.connect(self.__db_path) as conn:
+                clean_marks = self.__clean_marks = get_clean_marks(conn)
+        through = clean_marks.get(table)
+        if through is None:
+            return df
+        times = df["DateTime"].to_numpy()
+        # Bars are stamped with their end, up to one bar after the last tick
+        if df.empty or (times[-1] <= through + (resolution or 0) and (times[1:] > times[:-1]).all()):
+            df.attrs["clean"] = True
+        return df
+
     def get_contract_id(self, symbol, option_type, strike_price, expiry_date):
         result = self._query(queries.FETCH_CONTRACT_ID, (expiry_date, option_type, strike_price, symbol))
         try:
@@ -22,12 +120,28 @@ class PandaAccessor:
             contract_id = None
         return contract_id
 
-    def get_contract_prices(self, symbol, option_type, strike_price, expiry_date):
+    def get_contract_prices(self, symbol, option_type, strike_price, expiry_date, resolution=None):
         contract_id = self.get_contract_id(symbol, option_type, strike_price, expiry_date)
         if contract_id is None:
             raise ValueError("Contract not found for the given parameters.")
 
-        return self._query(queries.FETCH_CONTRACT_PRICES, (contract_id,))
+        if resolution and self._has_bars("OptionsTick", resolution):
+            df = self._query(queries.FETCH_CONTRACT_BARS, (contract_id, resolution))
+            return self._mark_clean(df, "OptionsTick", resolution)
+        layout = self._layout("OptionsTick")
+        df = self._query(queries.FETCH_CONTRACT_PRICES_BY_LAYOUT[layout], (contract_id,))
+        if layout == queries.TICK_LAYOUT_COMPACT_DELTA:
+            df["DateTime"] = df["DateTime"].cumsum()
+        return self._mark_clean(resample_option_ticks(df, resolution) if resolution else df, "OptionsTick", resolution)
+
+    def get_contract_greeks(self, symbol, option_type, strike_price, expiry_date):
+        """Greeks precomputed by build_greeks.py per tick; empty if they were never built"""
+        if not self._greeks_built():
+            return pandas.DataFrame()
+        contract_id = self.get_contract_id(symbol, option_type, strike_price, expiry_date)
+        if contract_id is None:
+            raise ValueError("Contract not found for the given parameters.")
+        return self._query(queries.FETCH_CONTRACT_GREEKS, (contract_id,))
 
     def get_contract_by_symbol_and_expiry(self, symbol, expiry_date):
         return self._query(queries.FETCH_CONTRACTS_BY_SYMBOL_AND_EXPIRY, (symbol, expiry_date))
@@ -35,8 +149,17 @@ class PandaAccessor:
     def get_symbols(self):
         return self._query(queries.FETCH_ALL_SYMBOLS)
     
-    def get_equity_data_by_date(self, symbol, start_date, end_date):
-        return self._query(queries.FETCH_EQUITY_PRICE_BY_DATE_RANGE, (symbol, start_date, end_date))
+    def get_equity_data_by_date(self, symbol, start_date, end_date, resolution=None):
+        if resolution and self._has_bars("EquityTick", resolution):
+            df = self._query(queries.FETCH_EQUITY_BARS_BY_DATE_RANGE, (symbol, resolution, start_date, end_date))
+            return self._mark_clean(df, "EquityTick", resolution)
+        query = queries.FETCH_EQUITY_PRICE_BY_DATE_RANGE_BY_LAYOUT[self._layout("EquityTick")]
+        df = self._query(query, (symbol, start_date, end_date))
+        return self._mark_clean(resample_equity_ticks(df, resolution) if resolution else df, "EquityTick", resolution)
     
-    def get_equity_data(self, symbol):
-        return self._query(queries.FETCH_EQUITY_PRICE_BY_SYMBOL, (symbol,))
+    def get_equity_data(self, symbol, resolution=None):
+        if resolution and self._has_bars("EquityTick", resolution):
+            df = self._query(queries.FETCH_EQUITY_BARS_BY_SYMBOL, (symbol, resolution))
+            return self._mark_clean(df, "EquityTick", resolution)
+        df = self._query(queries.FETCH_EQUITY_PRICE_BY_SYMBOL_BY_LAYOUT[self._layout("EquityTick")], (symbol,))
+        return self._mark_clean(resample_equity_ticks(df, resolution) if resolution else df, "EquityTick", resolution)
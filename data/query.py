@@ -38,3 +38,414 @@ FETCH_EQUITY_PRICE_BY_SYMBOL = """
     WHERE Symbol = ?
     ORDER BY DateTime;
 """
+
+# --- Compact tick layout (see compact_db.py) ---
+# Tick tables rewritten by compact_db.py are WITHOUT ROWID tables clustered on their key,
+# with prices stored as integers in paise. In the "compact_delta" layout OptionsTick keys
+# rows by (ContractId, Seq) and stores DateTime as the gap to the previous tick, which
+# PandaAccessor sums back up after the read.
+PRICE_SCALE = 100
+
+TICK_LAYOUT_RAW = "raw"
+TICK_LAYOUT_COMPACT = "compact"
+TICK_LAYOUT_COMPACT_DELTA = "compact_delta"
+
+FETCH_TICK_ENCODING_TABLE = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'TickEncoding';"
+
+FETCH_TICK_LAYOUTS = "SELECT TableName, Layout FROM TickEncoding;"
+
+CREATE_TICK_ENCODING = """
+    CREATE TABLE TickEncoding (
+        TableName TEXT PRIMARY KEY,
+        Layout TEXT NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+INSERT_TICK_ENCODING = "INSERT OR REPLACE INTO TickEncoding (TableName, Layout) VALUES (?, ?);"
+
+CREATE_COMPACT_OPTIONS_TICK = """
+    CREATE TABLE OptionsTick (
+        ContractId INTEGER NOT NULL,
+        DateTime INTEGER NOT NULL,
+        Open INTEGER,
+        High INTEGER,
+        Low INTEGER,
+        Close INTEGER,
+        Volume INTEGER,
+        OI INTEGER,
+        PRIMARY KEY (ContractId, DateTime)
+    ) WITHOUT ROWID;
+"""
+
+CREATE_COMPACT_DELTA_OPTIONS_TICK = """
+    CREATE TABLE OptionsTickDelta (
+        ContractId INTEGER NOT NULL,
+        Seq INTEGER NOT NULL,
+        DateTime INTEGER NOT NULL,
+        Open INTEGER,
+        High INTEGER,
+        Low INTEGER,
+        Close INTEGER,
+        Volume INTEGER,
+        OI INTEGER,
+        PRIMARY KEY (ContractId, Seq)
+    ) WITHOUT ROWID;
+"""
+
+CREATE_COMPACT_EQUITY_TICK = """
+    CREATE TABLE EquityTick (
+        Symbol TEXT NOT NULL,
+        DateTime INTEGER NOT NULL,
+        Price INTEGER,
+        PRIMARY KEY (Symbol, DateTime)
+    ) WITHOUT ROWID;
+"""
+
+# Rows arrive in key order so the clustered b-tree is built by appends; duplicate keys keep the first row
+COPY_COMPACT_OPTIONS_TICK = f"""
+    INSERT OR IGNORE INTO main.OptionsTick
+    SELECT ContractId, DateTime,
+        CAST(ROUND(Open * {PRICE_SCALE}) AS INTEGER),
+        CAST(ROUND(High * {PRICE_SCALE}) AS INTEGER),
+        CAST(ROUND(Low * {PRICE_SCALE}) AS INTEGER),
+        CAST(ROUND(Close * {PRICE_SCALE}) AS INTEGER),
+        CAST(Volume AS INTEGER), CAST(OI AS INTEGER)
+    FROM src.OptionsTick
+    ORDER BY ContractId, DateTime;
+"""
+
+COPY_COMPACT_DELTA_OPTIONS_TICK = """
+    INSERT INTO main.OptionsTickDelta
+    SELECT ContractId,
+        ROW_NUMBER() OVER w - 1,
+        DateTime - COALESCE(LAG(DateTime) OVER w, 0),
+        Open, High, Low, Close, Volume, OI
+    FROM main.OptionsTick
+    WINDOW w AS (PARTITION BY ContractId ORDER BY DateTime);
+"""
+
+DROP_COMPACT_OPTIONS_TICK = "DROP TABLE main.OptionsTick;"
+
+RENAME_COMPACT_DELTA_OPTIONS_TICK = "ALTER TABLE main.OptionsTickDelta RENAME TO OptionsTick;"
+
+COPY_COMPACT_EQUITY_TICK = f"""
+    INSERT OR IGNORE INTO main.EquityTick
+    SELECT Symbol, DateTime, CAST(ROUND(Price * {PRICE_SCALE}) AS INTEGER)
+    FROM src.EquityTick
+    ORDER BY Symbol, DateTime;
+"""
+
+FETCH_CONTRACT_PRICES_COMPACT = f"""
+    SELECT DateTime,
+        Open / {PRICE_SCALE}.0 AS Open, High / {PRICE_SCALE}.0 AS High,
+        Low / {PRICE_SCALE}.0 AS Low, Close / {PRICE_SCALE}.0 AS Close,
+        Volume, OI
+    FROM OptionsTick
+    WHERE ContractId = ?
+    ORDER BY DateTime;
+"""
+
+FETCH_CONTRACT_PRICES_COMPACT_DELTA = f"""
+    SELECT DateTime,
+        Open / {PRICE_SCALE}.0 AS Open, High / {PRICE_SCALE}.0 AS High,
+        Low / {PRICE_SCALE}.0 AS Low, Close / {PRICE_SCALE}.0 AS Close,
+        Volume, OI
+    FROM OptionsTick
+    WHERE ContractId = ?
+    ORDER BY Seq;
+"""
+
+FETCH_EQUITY_PRICE_BY_DATE_RANGE_COMPACT = f"""
+    SELECT Symbol, DateTime, Price / {PRICE_SCALE}.0 AS Price
+    FROM EquityTick
+    WHERE Symbol = ? AND DateTime BETWEEN ? AND ?
+    ORDER BY DateTime;
+"""
+
+FETCH_EQUITY_PRICE_BY_SYMBOL_COMPACT = f"""
+    SELECT Symbol, DateTime, Price / {PRICE_SCALE}.0 AS Price
+    FROM EquityTick
+    WHERE Symbol = ?
+    ORDER BY DateTime;
+"""
+
+# Query to use per tick table layout
+FETCH_CONTRACT_PRICES_BY_LAYOUT = {
+    TICK_LAYOUT_RAW: FETCH_CONTRACT_PRICES,
+    TICK_LAYOUT_COMPACT: FETCH_CONTRACT_PRICES_COMPACT,
+    TICK_LAYOUT_COMPACT_DELTA: FETCH_CONTRACT_PRICES_COMPACT_DELTA,
+}
+FETCH_EQUITY_PRICE_BY_DATE_RANGE_BY_LAYOUT = {
+    TICK_LAYOUT_RAW: FETCH_EQUITY_PRICE_BY_DATE_RANGE,
+    TICK_LAYOUT_COMPACT: FETCH_EQUITY_PRICE_BY_DATE_RANGE_COMPACT,
+}
+FETCH_EQUITY_PRICE_BY_SYMBOL_BY_LAYOUT = {
+    TICK_LAYOUT_RAW: FETCH_EQUITY_PRICE_BY_SYMBOL,
+    TICK_LAYOUT_COMPACT: FETCH_EQUITY_PRICE_BY_SYMBOL_COMPACT,
+}
+
+# --- Materialized bar tables (see build_bars.py) ---
+# One row per (key, Resolution in seconds, bar end time); BarBuild keeps the last tick
+# DateTime aggregated per table and resolution so rebuilds only touch newer ticks.
+CREATE_OPTIONS_BAR = """
+    CREATE TABLE IF NOT EXISTS OptionsBar (
+        ContractId INTEGER NOT NULL,
+        Resolution INTEGER NOT NULL,
+        DateTime INTEGER NOT NULL,
+        Open REAL,
+        High REAL,
+        Low REAL,
+        Close REAL,
+        Volume INTEGER,
+        OI INTEGER,
+        PRIMARY KEY (ContractId, Resolution, DateTime)
+    ) WITHOUT ROWID;
+"""
+
+CREATE_EQUITY_BAR = """
+    CREATE TABLE IF NOT EXISTS EquityBar (
+        Symbol TEXT NOT NULL,
+        Resolution INTEGER NOT NULL,
+        DateTime INTEGER NOT NULL,
+        Open REAL,
+        High REAL,
+        Low REAL,
+        Price REAL,
+        PRIMARY KEY (Symbol, Resolution, DateTime)
+    ) WITHOUT ROWID;
+"""
+
+CREATE_BAR_BUILD = """
+    CREATE TABLE IF NOT EXISTS BarBuild (
+        TableName TEXT NOT NULL,
+        Resolution INTEGER NOT NULL,
+        LastTickDateTime INTEGER NOT NULL,
+        PRIMARY KEY (TableName, Resolution)
+    ) WITHOUT ROWID;
+"""
+
+FETCH_BAR_BUILD_TABLE = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'BarBuild';"
+
+FETCH_BAR_BUILDS = "SELECT TableName, Resolution, LastTickDateTime FROM BarBuild;"
+
+UPSERT_BAR_BUILD = "INSERT OR REPLACE INTO BarBuild (TableName, Resolution, LastTickDateTime) VALUES (?, ?, ?);"
+
+DELETE_BARS = "DELETE FROM {table} WHERE Resolution = ?;"
+
+DELETE_BAR_BUILD = "DELETE FROM BarBuild WHERE TableName = ? AND Resolution = ?;"
+
+FETCH_MAX_TICK_DATETIME_BY_LAYOUT = {
+    TICK_LAYOUT_RAW: "SELECT MAX(DateTime) FROM {table};",
+    TICK_LAYOUT_COMPACT: "SELECT MAX(DateTime) FROM {table};",
+    TICK_LAYOUT_COMPACT_DELTA: "SELECT MAX(DateTime) FROM (SELECT SUM(DateTime) OVER (PARTITION BY ContractId ORDER BY Seq) AS DateTime FROM {table});",
+}
+
+# Tick rows decoded to the raw columns, per tick table layout, as the input of a bar build
+OPTIONS_TICK_SOURCE_BY_LAYOUT = {
+    TICK_LAYOUT_RAW: "SELECT ContractId, DateTime, Open, High, Low, Close, Volume, OI FROM OptionsTick",
+    TICK_LAYOUT_COMPACT: f"""
+        SELECT ContractId, DateTime,
+            Open / {PRICE_SCALE}.0 AS Open, High / {PRICE_SCALE}.0 AS High,
+            Low / {PRICE_SCALE}.0 AS Low, Close / {PRICE_SCALE}.0 AS Close,
+            Volume, OI
+        FROM OptionsTick""",
+    TICK_LAYOUT_COMPACT_DELTA: f"""
+        SELECT ContractId, SUM(DateTime) OVER (PARTITION BY ContractId ORDER BY Seq) AS DateTime,
+            Open / {PRICE_SCALE}.0 AS Open, High / {PRICE_SCALE}.0 AS High,
+            Low / {PRICE_SCALE}.0 AS Low, Close / {PRICE_SCALE}.0 AS Close,
+            Volume, OI
+        FROM OptionsTick""",
+}
+EQUITY_TICK_SOURCE_BY_LAYOUT = {
+    TICK_LAYOUT_RAW: "SELECT Symbol, DateTime, Price FROM EquityTick",
+    TICK_LAYOUT_COMPACT: f"SELECT Symbol, DateTime, Price / {PRICE_SCALE}.0 AS Price FROM EquityTick",
+}
+
+# Bars cover [t - Resolution, t) on the epoch grid and are stamped with their end t.
+# Open/Close(/OI) come from the first/last tick of the bar; the bar containing the
+# :since tick is recomputed in full and replaced.
+BUILD_OPTIONS_BARS = """
+    INSERT OR REPLACE INTO OptionsBar (ContractId, Resolution, DateTime, Open, High, Low, Close, Volume, OI)
+    SELECT ContractId, :resolution, BarTime, Open, High, Low, Close, Volume, OI
+    FROM (
+        SELECT ContractId, BarTime,
+            FIRST_VALUE(Open) OVER bar AS Open,
+            MAX(High) OVER bar AS High,
+            MIN(Low) OVER bar AS Low,
+            LAST_VALUE(Close) OVER bar AS Close,
+            SUM(Volume) OVER bar AS Volume,
+            LAST_VALUE(OI) OVER bar AS OI,
+            ROW_NUMBER() OVER (PARTITION BY ContractId, BarTime ORDER BY DateTime DESC) AS FromEnd
+        FROM (
+            SELECT *, DateTime - DateTime % :resolution + :resolution AS BarTime
+            FROM ({source})
+            WHERE DateTime >= :since AND DateTime <= :until
+        )
+        WINDOW bar AS (PARTITION BY ContractId, BarTime ORDER BY DateTime
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    )
+    WHERE FromEnd = 1;
+"""
+
+BUILD_EQUITY_BARS = """
+    INSERT OR REPLACE INTO EquityBar (Symbol, Resolution, DateTime, Open, High, Low, Price)
+    SELECT Symbol, :resolution, BarTime, Open, High, Low, Price
+    FROM (
+        SELECT Symbol, BarTime,
+            FIRST_VALUE(Price) OVER bar AS Open,
+            MAX(Price) OVER bar AS High,
+            MIN(Price) OVER bar AS Low,
+            LAST_VALUE(Price) OVER bar AS Price,
+            ROW_NUMBER() OVER (PARTITION BY Symbol, BarTime ORDER BY DateTime DESC) AS FromEnd
+        FROM (
+            SELECT *, DateTime - DateTime % :resolution + :resolution AS BarTime
+            FROM ({source})
+            WHERE DateTime >= :since AND DateTime <= :until
+        )
+        WINDOW bar AS (PARTITION BY Symbol, BarTime ORDER BY DateTime
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    )
+    WHERE FromEnd = 1;
+"""
+
+FETCH_CONTRACT_BARS = """
+    SELECT DateTime, Open, High, Low, Close, Volume, OI
+    FROM OptionsBar
+    WHERE ContractId = ? AND Resolution = ?
+    ORDER BY DateTime;
+"""
+
+FETCH_EQUITY_BARS_BY_DATE_RANGE = """
+    SELECT Symbol, DateTime, Open, High, Low, Price
+    FROM EquityBar
+    WHERE Symbol = ? AND Resolution = ? AND DateTime BETWEEN ? AND ?
+    ORDER BY DateTime;
+"""
+
+FETCH_EQUITY_BARS_BY_SYMBOL = """
+    SELECT Symbol, DateTime, Open, High, Low, Price
+    FROM EquityBar
+    WHERE Symbol = ? AND Resolution = ?
+    ORDER BY DateTime;
+"""
+
+# --- Precomputed greeks (see build_greeks.py) ---
+# IV, delta, gamma, theta (per day) and vega (per vol point) of every option tick, keyed
+# like the ticks themselves; NULL where the tick price has no implied volatility.
+CREATE_OPTIONS_GREEKS = """
+    CREATE TABLE IF NOT EXISTS OptionsGreeks (
+        ContractId INTEGER NOT NULL,
+        DateTime INTEGER NOT NULL,
+        Spot REAL,
+        IV REAL,
+        Delta REAL,
+        Gamma REAL,
+        Theta REAL,
+        Vega REAL,
+        PRIMARY KEY (ContractId, DateTime)
+    ) WITHOUT ROWID;
+"""
+
+FETCH_GREEKS_TABLE = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'OptionsGreeks';"
+
+# Per-contract watermark: a contract missing from the result has no greeks yet
+FETCH_MAX_GREEKS_DATETIME_BY_CONTRACT = "SELECT ContractId, MAX(DateTime) FROM OptionsGreeks GROUP BY ContractId;"
+
+INSERT_OPTIONS_GREEKS = """
+    INSERT OR REPLACE INTO OptionsGreeks (ContractId, DateTime, Spot, IV, Delta, Gamma, Theta, Vega)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+FETCH_ALL_CONTRACTS = "SELECT Id, Symbol, Type, StrikePrice, ExpiryDate FROM OptionsContract ORDER BY Id;"
+
+# {source} is a tick source from OPTIONS_TICK_SOURCE_BY_LAYOUT / EQUITY_TICK_SOURCE_BY_LAYOUT;
+# {watermarks} is one "(?, ?)" (contract id, DateTime of its latest greeks) per contract and
+# {placeholders} one "?" per contract id
+FETCH_GREEKS_INPUT_TICKS = """
+    SELECT t.ContractId, t.DateTime, t.Close
+    FROM ({source}) AS t
+    JOIN (VALUES {watermarks}) AS w ON t.ContractId = w.column1
+    WHERE t.ContractId IN ({placeholders}) AND t.DateTime > w.column2
+    ORDER BY t.ContractId, t.DateTime;
+"""
+
+FETCH_GREEKS_INPUT_SPOT = """
+    SELECT DateTime, Price
+    FROM ({source})
+    WHERE Symbol = ? AND DateTime BETWEEN ? AND ?
+    ORDER BY DateTime;
+"""
+
+FETCH_CONTRACT_GREEKS = """
+    SELECT DateTime, Spot, IV, Delta, Gamma, Theta, Vega
+    FROM OptionsGreeks
+    WHERE ContractId = ?
+    ORDER BY DateTime;
+"""
+
+# --- Clean marks (see clean_db.py) ---
+# A tick table listed in CleanMark has no duplicate (key, DateTime) rows and no NULL
+# prices (carried forward) up to CleanedThrough, so loaders can skip re-cleaning it.
+# RowCount is the table's size when it was cleaned; any insert or delete since voids the mark.
+CREATE_CLEAN_MARK = """
+    CREATE TABLE IF NOT EXISTS CleanMark (
+        TableName TEXT PRIMARY KEY,
+        CleanedThrough INTEGER NOT NULL,
+        RowCount INTEGER NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+FETCH_CLEAN_MARK_TABLE = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'CleanMark';"
+
+# Marks written before RowCount existed lack the column and are not trusted
+FETCH_CLEAN_MARK_COLUMNS = "SELECT name FROM pragma_table_info('CleanMark');"
+
+DROP_CLEAN_MARK = "DROP TABLE IF EXISTS CleanMark;"
+
+FETCH_CLEAN_MARKS = "SELECT TableName, CleanedThrough, RowCount FROM CleanMark;"
+
+UPSERT_CLEAN_MARK = "INSERT OR REPLACE INTO CleanMark (TableName, CleanedThrough, RowCount) VALUES (?, ?, ?);"
+
+FETCH_TICK_ROW_COUNT = "SELECT COUNT(*) FROM {table};"
+
+# Raw tick tables only; compact tables are keyed on (key, DateTime) and cannot hold duplicates
+DELETE_DUPLICATE_TICKS = """
+    DELETE FROM {table}
+    WHERE rowid NOT IN (SELECT MIN(rowid) FROM {table} GROUP BY {key}, DateTime);
+"""
+
+# {order} is DateTime, or Seq for the delta-time layout
+FILL_NULL_TICK_PRICES = """
+    UPDATE {table} SET {column} = (
+        SELECT previous.{column} FROM {table} AS previous
+        WHERE previous.{key} = {table}.{key} AND previous.{order} < {table}.{order}
+            AND previous.{column} IS NOT NULL
+        ORDER BY previous.{order} DESC LIMIT 1
+    )
+    WHERE {column} IS NULL;
+"""
+
+# --- Remote (Supabase) views, run once in the project's SQL editor ---
+# Distinct contracts / symbols of the tables written by migrate_data.py, so SupabaseAccessor
+# lists them without downloading ticks. Both can be answered from the tables' unique-key indexes.
+CREATE_REMOTE_OPTION_CONTRACTS_VIEW = """
+    CREATE OR REPLACE VIEW option_contracts AS
+    SELECT DISTINCT symbol, expiry_date, option_type, strike
+    FROM option_data;
+"""
+
+CREATE_REMOTE_EQUITY_SYMBOLS_VIEW = """
+    CREATE OR REPLACE VIEW equity_symbols AS
+    SELECT DISTINCT symbol
+    FROM equity_data;
+"""
+
+# Per-table watermark of the last completed migration, upserted by migrate_data.py;
+# SupabaseAccessor.data_version() reads it to tell when the remote data changed
+CREATE_REMOTE_MIGRATION_WATERMARKS = """
+    CREATE TABLE IF NOT EXISTS migration_watermarks (
+        table_name TEXT PRIMARY KEY,
+        value BIGINT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+"""
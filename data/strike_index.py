@@ -0,0 +1,48 @@
+# data/strike_index.py
+from collections import OrderedDict
+
+import numpy as np
+
+
+class StrikeIndex:
+    """
+    Sorted listed strikes per (symbol, expiry, type), loaded with one
+    get_contract_by_symbol_and_expiry call per (symbol, expiry) and kept for the
+    `max_expiries` most recently used expiries. Resolving a strike is a binary search,
+    so strikes without a contract fall back to the nearest listed one without probing
+    the DB strike by strike.
+    """
+
+    def __init__(self, accessor, max_expiries: int = 16):
+        self.accessor = accessor
+        self.max_expiries = max_expiries
+        self._expiries = OrderedDict()
+
+    def strikes(self, symbol, option_type, expiry_date) -> np.ndarray:
+        """Sorted strikes listed for the contract type ("CE" / "PE") at `expiry_date` (epoch seconds)"""
+        key = (symbol, expiry_date)
+        if key in self._expiries:
+            self._expiries.move_to_end(key)
+        else:
+            contracts = self.accessor.get_contract_by_symbol_and_expiry(symbol, expiry_date)
+            by_type = {}
+            if not contracts.empty:
+                for contract_type, group in contracts.groupby(contracts["Type"].str.upper()):
+                    by_type[contract_type] = np.unique(group["StrikePrice"].to_numpy(dtype=float))
+            self._expiries[key] = by_type
+            while len(self._expiries) > self.max_expiries:
+                self._expiries.popitem(last=False)
+        return self._expiries[key].get(option_type.upper(), np.empty(0))
+
+    def resolve(self, symbol, option_type, expiry_date, strike: float, tolerance: float = 0.0):
+        """
+        `strike` if it is listed, else the nearest listed strike at most `tolerance` points
+        away (the lower one on a tie), else None.
+        """
+        strikes = self.strikes(symbol, option_type, expiry_date)
+        if not len(strikes):
+            return None
+        position = int(np.searchsorted(strikes, strike))
+        candidates = strikes[max(position - 1, 0):position + 1]
+        nearest = candidates[np.argmin(np.abs(candidates - strike))]
+        return float(nearest) if abs(nearest - strike) <= tolerance else None
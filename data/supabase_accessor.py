@@ -1,24 +1,218 @@
 # data/supabase_accessor.py
-from supabase import create_client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 import os
+import threading
+import time
 import pandas as pd
 
+from data.bars import resample_equity_ticks, resample_option_ticks
+from data.constants import REMOTE_CACHE_PATH, REMOTE_UNIQUE_KEYS, REMOTE_VERSION_TTL_SECONDS
+from data.tiered_accessor import ColumnarFileTier
+
+# Timestamp format written by migrate_data.upload_to_supabase
+REMOTE_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
 class SupabaseAccessor:
-    def __init__(self):
-        url = os.environ.get("SUPABASE_URL")
-        key = os.environ.get("SUPABASE_KEY")
-        self.supabase = create_client(url, key)
-    
-    def get_equity_data(self, symbol):
-        response = self.supabase.table('equity_data').select('*').eq('symbol', symbol).execute()
-        return pd.DataFrame(response.data)
-    
+    """
+    Remote counterpart of PandaAccessor backed by the `equity_data` and `option_data`
+    tables written by migrate_data.py and the `option_contracts` / `equity_symbols` views
+    over them (data/query.py). Returns frames shaped like PandaAccessor's
+    (epoch-second DateTime, capitalized columns) so the engine can use either.
+    There are no remote bar tables, so `resolution` bars are resampled from the ticks.
+
+    Filters are pushed to the server, large results are paged with parallel range
+    requests and every result is kept in an on-disk read-through cache keyed by the
+    remote data version, so entries written before a migration are never served.
+    """
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None,
+                 cache_dir: Optional[str] = REMOTE_CACHE_PATH, page_size: int = 1000,
+                 max_workers: int = 4, client: Any = None) -> None:
+        if client is None:
+            from supabase import create_client
+            client = create_client(url or os.environ.get("SUPABASE_URL"), key or os.environ.get("SUPABASE_KEY"))
+        self.supabase = client
+        self.cache_dir = cache_dir
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self._version = None  # (data_version(), monotonic time it was read)
+        self._version_lock = threading.Lock()
+
+    # ---------- remote helpers ----------
+
+    def _fetch(self, table: str, columns: str = '*', filters: tuple = (), order: Optional[str] = None) -> pd.DataFrame:
+        """
+        Fetch all rows of `table` matching `filters` (tuples of (op, column, value)).
+        The first page also returns the exact row count, the remaining pages are then
+        requested concurrently as Range requests and stitched back in order.
+        Rows are ordered by `order` (comma-separated columns, unique among the matching
+        rows), by default the table's unique key, so pages never overlap or leave gaps.
+        """
+        order = order or REMOTE_UNIQUE_KEYS[table]
+        cache = self._cache()
+        args = (table, columns, filters, order)
+        if cache is not None:
+            cached = cache.lookup('_fetch', args)
+            if cached is not None:
+                return cached
+
+        def build(count=None):
+            request = self.supabase.table(table).select(columns, count=count)
+            for op, column, value in filters:
+                request = getattr(request, op)(column, value)
+            for column in order.split(','):
+                request = request.order(column)
+            return request
+
+        first = build(count='exact').range(0, self.page_size - 1).execute()
+        pages = [first.data]
+        total = first.count if first.count is not None else len(first.data)
+        if total > self.page_size:
+            starts = range(self.page_size, total, self.page_size)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                responses = executor.map(
+                    lambda start: build().range(start, start + self.page_size - 1).execute(), starts)
+                pages.extend(response.data for response in responses)
+
+        df = pd.DataFrame([row for page in pages for row in page])
+        if cache is not None:
+            cache.store('_fetch', args, df)
+        return df
+
+    def _cache(self) -> Optional[ColumnarFileTier]:
+        """The on-disk cache for the current data version (pickle-free .npz files)"""
+        if self.cache_dir is None:
+            return None
+        return ColumnarFileTier(self.cache_dir, namespace=self.data_version())
+
+    @staticmethod
+    def _to_remote_datetime(value) -> str:
+        """Encode an epoch-second or date-like value the way ticks were uploaded"""
+        if pd.api.types.is_number(value):
+            value = pd.to_datetime(value, unit='s')
+        return pd.to_datetime(value).strftime(REMOTE_TIMESTAMP_FORMAT)
+
+    @staticmethod
+    def _to_remote_expiry(expiry_date) -> str:
+        """Encode an expiry the way migrate_data.process_options_data converted ExpiryDate"""
+        return pd.to_datetime(expiry_date).strftime(REMOTE_TIMESTAMP_FORMAT)
+
+    @staticmethod
+    def _to_epoch_seconds(timestamps: pd.Series) -> pd.Series:
+        timestamps = pd.to_datetime(timestamps, utc=True)
+        return (timestamps - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+
+    def _contract_filters(self, symbol, option_type, strike_price, expiry_date) -> tuple:
+        return (
+            ('eq', 'symbol', symbol),
+            ('eq', 'option_type', option_type),
+            ('eq', 'strike', strike_price),
+            ('eq', 'expiry_date', self._to_remote_expiry(expiry_date)),
+        )
+
+    def _to_equity_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return pd.DataFrame(columns=['Symbol', 'DateTime', 'Price'])
+        return pd.DataFrame({
+            'Symbol': df['symbol'],
+            'DateTime': self._to_epoch_seconds(df['timestamp']),
+            'Price': df['price'],
+        })
+
+    def data_version(self) -> str:
+        """
+        Watermarks of the last completed migrations (migrate_data.py). Callers check it
+        per lookup, so it is re-read at most every REMOTE_VERSION_TTL_SECONDS.
+        """
+        with self._version_lock:
+            if self._version is None or time.monotonic() - self._version[1] > REMOTE_VERSION_TTL_SECONDS:
+                rows = (self.supabase.table('migration_watermarks').select('table_name,value')
+                        .order('table_name').execute().data)
+                version = "remote:" + ",".join(f"{row['table_name']}={row['value']}" for row in rows)
+                self._version = (version, time.monotonic())
+            return self._version[0]
+
+    def clear_cache(self) -> None:
+        """Drop cached results, e.g. after a delta migration appended new ticks"""
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(('.npz', '.pkl')):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    # ---------- PandaAccessor interface ----------
+
+    def get_contract_id(self, symbol, option_type, strike_price, expiry_date):
+        """
+        The remote schema is denormalized and has no contract ids, so the contract is
+        identified by its (symbol, type, strike, expiry) key when at least one tick exists.
+        Answered from the cached contract list of the expiry rather than a request per call.
+        """
+        contracts = self.get_contract_by_symbol_and_expiry(symbol, expiry_date)
+        listed = (contracts['Type'] == option_type) & (contracts['StrikePrice'] == float(strike_price))
+        if not listed.any():
+            return None
+        return (symbol, option_type, strike_price, expiry_date)
+
+    def get_contract_prices(self, symbol, option_type, strike_price, expiry_date, resolution=None):
+        filters = self._contract_filters(symbol, option_type, strike_price, expiry_date)
+        df = self._fetch('option_data', 'timestamp,price', filters, order='timestamp')
+        if df.empty:
+            raise ValueError("Contract not found for the given parameters.")
+
+        # Only the close was migrated; OHLC collapse to it and Volume/OI are unknown
+        prices = pd.DataFrame({
+            'DateTime': self._to_epoch_seconds(df['timestamp']),
+            'Open': df['price'],
+            'High': df['price'],
+            'Low': df['price'],
+            'Close': df['price'],
+            'Volume': 0,
+            'OI': 0,
+        })
+        if resolution:
+            prices = resample_option_ticks(prices, resolution)
+        prices['Volume'] = None
+        prices['OI'] = None
+        return prices
+
+    def get_contract_by_symbol_and_expiry(self, symbol, expiry_date):
+        filters = (('eq', 'symbol', symbol), ('eq', 'expiry_date', self._to_remote_expiry(expiry_date)))
+        df = self._fetch('option_contracts', 'option_type,strike', filters)
+        if df.empty:
+            return pd.DataFrame(columns=['ExpiryDate', 'Type', 'StrikePrice', 'Symbol'])
+        contracts = df.rename(columns={'option_type': 'Type', 'strike': 'StrikePrice'})
+        contracts['ExpiryDate'] = expiry_date
+        contracts['Symbol'] = symbol
+        return contracts.sort_values('StrikePrice')[['ExpiryDate', 'Type', 'StrikePrice', 'Symbol']].reset_index(drop=True)
+
+    def get_symbols(self):
+        df = self._fetch('equity_symbols', 'symbol')
+        if df.empty:
+            return pd.DataFrame(columns=['Symbol'])
+        return df.rename(columns={'symbol': 'Symbol'})
+
+    def get_equity_data_by_date(self, symbol, start_date, end_date, resolution=None):
+        filters = (
+            ('eq', 'symbol', symbol),
+            ('gte', 'timestamp', self._to_remote_datetime(start_date)),
+            ('lte', 'timestamp', self._to_remote_datetime(end_date)),
+        )
+        df = self._to_equity_frame(self._fetch('equity_data', 'symbol,timestamp,price', filters, order='timestamp'))
+        return resample_equity_ticks(df, resolution) if resolution else df
+
+    def get_equity_data(self, symbol, resolution=None):
+        filters = (('eq', 'symbol', symbol),)
+        df = self._to_equity_frame(self._fetch('equity_data', 'symbol,timestamp,price', filters, order='timestamp'))
+        return resample_equity_ticks(df, resolution) if resolution else df
+
     def get_option_data(self, symbol, expiry_date, strike, option_type):
-        response = self.supabase.table('option_data') \
-            .select('*') \
-            .eq('symbol', symbol) \
-            .eq('expiry_date', expiry_date) \
-            .eq('strike', strike) \
-            .eq('option_type', option_type) \
-            .execute()
-        return pd.DataFrame(response.data)
\ No newline at end of file
+        filters = (
+            ('eq', 'symbol', symbol),
+            ('eq', 'expiry_date', expiry_date),
+            ('eq', 'strike', strike),
+            ('eq', 'option_type', option_type),
+        )
+        return self._fetch('option_data', '*', filters, order='timestamp')
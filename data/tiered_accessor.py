@@ -0,0 +1,321 @@
+# data/tiered_accessor.py
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, List, Optional
+import hashlib
+import json
+import os
+import threading
+
+import numpy
+import pandas
+
+from data.accessor import DataAccessor, data_version
+from data.constants import OPTION_DB_PATH, LOCAL_COLUMNAR_CACHE_PATH
+
+
+class Tier:
+    """
+    One level of a TieredAccessor. `lookup` returns None on a miss; `store` is called
+    with results found in a slower tier so the next lookup is served from this one.
+    """
+    name = "tier"
+
+    def lookup(self, method: str, args: tuple) -> Optional[Any]:
+        raise NotImplementedError("Subclasses should implement this!")
+
+    def store(self, method: str, args: tuple, result: Any) -> None:
+        pass
+
+    def set_version(self, version: str) -> None:
+        """Called when the data behind the sources changed; entries of older versions must not be served"""
+        pass
+
+
+class MemoryTier(Tier):
+    """In-process LRU cache. Frames are copied in and out since callers mutate them."""
+    name = "memory"
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, method, args):
+        with self._lock:
+            result = self._entries.get((method, args))
+            if result is None:
+                return None
+            self._entries.move_to_end((method, args))
+        return result.copy() if isinstance(result, pandas.DataFrame) else result
+
+    def store(self, method, args, result):
+        if isinstance(result, pandas.DataFrame):
+            result = result.copy()
+        with self._lock:
+            self._entries[(method, args)] = result
+            self._entries.move_to_end((method, args))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_version(self, version):
+        with self._lock:
+            self._entries.clear()
+
+
+class ColumnarFileTier(Tier):
+    """
+    Local on-disk cache storing each frame as one .npz file with an array per column,
+    so a hit is a handful of contiguous reads instead of a SQL query or HTTP round trip.
+    `namespace` is mixed into every key, e.g. the data versions of the sources, so entries
+    written for older data are never served.
+
+    Files hold plain arrays only and are loaded with allow_pickle=False: text columns are
+    stored as fixed-width strings plus a mask of missing values. Frames with other object
+    columns are not cached.
+    """
+    name = "columnar"
+
+    def __init__(self, cache_dir: str = LOCAL_COLUMNAR_CACHE_PATH, namespace: str = "") -> None:
+        self.cache_dir = cache_dir
+        self.namespace = namespace
+
+    def set_version(self, version):
+        # Older files stay on disk under their own keys and are simply no longer looked up
+        self.namespace = version
+
+    def _path(self, method, args) -> str:
+        key = json.dumps([self.namespace, method, list(args)], default=str)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".npz")
+
+    def lookup(self, method, args):
+        path = self._path(method, args)
+        if not os.path.exists(path):
+            return None
+        try:
+            with numpy.load(path, allow_pickle=False) as npz:
+                columns = [str(column) for column in npz["__columns__"]]
+                data = {}
+                for i, column in enumerate(columns):
+                    values = npz[f"c{i}"]
+                    if values.dtype.kind == "U":
+                        values = values.astype(object)
+                        if f"m{i}" in npz:
+                            values[npz[f"m{i}"]] = None
+                    data[column] = values
+                df = pandas.DataFrame(data, columns=columns)
+                if "__attrs__" in npz:
+                    df.attrs.update(json.loads(str(npz["__attrs__"])))
+                return df
+        except ValueError:
+            return None  # written by an older version with pickled arrays; refetched and overwritten
+
+    def store(self, method, args, result):
+        if not isinstance(result, pandas.DataFrame):
+            return
+        arrays = {}
+        for i, column in enumerate(result.columns):
+            values = result[column].to_numpy()
+            if values.dtype == object:
+                missing = pandas.isna(values)
+                if not all(isinstance(value, str) for value in values[~missing]):
+                    return
+                values = numpy.where(missing, "", values).astype(str)
+                if missing.any():
+                    arrays[f"m{i}"] = missing
+            arrays[f"c{i}"] = values
+        arrays["__columns__"] = numpy.array([str(column) for column in result.columns], dtype=str)
+        # Keeps flags such as attrs["clean"] (see PandaAccessor) across cache hits
+        arrays["__attrs__"] = numpy.array(json.dumps(result.attrs, default=str))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(method, args)
+        # Unique per writer: concurrent fetches of the same key must not share a temp file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            numpy.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+
+class AccessorTier(Tier):
+    """
+    Wraps a DataAccessor (SQLite, remote, ...) as a read-only tier. Empty frames and
+    missing contracts count as misses so the lookup falls through to the next source.
+    """
+
+    def __init__(self, accessor: DataAccessor, name: str) -> None:
+        self.accessor = accessor
+        self.name = name
+
+    def lookup(self, method, args):
+        # Optional methods (e.g. get_contract_greeks) only exist on some accessors
+        if not hasattr(self.accessor, method):
+            return None
+        try:
+            result = getattr(self.accessor, method)(*args)
+        except ValueError:
+            return None
+        if result is None or (isinstance(result, pandas.DataFrame) and result.empty):
+            return None
+        return result
+
+
+class TieredAccessor:
+    """
+    DataAccessor that resolves every request through an ordered list of tiers, fastest
+    first, e.g. memory -> local columnar -> SQLite -> remote. A hit in a slower tier is
+    promoted into all faster tiers, and per-tier hit rates are available via `stats()`.
+    The sources' data version is checked on every lookup and handed to the cache tiers
+    when it changes, so a long-lived accessor never serves frames of older data.
+    """
+
+    def __init__(self, tiers: List[Tier]) -> None:
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self._lookups = {tier.name: 0 for tier in tiers}
+        self._hits = {tier.name: 0 for tier in tiers}
+        self._version = None
+
+    def _sync_version(self) -> None:
+        version = self.data_version()
+        with self._lock:
+            if version == self._version:
+                return
+            self._version = version
+        for tier in self.tiers:
+            tier.set_version(version)
+
+    def _resolve(self, method: str, *args):
+        self._sync_version()
+        for level, tier in enumerate(self.tiers):
+            result = tier.lookup(method, args)
+            with self._lock:
+                self._lookups[tier.name] += 1
+                if result is not None:
+                    self._hits[tier.name] += 1
+            if result is not None:
+                for faster in self.tiers[:level]:
+                    faster.store(method, args, result)
+                return result
+        return None
+
+    def data_version(self) -> str:
+        """Versions of the source accessors; the cache tiers hold copies of their data"""
+        return "|".join(data_version(tier.accessor) for tier in self.tiers if isinstance(tier, AccessorTier))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "lookups": self._lookups[name],
+                    "hits": self._hits[name],
+                    "hit_rate": self._hits[name] / self._lookups[name] if self._lookups[name] else None,
+                }
+                for name in self._lookups
+            }
+
+    def get_contract_id(self, symbol, option_type, strike_price, expiry_date):
+        return self._resolve("get_contract_id", symbol, option_type, strike_price, expiry_date)
+
+    def get_contract_prices(self, symbol, option_type, strike_price, expiry_date, resolution=None):
+        result = self._resolve("get_contract_prices", symbol, option_type, strike_price, expiry_date, resolution)
+        if result is None:
+            raise ValueError("Contract not found for the given parameters.")
+        return result
+
+    def get_contract_greeks(self, symbol, option_type, strike_price, expiry_date):
+        return self._frame_or_empty(self._resolve("get_contract_greeks", symbol, option_type, strike_price, expiry_date))
+
+    def get_contract_by_symbol_and_expiry(self, symbol, expiry_date):
+        return self._frame_or_empty(self._resolve("get_contract_by_symbol_and_expiry", symbol, expiry_date))
+
+    def get_symbols(self):
+        return self._frame_or_empty(self._resolve("get_symbols"))
+
+    def get_equity_data_by_date(self, symbol, start_date, end_date, resolution=None):
+        return self._frame_or_empty(self._resolve("get_equity_data_by_date", symbol, start_date, end_date, resolution))
+
+    def get_equity_data(self, symbol, resolution=None):
+        return self._frame_or_empty(self._resolve("get_equity_data", symbol, resolution))
+
+    @staticmethod
+    def _frame_or_empty(result):
+        return result if result is not None else pandas.DataFrame()
+
+
+class BatchAccessor:
+    """
+    Per-batch view of an accessor for backtests running side by side: every distinct
+    request is fetched from `accessor` once, and concurrent identical requests wait for
+    that fetch instead of repeating it. Results live as long as the batch does.
+    """
+
+    def __init__(self, accessor: DataAccessor) -> None:
+        self.accessor = accessor
+        self._lock = threading.Lock()
+        self._fetches = {}
+        self.requests = 0
+
+    def _fetch(self, method: str, *args):
+        with self._lock:
+            self.requests += 1
+            future = self._fetches.get((method, args))
+            owner = future is None
+            if owner:
+                future = self._fetches[(method, args)] = Future()
+        if owner:
+            try:
+                future.set_result(getattr(self.accessor, method)(*args))
+            except Exception as e:
+                future.set_exception(e)
+        result = future.result()
+        # Frames are shared between engines, which mutate them
+        return result.copy() if isinstance(result, pandas.DataFrame) else result
+
+    def data_version(self) -> str:
+        return data_version(self.accessor)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "fetches": len(self._fetches)}
+
+    def get_contract_id(self, symbol, option_type, strike_price, expiry_date):
+        return self._fetch("get_contract_id", symbol, option_type, strike_price, expiry_date)
+
+    def get_contract_prices(self, symbol, option_type, strike_price, expiry_date, resolution=None):
+        return self._fetch("get_contract_prices", symbol, option_type, strike_price, expiry_date, resolution)
+
+    def get_contract_greeks(self, symbol, option_type, strike_price, expiry_date):
+        if not hasattr(self.accessor, "get_contract_greeks"):
+            return pandas.DataFrame()
+        return self._fetch("get_contract_greeks", symbol, option_type, strike_price, expiry_date)
+
+    def get_contract_by_symbol_and_expiry(self, symbol, expiry_date):
+        return self._fetch("get_contract_by_symbol_and_expiry", symbol, expiry_date)
+
+    def get_symbols(self):
+        return self._fetch("get_symbols")
+
+    def get_equity_data_by_date(self, symbol, start_date, end_date, resolution=None):
+        return self._fetch("get_equity_data_by_date", symbol, start_date, end_date, resolution)
+
+    def get_equity_data(self, symbol, resolution=None):
+        return self._fetch("get_equity_data", symbol, resolution)
+
+
+def create_default_accessor(memory_entries: int = 256) -> TieredAccessor:
+    """
+    Builds the fastest accessor available in this environment: memory and local columnar
+    caches, then the SQLite DB if it exists, then Supabase if SUPABASE_URL is set.
+    `memory_entries` bounds the in-memory LRU (0 disables it, e.g. for streaming runs).
+    """
+    source_tiers: List[Tier] = []
+    if os.path.exists(OPTION_DB_PATH):
+        from data.panda import PandaAccessor
+        source_tiers.append(AccessorTier(PandaAccessor(OPTION_DB_PATH), "sqlite"))
+    if os.environ.get("SUPABASE_URL"):
+        from data.supabase_accessor import SupabaseAccessor
+        # The columnar tier already caches remote results on disk
+        source_tiers.append(AccessorTier(SupabaseAccessor(cache_dir=None), "remote"))
+    # The caches are keyed on the sources' data version (file stat / remote watermark) by TieredAccessor
+    memory_tiers = [MemoryTier(max_entries=memory_entries)] if memory_entries > 0 else []
+    return TieredAccessor(memory_tiers + [ColumnarFileTier()] + source_tiers)
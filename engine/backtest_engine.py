@@ -1,22 +1,47 @@
 # engine/backtest_engine.py
 
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 
 from utils.helpers import get_strike_price, get_nearest_option_price, get_next_weekly_expiry,get_timestamp
+from utils.data_cleaning import epoch_to_ist, clean_by_time
+from engine.trade_log import TradeLog
+from engine.metrics import compute_metrics, MetricsAccumulator, DEFAULT_METRICS
+from engine.robustness import robustness_report
+from engine.scenarios import positions_from_trades, stress_test
+import engine.checkpoint as checkpoints
+from engine.greeks import DeltaStrikeSelector
+from data.bars import parse_frequency
+from data.strike_index import StrikeIndex
+
+logger = logging.getLogger(__name__)
+
+# Most threads fetching the option legs of a new position concurrently; each entry has its own pool
+LEG_FETCH_WORKERS = 4
+# Bars after entry covered by the first path-dependent exit search of a trade; doubled if it finds nothing
+PATH_EXIT_SEARCH_BARS = 512
 
 
 class BacktestEngine:
     """
     Backtests the given OptionStrategy over underlying equity data and computes PnL for option legs.
     Uses a data accessor to fetch option prices for each leg based on the underlying price at entry.
+    Path-dependent exits (stops, targets) are resolved per trade with one vectorized
+    first-passage search over the bars after entry; other exits are checked bar by bar.
     """
+    # Engines holding the whole underlying up front can look ahead of the current bar
+    vectorized_exits = True
 
     def __init__(self, underlying_data: pd.DataFrame, strategy, accessor, config: dict,
                  benchmark_data: pd.DataFrame = None):
         # Assume underlying_data is the full dataset covering a wide range of dates.
         # Create a trading calendar from the full dataset:
         self.trading_calendar = underlying_data.index.sort_values()  # full calendar
+        # Dates with data, for expiry lookups (built once instead of per entry)
+        self._trading_days = set(self.trading_calendar.normalize().unique().date)
 
         # Now, filter the underlying data for trade iteration based on start and end dates:
         start_date = pd.to_datetime(config["backtest_settings"]["start_date"])
@@ -28,301 +53,389 @@ class BacktestEngine:
         self.accessor = accessor
         self.config = config
         self.benchmark_data = benchmark_data
-        self.trades = []  # List of trade records
-        self.equity_curve = []  # List of dicts with 'date' and 'equity'
+        self.trades = TradeLog()  # Columnar trade records with a separate leg table
+        # Equity per bar, preallocated to the bar count; exposed read-only via `equity_curve`
+        self._equity = np.full(len(self.underlying_data), np.nan)
+        self._n_bars = 0
         self.initial_capital = float(config["backtest_settings"].get("capital", 100000))
         self.contract_multiplier = config["underlying_asset"].get("multiplier", 50)
         self.lot_size = config["underlying_asset"].get("lot_size", 75)
+        # Bar size in seconds from backtest_settings.data_frequency (None: raw ticks); option
+        # prices are fetched at the same resolution as the underlying bars passed in
+        self.resolution = parse_frequency(config["backtest_settings"].get("data_frequency"))
+        # Strikes of "delta" legs come from the option chain's Black-Scholes deltas at entry
+        self.delta_selector = DeltaStrikeSelector(
+            accessor,
+            risk_free_rate=float(config["backtest_settings"].get("risk_free_rate", 0.0)),
+            resolution=self.resolution,
+        )
+        # Listed strikes per expiry; a computed strike without a contract falls back to the nearest
+        # listed one at most strike_tolerance points away (default: two strike steps)
+        self.strike_index = StrikeIndex(accessor)
+        self.strike_tolerance = float(config["backtest_settings"].get(
+            "strike_tolerance", 2 * config["underlying_asset"].get("multiplier", 50)))
+        # Metrics to report, from reporting.metrics; `live_metrics` is updated bar by bar during a run
+        self.metric_names = (config.get("reporting") or {}).get("metrics") or DEFAULT_METRICS
+        self.live_metrics = MetricsAccumulator(self.metric_names)
+
+    def run_backtest(self, checkpoint_path: str = None):
+        """
+        Runs the strategy over the underlying bars. With `checkpoint_path`, a snapshot left
+        there by an earlier run of the same config and data is resumed after its last bar
+        (so extending `end_date` only processes the new bars), and the state at the end of
+        this run is saved back to it.
+        """
+        self._start_run()
+        checkpoint = checkpoints.load_checkpoint(checkpoint_path) if checkpoint_path else None
+        if checkpoint is not None:
+            mismatch = self._checkpoint_mismatch(checkpoint)
+            if mismatch:
+                logger.warning(f"Ignoring checkpoint {checkpoint_path}: {mismatch}")
+            else:
+                self._restore(checkpoint)
+
+        # Iterate over each timestamp in the underlying data (after the restored bars, if any)
+        for timestamp, row in self.underlying_data.iloc[self._n_bars:].iterrows():
+            self._process_bar(timestamp, row)
 
-    def run_backtest(self):
-        capital = self.initial_capital
-        in_position = False
-        trade_context = {}  # To store entry data for the current trade
+        if checkpoint_path:
+            self.save_checkpoint(checkpoint_path)
+        return self.trades
 
+    def _start_run(self):
+        self._capital = self.initial_capital
+        self._in_position = False
+        self._trade_context = {}  # To store entry data for the current trade
         # Get the allowed trading days from config. If not specified, assume all days.
-        allowed_days = self.config["backtest_settings"].get("trading_days",["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
-
-        # Use self.trading_calendar (full set) for expiry logic.
-        full_trading_dates = self.trading_calendar
-
-        # Iterate over each timestamp in the underlying data
-        for timestamp, row in self.underlying_data.iterrows():
-            current_data = row.copy()
-            current_data.name = timestamp
-
-            # Check if today's day_name is in the allowed list
-            day_name = timestamp.day_name()
-            if day_name not in allowed_days:
-                # Option A: Skip this day entirely (no entry logic, but still record equity)
-                self.equity_curve.append({"date": timestamp, "equity": capital})
-                continue
-
-            if in_position:
-                # Check exit conditions using underlying data row
-                context = {
-                    "entry_underlying_price": trade_context["entry_underlying_price"],
-                    # "entry_capital": trade_context["entry_capital"],
-                    "current_capital": capital,  # current account capital updated after previous trades
-                    "option_data_series": trade_context["option_data_series"],
-                    "entry_option_prices": trade_context["entry_option_prices"],
-                    "legs": self.strategy.option_legs,
-                    "contract_multiplier": self.contract_multiplier
-                }
-                exit_signal = any(cond.evaluate(current_data, self.underlying_data.loc[:timestamp], context)
-                                  for cond in self.strategy.exit_conditions)
-                if exit_signal:
-                    total_profit = 0
-                    legs_details = []
-                    for leg_idx, leg in enumerate(self.strategy.option_legs):
-                        option_df = trade_context["option_data_series"][leg_idx]
-                        exit_option_price = get_nearest_option_price(option_df, timestamp)
-                        entry_option_price = trade_context["entry_option_prices"][leg_idx]
-                        lots = leg.quantity
-                        if leg.action == "buy":
-                            profit = (exit_option_price - entry_option_price) * self.lot_size * lots
-                        else:
-                            profit = (entry_option_price - exit_option_price) * self.lot_size * lots
-                        total_profit += profit
-
-                        # Log details for each leg
-                        leg_detail = {
-                            "leg_type": leg.option_type,
-                            "action": leg.action,
-                            "strike": leg.computed_strike,
-                            "entry_option_price": entry_option_price,
-                            "exit_option_price": exit_option_price,
-                            "pnl": profit
-                        }
-                        legs_details.append(leg_detail)
-
-                    trade = {
-                        "entry_date": trade_context["entry_time"],
-                        "exit_date": timestamp,
-                        "entry_underlying_price": trade_context["entry_underlying_price"],
-                        "exit_underlying_price": current_data["Price"],
-                        "profit": total_profit,
-                        "legs": legs_details  # Breakdown of each leg's details.
-                    }
-                    self.trades.append(trade)
-                    capital += total_profit
-                    in_position = False
-                    trade_context = {}
-            else:
-                context = {}
-                entry_signal = all(cond.evaluate(current_data, self.underlying_data.loc[:timestamp], context)
-                                   for cond in self.strategy.entry_conditions)
-                if entry_signal:
-                    trade_context["entry_time"] = timestamp
-                    trade_context["entry_underlying_price"] = current_data["Price"]
-                    option_data_series = []
-                    entry_option_prices = []
-                    underlying_symbol = self.config["underlying_asset"]["symbol"]
-                    # Determine expiry_date: If option_expiry is WEEKLY, compute expiry using the trading dates.
-                    option_expiry_type = self.config["underlying_asset"].get("option_expiry", "").upper()
-                    if option_expiry_type == "WEEKLY":
-                        expiry_day = self.config["underlying_asset"].get("expiry_day", "THU") # Fallback : if expiry_day not found then THU is default
-                        expiry_date = get_next_weekly_expiry(timestamp, expiry_day, full_trading_dates)
+        self._allowed_days = self.config["backtest_settings"].get("trading_days",["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
+        self._n_bars = 0
+        self.live_metrics = MetricsAccumulator(self.metric_names)
+        if self.vectorized_exits:
+            # Bars whose exits are checked at all (the loop skips disallowed days)
+            self._checked_bars = self.underlying_data.index.day_name().isin(self._allowed_days)
+
+    def _history(self, timestamp):
+        """Underlying bars up to and including `timestamp`, as passed to the conditions"""
+        return self.underlying_data.loc[:timestamp]
+
+    def _record_equity(self, equity: float, timestamp) -> None:
+        self._equity[self._n_bars] = equity
+        self._n_bars += 1
+        self.live_metrics.update_equity(equity, timestamp)
+
+    def _process_bar(self, timestamp, row):
+        current_data = row.copy()
+        current_data.name = timestamp
+
+        # Check if today's day_name is in the allowed list
+        day_name = timestamp.day_name()
+        if day_name not in self._allowed_days:
+            # Option A: Skip this day entirely (no entry logic, but still record equity)
+            self._record_equity(self._capital, timestamp)
+            return
+
+        if self._in_position:
+            # Check exit conditions using underlying data row
+            context = self._exit_context()
+            exit_conditions = self.strategy.exit_conditions
+            exit_signal = False
+            if self.vectorized_exits:
+                exit_conditions = [cond for cond in exit_conditions if not cond.path_dependent]
+                exit_signal = self._path_exit_bar(context) == self._n_bars
+            exit_signal = exit_signal or any(cond.evaluate(current_data, self._history(timestamp), context)
+                                             for cond in exit_conditions)
+            if exit_signal:
+                total_profit = 0
+                legs_details = []
+                for leg_idx, leg in enumerate(self.strategy.option_legs):
+                    option_df = self._trade_context["option_data_series"][leg_idx]
+                    exit_option_price = get_nearest_option_price(option_df, timestamp)
+                    entry_option_price = self._trade_context["entry_option_prices"][leg_idx]
+                    lots = leg.quantity
+                    if leg.action == "buy":
+                        profit = (exit_option_price - entry_option_price) * self.lot_size * lots
                     else:
-                        expiry_date = self.config["backtest_settings"].get("expiry_date", "")
-                    for leg in self.strategy.option_legs:
-                        multiplier = self.config["underlying_asset"].get("multiplier", 50)
+                        profit = (entry_option_price - exit_option_price) * self.lot_size * lots
+                    total_profit += profit
+
+                    # Log details for each leg
+                    leg_detail = {
+                        "leg_type": leg.option_type,
+                        "action": leg.action,
+                        "strike": self._trade_context["strikes"][leg_idx],
+                        "entry_option_price": entry_option_price,
+                        "exit_option_price": exit_option_price,
+                        "pnl": profit
+                    }
+                    legs_details.append(leg_detail)
+
+                self.trades.append(
+                    entry_date=self._trade_context["entry_time"],
+                    exit_date=timestamp,
+                    entry_underlying_price=self._trade_context["entry_underlying_price"],
+                    exit_underlying_price=current_data["Price"],
+                    profit=total_profit,
+                    legs=legs_details  # Breakdown of each leg's details.
+                )
+                self.live_metrics.update_trade(total_profit, timestamp)
+                self._capital += total_profit
+                self._in_position = False
+                self._trade_context = {}
+        else:
+            context = {}
+            entry_signal = all(cond.evaluate(current_data, self._history(timestamp), context)
+                               for cond in self.strategy.entry_conditions)
+            if entry_signal:
+                self._trade_context["entry_time"] = timestamp
+                self._trade_context["entry_bar"] = self._n_bars
+                self._trade_context["entry_underlying_price"] = current_data["Price"]
+                option_data_series = []
+                entry_option_prices = []
+                underlying_symbol = self.config["underlying_asset"]["symbol"]
+                # Determine expiry_date: If option_expiry is WEEKLY, compute expiry using the trading dates.
+                option_expiry_type = self.config["underlying_asset"].get("option_expiry", "").upper()
+                if option_expiry_type == "WEEKLY":
+                    expiry_day = self.config["underlying_asset"].get("expiry_day", "THU") # Fallback : if expiry_day not found then THU is default
+                    expiry_date = get_next_weekly_expiry(timestamp, expiry_day, self._trading_days)
+                else:
+                    expiry_date = self.config["backtest_settings"].get("expiry_date", "")
+                skip_reason = None
+                try:
+                    expiry_ts = get_timestamp(expiry_date)
+                except (TypeError, ValueError):
+                    # e.g. a non-weekly config without backtest_settings.expiry_date
+                    skip_reason = "no valid expiry date"
+                unlisted = []
+                strikes = []
+                for leg in self.strategy.option_legs if skip_reason is None else []:
+                    multiplier = self.config["underlying_asset"].get("multiplier", 50)
+                    strike = None
+                    if leg.strike_selection.get("method", "").lower() == "delta":
+                        strike = self.delta_selector.select_strike(
+                            underlying_symbol, leg.option_type, expiry_date, timestamp,
+                            current_data["Price"], leg.strike_selection.get("value", 0.5)
+                        )
+                    if strike is None:
                         strike = get_strike_price(leg, current_data["Price"], multiplier)
-                        leg.computed_strike = strike
-                        try:
-                            option_df = self.accessor.get_contract_prices(
-                                underlying_symbol,
-                                leg.option_type.upper(),
-                                strike,
-                                get_timestamp(expiry_date)
-                            )
-                        except Exception as e:
-                            print(f"Error fetching option data for symbol {underlying_symbol} and {leg.option_type} {leg.action} strike {strike} expiry {expiry_date} date {timestamp}: {e}")
-                            option_df = pd.DataFrame()
-                        if not option_df.empty:
-                            option_df["DateTime"] = pd.to_datetime(option_df["DateTime"], unit='s', utc=True).dt.tz_convert('Asia/Kolkata').dt.tz_localize(None)
-                            option_df = option_df.drop_duplicates(subset="DateTime").sort_values("DateTime")
-                            option_df["Close"] = option_df["Close"].fillna(method="ffill")
+                    # Strikes without a contract move to the nearest listed one within the tolerance
+                    strikes.append(self.strike_index.resolve(
+                        underlying_symbol, leg.option_type, expiry_ts, strike, self.strike_tolerance))
+                    if strikes[-1] is None:
+                        unlisted.append(f"{leg.option_type} {strike}")
+                if unlisted:
+                    skip_reason = f"no contract within {self.strike_tolerance} points of {', '.join(unlisted)}"
+                elif skip_reason is None:
+                    # The legs' price fetches are independent, so they overlap. Strikes are passed
+                    # in rather than set on the legs, which other engines may share
+                    legs = self.strategy.option_legs
+                    with ThreadPoolExecutor(max_workers=min(LEG_FETCH_WORKERS, len(legs)),
+                                            thread_name_prefix="leg-fetch") as executor:
+                        option_frames = list(executor.map(
+                            lambda leg, strike: self._fetch_leg_prices(underlying_symbol, leg, strike, expiry_date, timestamp),
+                            legs, strikes))
+                    for option_df in option_frames:
                         option_data_series.append(option_df)
                         if not option_df.empty:
                             entry_price = get_nearest_option_price(option_df, timestamp)
                         else:
                             entry_price = np.nan
                         entry_option_prices.append(entry_price)
-                    trade_context["option_data_series"] = option_data_series
-                    trade_context["entry_option_prices"] = entry_option_prices
-                    in_position = True
-
-            if in_position:
-                current_equity = capital  # Unrealized PnL not marked-to-market in this demo
-            else:
-                current_equity = capital
-            self.equity_curve.append({"date": timestamp, "equity": current_equity})
-
-        self.equity_curve = pd.DataFrame(self.equity_curve).set_index("date")
-        return self.trades
-
-    def performance_metrics(self):
-        trades_df = pd.DataFrame(self.trades)
-        win_rate = (trades_df["profit"] > 0).mean() if not trades_df.empty else None
-        self.equity_curve["returns"] = self.equity_curve["equity"].pct_change().fillna(0)
-        if self.equity_curve["returns"].std() != 0:
-            sharpe_ratio = np.sqrt(252) * self.equity_curve["returns"].mean() / self.equity_curve["returns"].std()
+                    # A leg without a price would turn the trade's PnL and all capital after it into NaN
+                    if np.isnan(entry_option_prices).any():
+                        skip_reason = "no option prices for every leg"
+                if skip_reason:
+                    logger.warning(f"Skipping entry at {timestamp}: {skip_reason} (expiry {expiry_date!r})")
+                    self._trade_context = {}
+                else:
+                    self._trade_context["option_data_series"] = option_data_series
+                    self._trade_context["strikes"] = strikes
+                    self._trade_context["expiry_date"] = expiry_date
+                    self._trade_context["entry_option_prices"] = entry_option_prices
+                    self._in_position = True
+
+        if self._in_position:
+            current_equity = self._capital  # Unrealized PnL not marked-to-market in this demo
         else:
-            sharpe_ratio = None
-        return {"win_rate": win_rate, "sharpe_ratio": sharpe_ratio}
+            current_equity = self._capital
+        self._record_equity(current_equity, timestamp)
+
+    def _exit_context(self) -> dict:
+        """What the exit conditions get to know about the open trade"""
+        return {
+            "entry_time": self._trade_context["entry_time"],
+            "entry_price": self._trade_context["entry_underlying_price"],
+            "entry_underlying_price": self._trade_context["entry_underlying_price"],
+            # "entry_capital": self._trade_context["entry_capital"],
+            "current_capital": self._capital,  # current account capital updated after previous trades
+            "option_data_series": self._trade_context["option_data_series"],
+            "entry_option_prices": self._trade_context["entry_option_prices"],
+            "legs": self.strategy.option_legs,
+            "contract_multiplier": self.contract_multiplier
+        }
+
+    def _path_exit_bar(self, context: dict):
+        """
+        Bar position where the open trade's earliest path-dependent exit triggers, or None.
+        The bars after entry are searched in growing windows (most trades close on a time
+        exit long before a stop or target is hit); each search starts over from the entry,
+        so running extremes such as a trailing stop's maximum are always per trade. The
+        result is kept in the trade context until the bars searched so far are used up.
+        """
+        path_conditions = [cond for cond in self.strategy.exit_conditions if cond.path_dependent]
+        if not path_conditions:
+            return None
+        trade = self._trade_context
+        searched_to = trade.get("path_searched_to", 0)
+        if trade.get("path_exit_bar") is not None or self._n_bars < searched_to:
+            return trade.get("path_exit_bar")
+        start = trade["entry_bar"] + 1
+        end = min(len(self.underlying_data), start + max(PATH_EXIT_SEARCH_BARS, 2 * (searched_to - start)))
+        checked = start + np.flatnonzero(self._checked_bars[start:end])
+        bars = self.underlying_data.iloc[checked]
+        hits = [cond.first_passage(bars, context) for cond in path_conditions]
+        hits = [hit for hit in hits if hit is not None]
+        trade["path_exit_bar"] = int(checked[min(hits)]) if hits else None
+        trade["path_searched_to"] = end
+        return trade["path_exit_bar"]
+
+    def _fetch_leg_prices(self, underlying_symbol, leg, strike, expiry_date, timestamp) -> pd.DataFrame:
+        """Price frame of the leg's contract at `strike` with IST DateTime, or an empty frame if it cannot be fetched"""
+        try:
+            option_df = self.accessor.get_contract_prices(
+                underlying_symbol,
+                leg.option_type.upper(),
+                strike,
+                get_timestamp(expiry_date),
+                self.resolution
+            )
+        except Exception as e:
+            logger.error(f"Error fetching option data for symbol {underlying_symbol} and {leg.option_type} {leg.action} strike {strike} expiry {expiry_date} date {timestamp}: {e}")
+            return pd.DataFrame()
+        if not option_df.empty:
+            option_df["DateTime"] = epoch_to_ist(option_df["DateTime"])
+            option_df = clean_by_time(option_df, "DateTime", "Close")
+        return option_df
+
+    def _conditions(self):
+        return self.strategy.entry_conditions + self.strategy.exit_conditions
+
+    def save_checkpoint(self, path: str) -> None:
+        """Snapshot of the run state after the last processed bar (see engine.checkpoint)"""
+        checkpoints.save_checkpoint(path, {
+            "config": checkpoints.config_fingerprint(self.config),
+            "data": checkpoints.data_fingerprint(self.underlying_data, self._n_bars),
+            "n_bars": self._n_bars,
+            "last_timestamp": self.underlying_data.index[self._n_bars - 1] if self._n_bars else None,
+            "capital": self._capital,
+            "in_position": self._in_position,
+            # The open trade's legs are kept as contract keys (strikes, expiry) and refetched on
+            # restore: frames saved now would miss the ticks of the days a later run adds
+            "trade_context": {key: value for key, value in self._trade_context.items() if key != "option_data_series"},
+            # Stateful conditions (e.g. TrailingStoplossCondition.max_price) and entry strikes
+            "conditions": [vars(condition) for condition in self._conditions()],
+            "legs": [vars(leg) for leg in self.strategy.option_legs],
+            "equity": self._equity[:self._n_bars].copy(),
+            "trades": self.trades,
+            "live_metrics": self.live_metrics,
+        })
+
+    def _checkpoint_mismatch(self, checkpoint: dict):
+        """Why `checkpoint` cannot be resumed by this run, or None if it can"""
+        n_bars = checkpoint["n_bars"]
+        if checkpoint["config"] != checkpoints.config_fingerprint(self.config):
+            return "config changed"
+        if n_bars > len(self.underlying_data):
+            return "end_date is before the checkpoint"
+        if n_bars and self.underlying_data.index[n_bars - 1] != checkpoint["last_timestamp"]:
+            return "start_date or bar calendar changed"
+        if checkpoint["data"] != checkpoints.data_fingerprint(self.underlying_data, n_bars):
+            return "underlying data changed"
+        if len(checkpoint["conditions"]) != len(self._conditions()) \
+                or len(checkpoint["legs"]) != len(self.strategy.option_legs):
+            return "strategy changed"
+        return None
+
+    def _restore(self, checkpoint: dict):
+        for condition, state in zip(self._conditions(), checkpoint["conditions"]):
+            vars(condition).update(state)
+        for leg, state in zip(self.strategy.option_legs, checkpoint["legs"]):
+            vars(leg).update(state)
+        self._n_bars = checkpoint["n_bars"]
+        self._equity[:self._n_bars] = checkpoint["equity"]
+        self.trades = checkpoint["trades"]
+        self.live_metrics = checkpoint["live_metrics"]
+        self._capital = checkpoint["capital"]
+        self._in_position = checkpoint["in_position"]
+        self._trade_context = dict(checkpoint["trade_context"])
+        if self._in_position:
+            trade = self._trade_context
+            symbol = self.config["underlying_asset"]["symbol"]
+            trade["option_data_series"] = [
+                self._fetch_leg_prices(symbol, leg, strike, trade["expiry_date"], trade["entry_time"])
+                for leg, strike in zip(self.strategy.option_legs, trade["strikes"])]
+
+    @property
+    def progress(self) -> float:
+        """Fraction of bars processed by the current run, readable while it executes"""
+        total = len(self.underlying_data)
+        return self._n_bars / total if total else 1.0
+
+    @property
+    def equity_curve(self) -> pd.Series:
+        """Read-only equity per processed bar, indexed by the underlying timestamps"""
+        values = self._equity[:self._n_bars]
+        values.flags.writeable = False
+        index = self.underlying_data.index[:self._n_bars].rename("date")
+        return pd.Series(values, index=index, name="equity", copy=False)
+
+    def performance_metrics(self, metrics=None):
+        """
+        Computes `metrics` (default: the config's reporting.metrics) in one vectorized
+        pass over the equity and trade arrays. See engine.metrics.AVAILABLE_METRICS.
+        """
+        equity_curve = self.equity_curve
+        return compute_metrics(
+            equity_curve.to_numpy(),
+            profits=self.trades.column("profit"),
+            exit_dates=self.trades.column("exit_date"),
+            timestamps=equity_curve.index,
+            metrics=metrics if metrics is not None else self.metric_names,
+        )
+
+    def robustness_report(self, n_resamples: int = 10_000, confidence: float = 0.95, seed=None, n_jobs: int = 1):
+        """
+        Bootstrap / permutation confidence intervals for final equity, max drawdown and
+        Sharpe ratio of this run. See engine.robustness.robustness_report.
+        """
+        return robustness_report(self.trades.column("profit"), self.equity_curve.to_numpy(), self.initial_capital,
+                                 n_resamples=n_resamples, confidence=confidence, seed=seed, n_jobs=n_jobs)
+
+    def stress_test(self, scenarios=None, n_paths: int = 200, seed=None):
+        """
+        PnL distribution per stress scenario of this run's trades, each repriced from its
+        entry; intraday paths are bootstrapped from the run's own same-day bar returns.
+        See engine.scenarios.stress_test.
+        """
+        rate = float(self.config["backtest_settings"].get("risk_free_rate", 0.0))
+        prices = self.underlying_data["Price"].to_numpy(dtype=float)
+        days = self.underlying_data.index.normalize()
+        same_day = days[1:] == days[:-1]
+        returns = np.diff(np.log(prices))[same_day]
+        bars_per_day = int(np.median(days.value_counts())) if len(days) else 1
+        return stress_test(positions_from_trades(self, rate), scenarios, n_paths=n_paths, path_returns=returns,
+                           path_bars=bars_per_day, rate=rate, seed=seed)
 
     def plot_results(self, return_fig=False):
+        """
+        Draws equity, cumulative returns, drawdown and per-weekday profit panels from
+        LTTB-downsampled series (see engine.charts). For cached, off-thread rendering
+        use engine.charts.ChartRenderer instead.
+        """
         import matplotlib.pyplot as plt
-        import pandas as pd
-        import matplotlib.dates as mdates
-
-        # ==========================
-        # 1. Convert Intraday to Daily
-        # ==========================
-
-        # -- Equity Curve: group by date, take last record
-        equity_df = self.equity_curve.copy()
-        # Normalize index to remove the time component
-        equity_df.index = equity_df.index.normalize()
-        # Aggregate intraday points to daily last
-        equity_df = equity_df.groupby(equity_df.index).last()
-
-        # If a benchmark is present, do the same
-        bench_df = None
-        if self.benchmark_data is not None and not self.benchmark_data.empty:
-            bench_df = self.benchmark_data.copy()
-            bench_df.index = bench_df.index.normalize()
-            bench_df = bench_df.groupby(bench_df.index).last()
-
-        # If underlying_data is available, also aggregate it
-        under_df = None
-        if hasattr(self, "underlying_data") and "Price" in self.underlying_data.columns:
-            under_df = self.underlying_data.copy()
-            under_df.index = under_df.index.normalize()
-            under_df = under_df.groupby(under_df.index).last()
-
-        # ==========================
-        # 2. Compute Performance Metrics and Data
-        # ==========================
-        metrics = self.performance_metrics()
-        win_rate = metrics.get("win_rate", 0)
-        sharpe = metrics.get("sharpe_ratio", 0)
-
-        initial_capital = self.initial_capital
-        equity_series = equity_df["equity"]
-
-        # Strategy cumulative returns
-        cum_returns_strategy = (equity_series / initial_capital) - 1
-
-        # Benchmark cumulative returns
-        cum_returns_bench = None
-        if bench_df is not None:
-            bench_prices = bench_df["Price"]
-            bench_initial = bench_prices.iloc[0]
-            cum_returns_bench = (bench_prices / bench_initial) - 1
-
-        # Underlying cumulative returns
-        cum_returns_under = None
-        if under_df is not None:
-            under_prices = under_df["Price"]
-            under_initial = under_prices.iloc[0]
-            cum_returns_under = (under_prices / under_initial) - 1
-
-        # Compute drawdown for strategy
-        running_max = equity_series.cummax()
-        drawdown = (equity_series - running_max) / running_max
-        max_drawdown = drawdown.min()
-
-        # ==========================
-        # 3. Aggregate trades by exit day (still daily-based, since we care about the date)
-        # ==========================
-        trades_df = None
-        if len(self.trades) > 0:
-            trades_df = pd.DataFrame(self.trades)
-            trades_df["exit_date"] = pd.to_datetime(trades_df["exit_date"]).dt.normalize()
-            trades_df["exit_day"] = trades_df["exit_date"].dt.day_name()
-            day_profit = trades_df.groupby("exit_day")["profit"].agg(["mean", "count"])
-            day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            day_profit = day_profit.reindex(day_order).fillna(0)
-
-        # ==========================
-        # 4. Plot the Results (Daily Frequency)
-        # ==========================
-        fig, axs = plt.subplots(2, 2, figsize=(16, 12))
-
-        # --- Panel 1: Equity Curve ---
-        axs[0, 0].plot(equity_series.index, equity_series, label="Strategy Equity", color='blue')
-        if bench_df is not None:
-            axs[0, 0].plot(bench_df.index, bench_df["Price"], label="Benchmark Price", color='orange')
-        axs[0, 0].set_title("Equity Curve (Daily)")
-        axs[0, 0].set_xlabel("Date")
-        axs[0, 0].set_ylabel("Equity / Price")
-        axs[0, 0].grid(True)
-        axs[0, 0].legend()
-
-        # Annotate key metrics
-        axs[0, 0].text(
-            0.02, 0.95,
-            f"Win Rate: {win_rate:.2%}\nSharpe Ratio: {sharpe:.2f}\nMax Drawdown: {max_drawdown:.2%}",
-            transform=axs[0, 0].transAxes,
-            fontsize=10,
-            verticalalignment='top',
-            bbox=dict(boxstyle="round", facecolor="wheat", alpha=0.5)
-        )
-
-        # --- Panel 2: Cumulative Returns ---
-        axs[0, 1].plot(cum_returns_strategy.index, cum_returns_strategy, label="Strategy Cumulative Return",
-                       color='blue')
-        if cum_returns_bench is not None:
-            axs[0, 1].plot(cum_returns_bench.index, cum_returns_bench, label="Benchmark Cumulative Return",
-                           color='orange')
-        if cum_returns_under is not None:
-            axs[0, 1].plot(cum_returns_under.index, cum_returns_under, label="Underlying Cumulative Return",
-                           color='green')
-        axs[0, 1].set_title("Cumulative Returns (Daily)")
-        axs[0, 1].set_xlabel("Date")
-        axs[0, 1].set_ylabel("Cumulative Return")
-        axs[0, 1].grid(True)
-        axs[0, 1].legend()
-
-        # --- Panel 3: Drawdown (Strategy) ---
-        axs[1, 0].plot(drawdown.index, drawdown, label="Drawdown", color='red')
-        axs[1, 0].set_title("Drawdown (Daily)")
-        axs[1, 0].set_xlabel("Date")
-        axs[1, 0].set_ylabel("Drawdown (%)")
-        axs[1, 0].grid(True)
-        axs[1, 0].legend()
-
-        # --- Panel 4: Average Profit by Exit Day ---
-        if trades_df is not None:
-            axs[1, 1].bar(day_profit.index, day_profit["mean"], color="green", alpha=0.7)
-            axs[1, 1].set_title("Average Profit by Exit Day")
-            axs[1, 1].set_xlabel("Day of Week")
-            axs[1, 1].set_ylabel("Average Profit")
-            axs[1, 1].grid(True, axis="y")
-            # Annotate each bar with the count of trades on that day
-            for idx, (day, row) in enumerate(day_profit.iterrows()):
-                axs[1, 1].text(idx, row["mean"], f'{int(row["count"])}', ha='center', va='bottom', fontsize=9)
-        else:
-            axs[1, 1].text(
-                0.5, 0.5,
-                "No trades available for day-wise analysis",
-                horizontalalignment='center',
-                verticalalignment='center'
-            )
+        from engine.charts import prepare_chart_data, build_figure
 
-        # Use a date formatter to clean up x-axis
-        for i in range(2):
-            for j in range(2):
-                ax = axs[i, j]
-                ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-                ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(ax.xaxis.get_major_locator()))
-                for label in ax.get_xticklabels():
-                    label.set_rotation(45)
-                    label.set_horizontalalignment('right')
-
-        plt.tight_layout(pad=3.0)
+        fig = build_figure(prepare_chart_data(self), plt.figure(figsize=(16, 12)))
         if return_fig:
             return fig
         else:
-            plt.show()
\ No newline at end of file
+            plt.show()
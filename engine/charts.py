@@ -0,0 +1,243 @@
+# engine/charts.py
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data.constants import CHART_CACHE_PATH
+
+# Points per plotted line; roughly the pixel width of one panel
+DISPLAY_POINTS = 1500
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns the indices of `n_out` points
+    of (x, y) that preserve the visual shape of the line (peaks and troughs survive,
+    unlike plain striding or daily resampling). First and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket edges over the interior points, excluding first and last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_start, next_end = edges[b + 1], edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        bx, by = x[start:end], y[start:end]
+        areas = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(areas))
+        selected[b + 1] = prev
+    return selected
+
+
+def downsample(series: pd.Series, n_out: int = DISPLAY_POINTS) -> pd.Series:
+    """LTTB-downsampled view of a time-indexed series, NaNs dropped"""
+    series = series.dropna()
+    if len(series) <= n_out:
+        return series
+    x = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else np.arange(len(series))
+    return series.iloc[lttb_indices(x, series.to_numpy(dtype=float), n_out)]
+
+
+def run_id_for(config: dict, data_version: str = "") -> str:
+    """
+    Stable id of a backtest configuration run on a given version of the data
+    (data.accessor.data_version), used as the chart cache key
+    """
+    key = json.dumps({"config": config, "data": data_version}, sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def prepare_chart_data(engine, n_out: int = DISPLAY_POINTS) -> dict:
+    """
+    Snapshot of everything the chart needs, downsampled to display resolution.
+    Cheap enough for the request thread; the result is small and safe to hand to a worker.
+    """
+    equity = engine.equity_curve
+    metrics = engine.performance_metrics(["win_rate", "sharpe_ratio", "max_drawdown", "weekday_stats"])
+    running_max = np.maximum.accumulate(equity.to_numpy())
+    drawdown = pd.Series(equity.to_numpy() / running_max - 1, index=equity.index)
+
+    data = {
+        "equity": downsample(equity, n_out),
+        "cum_returns": downsample(equity / engine.initial_capital - 1, n_out),
+        "drawdown": downsample(drawdown, n_out),
+        "benchmark": None,
+        "cum_returns_bench": None,
+        "cum_returns_under": None,
+        "metrics": metrics,
+        "has_trades": len(engine.trades) > 0,
+    }
+    if engine.benchmark_data is not None and not engine.benchmark_data.empty:
+        bench = engine.benchmark_data["Price"]
+        data["benchmark"] = downsample(bench, n_out)
+        data["cum_returns_bench"] = downsample(bench / bench.iloc[0] - 1, n_out)
+    if "Price" in engine.underlying_data.columns and not engine.underlying_data.empty:
+        under = engine.underlying_data["Price"]
+        data["cum_returns_under"] = downsample(under / under.iloc[0] - 1, n_out)
+    return data
+
+
+def build_figure(data: dict, fig=None):
+    """
+    Draws the four result panels from `prepare_chart_data` output. Without `fig` a bare
+    matplotlib Figure (no pyplot state) is used, so this is safe to call from worker threads.
+    """
+    import matplotlib.dates as mdates
+    if fig is None:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(16, 12))
+    axs = fig.subplots(2, 2)
+    metrics = data["metrics"]
+    win_rate = metrics.get("win_rate") or 0
+    sharpe = metrics.get("sharpe_ratio") or 0
+    max_drawdown = metrics.get("max_drawdown") or 0
+
+    # --- Panel 1: Equity Curve ---
+    equity = data["equity"]
+    axs[0, 0].plot(equity.index, equity, label="Strategy Equity", color='blue')
+    if data["benchmark"] is not None:
+        axs[0, 0].plot(data["benchmark"].index, data["benchmark"], label="Benchmark Price", color='orange')
+    axs[0, 0].set_title("Equity Curve")
+    axs[0, 0].set_xlabel("Date")
+    axs[0, 0].set_ylabel("Equity / Price")
+    axs[0, 0].grid(True)
+    axs[0, 0].legend()
+
+    # Annotate key metrics
+    axs[0, 0].text(
+        0.02, 0.95,
+        f"Win Rate: {win_rate:.2%}\nSharpe Ratio: {sharpe:.2f}\nMax Drawdown: {max_drawdown:.2%}",
+        transform=axs[0, 0].transAxes,
+        fontsize=10,
+        verticalalignment='top',
+        bbox=dict(boxstyle="round", facecolor="wheat", alpha=0.5)
+    )
+
+    # --- Panel 2: Cumulative Returns ---
+    cum_returns = data["cum_returns"]
+    axs[0, 1].plot(cum_returns.index, cum_returns, label="Strategy Cumulative Return", color='blue')
+    if data["cum_returns_bench"] is not None:
+        axs[0, 1].plot(data["cum_returns_bench"].index, data["cum_returns_bench"],
+                       label="Benchmark Cumulative Return", color='orange')
+    if data["cum_returns_under"] is not None:
+        axs[0, 1].plot(data["cum_returns_under"].index, data["cum_returns_under"],
+                       label="Underlying Cumulative Return", color='green')
+    axs[0, 1].set_title("Cumulative Returns")
+    axs[0, 1].set_xlabel("Date")
+    axs[0, 1].set_ylabel("Cumulative Return")
+    axs[0, 1].grid(True)
+    axs[0, 1].legend()
+
+    # --- Panel 3: Drawdown (Strategy) ---
+    drawdown = data["drawdown"]
+    axs[1, 0].plot(drawdown.index, drawdown, label="Drawdown", color='red')
+    axs[1, 0].set_title("Drawdown")
+    axs[1, 0].set_xlabel("Date")
+    axs[1, 0].set_ylabel("Drawdown (%)")
+    axs[1, 0].grid(True)
+    axs[1, 0].legend()
+
+    # --- Panel 4: Average Profit by Exit Day ---
+    if data["has_trades"]:
+        day_profit = pd.DataFrame.from_dict(metrics["weekday_stats"], orient="index")
+        axs[1, 1].bar(day_profit.index, day_profit["mean"], color="green", alpha=0.7)
+        axs[1, 1].set_title("Average Profit by Exit Day")
+        axs[1, 1].set_xlabel("Day of Week")
+        axs[1, 1].set_ylabel("Average Profit")
+        axs[1, 1].grid(True, axis="y")
+        # Annotate each bar with the count of trades on that day
+        for idx, (day, row) in enumerate(day_profit.iterrows()):
+            axs[1, 1].text(idx, row["mean"], f'{int(row["count"])}', ha='center', va='bottom', fontsize=9)
+    else:
+        axs[1, 1].text(
+            0.5, 0.5,
+            "No trades available for day-wise analysis",
+            horizontalalignment='center',
+            verticalalignment='center'
+        )
+
+    # Use a date formatter to clean up the time axes
+    for ax in (axs[0, 0], axs[0, 1], axs[1, 0]):
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(ax.xaxis.get_major_locator()))
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment('right')
+
+    fig.tight_layout(pad=3.0)
+    return fig
+
+
+class ChartRenderer:
+    """
+    Renders result charts on a background worker and caches them on disk as
+    `<cache_dir>/<run_id>.<fmt>` (png or svg). Requests for a run id that is already
+    cached or being rendered reuse that file or that render.
+    """
+
+    FORMATS = ("png", "svg")
+
+    def __init__(self, cache_dir: str = CHART_CACHE_PATH, max_workers: int = 1, dpi: int = 100):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chart-render")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def path(self, run_id: str, fmt: str = "png") -> str:
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported chart format: {fmt}")
+        return os.path.join(self.cache_dir, f"{run_id}.{fmt}")
+
+    def cached(self, run_id: str, fmt: str = "png"):
+        """Path of the rendered chart if it exists, else None"""
+        path = self.path(run_id, fmt)
+        return path if os.path.exists(path) else None
+
+    def submit(self, run_id: str, data: dict, fmt: str = "png") -> Future:
+        """Queue a render of `prepare_chart_data` output; resolves to the file path"""
+        path = self.path(run_id, fmt)
+        with self._lock:
+            if (run_id, fmt) in self._pending:
+                return self._pending[(run_id, fmt)]
+            if os.path.exists(path):
+                future = Future()
+                future.set_result(path)
+                return future
+            future = self._executor.submit(self._render, data, path, fmt)
+            self._pending[(run_id, fmt)] = future
+        future.add_done_callback(lambda _: self._forget(run_id, fmt))
+        return future
+
+    def pending(self, run_id: str, fmt: str = "png"):
+        """The in-flight render of a run id, if any"""
+        with self._lock:
+            return self._pending.get((run_id, fmt))
+
+    def _forget(self, run_id, fmt):
+        with self._lock:
+            self._pending.pop((run_id, fmt), None)
+
+    def _render(self, data, path, fmt):
+        fig = build_figure(data)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        fig.savefig(tmp_path, format=fmt, dpi=self.dpi)
+        os.replace(tmp_path, path)
+        return path
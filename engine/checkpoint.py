@@ -0,0 +1,55 @@
+# engine/checkpoint.py
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+import pandas as pd
+
+# Bumped whenever the snapshot layout changes; older snapshots are ignored
+CHECKPOINT_VERSION = 2
+# Settings that may differ between a snapshot and the run resuming from it
+RESUMABLE_SETTINGS = ("end_date",)
+
+logger = logging.getLogger(__name__)
+
+
+def config_fingerprint(config: dict) -> str:
+    """Hash of everything in the config that affects the bars a snapshot already covers"""
+    config = copy.deepcopy(config)
+    for key in RESUMABLE_SETTINGS:
+        config.get("backtest_settings", {}).pop(key, None)
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def data_fingerprint(underlying_data: pd.DataFrame, n_bars: int) -> str:
+    """Hash of the timestamps and prices of the first `n_bars` underlying bars"""
+    head = underlying_data.iloc[:n_bars]
+    digest = hashlib.sha1(head.index.to_numpy(dtype="datetime64[ns]").tobytes())
+    digest.update(head["Price"].to_numpy(dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """Pickles `state` to `path` atomically (write to a temp file, then rename)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": CHECKPOINT_VERSION, **state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str):
+    """The saved state, or None if there is no usable snapshot at `path`"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logger.warning(f"Could not read checkpoint {path}: {e}")
+        return None
+    return state if state.get("version") == CHECKPOINT_VERSION else None
@@ -0,0 +1,244 @@
+# engine/greeks.py
+
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.helpers import get_timestamp
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+# Options stop trading at the close of the expiry day (IST)
+EXPIRY_TIME = pd.Timedelta(hours=15, minutes=30)
+MIN_VOL, MAX_VOL = 1e-4, 5.0
+
+def _erfc(x):
+    """
+    Complementary error function in plain array arithmetic (Chebyshev fit from Numerical
+    Recipes' erfcc, relative error < 1.2e-7 everywhere, so deep tails stay accurate).
+    """
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 + t * (
+        0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    tail = t * np.exp(-z * z + poly)
+    return np.where(x >= 0, tail, 2.0 - tail)
+
+
+def norm_cdf(x):
+    return 0.5 * _erfc(-np.asarray(x, dtype=float) / math.sqrt(2.0))
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / math.sqrt(2.0 * math.pi)
+
+
+def _d1_d2(spot, strike, t, rate, sigma):
+    vol_sqrt_t = sigma * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * sigma * sigma) * t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def bs_price(spot, strike, t, rate, sigma, is_call):
+    """Black-Scholes price of European calls (is_call True) / puts, element-wise"""
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    discount = np.exp(-rate * t)
+    call = spot * norm_cdf(d1) - strike * discount * norm_cdf(d2)
+    put = strike * discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_delta(spot, strike, t, rate, sigma, is_call):
+    """Black-Scholes delta, element-wise (puts are negative)"""
+    d1, _ = _d1_d2(spot, strike, t, rate, sigma)
+    return np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+
+
+def bs_vega(spot, strike, t, rate, sigma):
+    """Black-Scholes vega per 1.00 of volatility, element-wise"""
+    d1, _ = _d1_d2(spot, strike, t, rate, sigma)
+    return spot * norm_pdf(d1) * np.sqrt(t)
+
+
+def bs_gamma(spot, strike, t, rate, sigma):
+    d1, _ = _d1_d2(spot, strike, t, rate, sigma)
+    return norm_pdf(d1) / (spot * sigma * np.sqrt(t))
+
+
+def bs_theta(spot, strike, t, rate, sigma, is_call):
+    """Black-Scholes theta per year, element-wise"""
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    decay = -spot * norm_pdf(d1) * sigma / (2.0 * np.sqrt(t))
+    carry = rate * strike * np.exp(-rate * t)
+    return np.where(is_call, decay - carry * norm_cdf(d2), decay + carry * norm_cdf(-d2))
+
+
+def option_greeks(price, spot, strike, t, rate, is_call) -> dict:
+    """
+    IV and greeks for arrays of option prices: delta, gamma, theta per calendar day and
+    vega per volatility point (0.01). Elements without an implied volatility are NaN.
+    """
+    iv = implied_volatility(price, spot, strike, t, rate, is_call)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "IV": iv,
+            "Delta": bs_delta(spot, strike, t, rate, iv, is_call),
+            "Gamma": bs_gamma(spot, strike, t, rate, iv),
+            "Theta": bs_theta(spot, strike, t, rate, iv, is_call) / 365.0,
+            "Vega": bs_vega(spot, strike, t, rate, iv) / 100.0,
+        }
+
+
+def implied_volatility(price, spot, strike, t, rate, is_call, tol: float = 1e-6, max_iter: int = 50) -> np.ndarray:
+    """
+    Implied volatility of a whole chain at once: Newton steps on every element together,
+    falling back to bisection for elements whose step leaves the bracket [lo, hi] that is
+    kept around the root. Prices outside the no-arbitrage bounds give NaN.
+    """
+    price, spot, strike, t, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(spot, dtype=float), np.asarray(strike, dtype=float),
+        np.asarray(t, dtype=float), np.asarray(is_call, dtype=bool))
+    discount = np.exp(-rate * t)
+    lower = np.where(is_call, np.maximum(spot - strike * discount, 0.0), np.maximum(strike * discount - spot, 0.0))
+    upper = np.where(is_call, spot, strike * discount)
+    valid = np.isfinite(price) & (t > 0) & (price > lower) & (price < upper)
+
+    lo = np.full(price.shape, MIN_VOL)
+    hi = np.full(price.shape, MAX_VOL)
+    sigma = np.full(price.shape, 0.3)
+    active = valid.copy()
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        s, k, tt, c, p = spot[active], strike[active], t[active], is_call[active], price[active]
+        sig = sigma[active]
+        diff = bs_price(s, k, tt, rate, sig, c) - p
+        # Price is increasing in volatility, so the sign of diff moves one side of the bracket
+        lo[active] = np.where(diff < 0, sig, lo[active])
+        hi[active] = np.where(diff > 0, sig, hi[active])
+        vega = bs_vega(s, k, tt, rate, sig)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = sig - diff / vega
+        in_bracket = np.isfinite(newton) & (newton > lo[active]) & (newton < hi[active])
+        sigma[active] = np.where(in_bracket, newton, 0.5 * (lo[active] + hi[active]))
+        converged = (np.abs(diff) < tol) | (hi[active] - lo[active] < tol)
+        active[np.flatnonzero(active)[converged]] = False
+    return np.where(valid, sigma, np.nan)
+
+
+def expiry_epoch(expiry_date: str) -> int:
+    """Epoch seconds of the close of `expiry_date` ("YYYY-MM-DD")"""
+    return int((pd.Timestamp(expiry_date) + EXPIRY_TIME).tz_localize("Asia/Kolkata").timestamp())
+
+
+def time_to_expiry(timestamp, expiry_date: str) -> float:
+    """Years from `timestamp` to the close of `expiry_date` ("YYYY-MM-DD")"""
+    expiry = pd.Timestamp(expiry_date) + EXPIRY_TIME
+    return max((expiry - pd.Timestamp(timestamp)).total_seconds(), 0.0) / SECONDS_PER_YEAR
+
+
+class DeltaStrikeSelector:
+    """
+    Picks the strike whose Black-Scholes delta is closest to a target, from the option
+    chain of an expiry at a given time. Each chain is loaded once into (time x strike)
+    matrices: the precomputed IV/delta of build_greeks.py when the accessor has them,
+    otherwise close prices whose IV/delta snapshot is solved per (expiry, timestamp)
+    and memoized (the `max_snapshots` most recently used), so repeated delta legs cost a lookup.
+    Option types are matched case-insensitively, like StrikeIndex.
+    """
+
+    def __init__(self, accessor, risk_free_rate: float = 0.0, resolution=None, max_chains: int = 8,
+                 max_snapshots: int = 4096):
+        self.accessor = accessor
+        self.risk_free_rate = risk_free_rate
+        self.resolution = resolution
+        self.max_chains = max_chains
+        self.max_snapshots = max_snapshots
+        self._use_greeks = hasattr(accessor, "get_contract_greeks")
+        self._chains = OrderedDict()
+        self._snapshots = OrderedDict()
+
+    def _series(self, symbol, option_type, strike, expiry_ts, columns):
+        """Per-strike frames of `columns` indexed by DateTime, from greeks or prices"""
+        if self._use_greeks:
+            frame = self.accessor.get_contract_greeks(symbol, option_type, strike, expiry_ts)
+            if not frame.empty:
+                return frame.drop_duplicates(subset="DateTime").set_index("DateTime")[columns]
+            # Greeks were never built for this data; solve from prices from now on
+            self._use_greeks = False
+        prices = self.accessor.get_contract_prices(symbol, option_type, strike, expiry_ts, self.resolution)
+        return None if prices.empty else prices.drop_duplicates(subset="DateTime").set_index("DateTime")[["Close"]]
+
+    def _chain(self, symbol, option_type, expiry_date):
+        key = (symbol, option_type, expiry_date)
+        if key in self._chains:
+            self._chains.move_to_end(key)
+            return self._chains[key]
+        expiry_ts = get_timestamp(expiry_date)
+        contracts = self.accessor.get_contract_by_symbol_and_expiry(symbol, expiry_ts)
+        strikes = np.sort(contracts.loc[contracts["Type"].str.upper() == option_type, "StrikePrice"].astype(float).unique()) \
+            if not contracts.empty else np.empty(0)
+        frames = {}
+        for strike in strikes:
+            try:
+                frame = self._series(symbol, option_type, strike, expiry_ts, ["IV", "Delta"])
+            except ValueError:
+                continue
+            if frame is not None:
+                frames[strike] = frame
+        # A chain mixing greeks and prices (greeks missing mid-way) is rebuilt from prices
+        if frames and len({tuple(frame.columns) for frame in frames.values()}) > 1:
+            self._use_greeks = False
+            return self._chain(symbol, option_type, expiry_date)
+
+        chain = {"times": np.empty(0, dtype=np.int64), "strikes": np.empty(0)}
+        if frames:
+            panel = pd.concat(frames, axis=1).sort_index().ffill()
+            chain["times"] = panel.index.to_numpy(dtype=np.int64)
+            chain["strikes"] = np.array(list(frames), dtype=float)
+            for column in next(iter(frames.values())).columns:
+                chain[column] = panel.xs(column, axis=1, level=1).to_numpy(dtype=float)
+        self._chains[key] = chain
+        while len(self._chains) > self.max_chains:
+            evicted, _ = self._chains.popitem(last=False)
+            self._snapshots = OrderedDict((k, v) for k, v in self._snapshots.items() if k[:3] != evicted)
+        return chain
+
+    def snapshot(self, symbol, option_type, expiry_date, timestamp, spot):
+        """(strikes, implied vols, deltas) of the chain at `timestamp` (naive IST)"""
+        option_type = option_type.upper()
+        key = (symbol, option_type, expiry_date, timestamp)
+        if key in self._snapshots:
+            self._snapshots.move_to_end(key)
+            return self._snapshots[key]
+        chain = self._chain(symbol, option_type, expiry_date)
+        strikes = chain["strikes"]
+        epoch = int(pd.Timestamp(timestamp).tz_localize("Asia/Kolkata").timestamp())
+        row = np.searchsorted(chain["times"], epoch, side="right") - 1
+        if row < 0 or not len(strikes):
+            result = (strikes, np.full(len(strikes), np.nan), np.full(len(strikes), np.nan))
+        elif "Delta" in chain:
+            result = (strikes, chain["IV"][row], chain["Delta"][row])
+        else:
+            t = time_to_expiry(timestamp, expiry_date)
+            is_call = option_type.upper() == "CE"
+            iv = implied_volatility(chain["Close"][row], spot, strikes, t, self.risk_free_rate, is_call)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                delta = bs_delta(spot, strikes, t, self.risk_free_rate, iv, is_call)
+            result = (strikes, iv, delta)
+        self._snapshots[key] = result
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return result
+
+    def select_strike(self, symbol, option_type, expiry_date, timestamp, spot, target_delta):
+        """
+        Strike with |delta| closest to |target_delta| (e.g. 0.4, or -0.4 for puts), or None
+        when no strike of the chain has a usable price at `timestamp`.
+        """
+        strikes, _, delta = self.snapshot(symbol, option_type, expiry_date, timestamp, float(spot))
+        distance = np.abs(np.abs(delta) - abs(float(target_delta)))
+        if not len(distance) or np.isnan(distance).all():
+            return None
+        return float(strikes[np.nanargmin(distance)])
@@ -0,0 +1,253 @@
+# engine/metrics.py
+
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+AVAILABLE_METRICS = [
+    "total_return",
+    "sharpe_ratio",
+    "sortino_ratio",
+    "max_drawdown",
+    "max_drawdown_duration",
+    "calmar_ratio",
+    "win_rate",
+    "profit_factor",
+    "expectancy",
+    "weekday_stats",
+]
+
+# Reported when the config has no reporting.metrics list
+DEFAULT_METRICS = ["win_rate", "sharpe_ratio"]
+
+logger = logging.getLogger(__name__)
+
+
+def _known_metrics(metrics) -> list:
+    """`metrics` (DEFAULT_METRICS if None) without the names not in AVAILABLE_METRICS, which are logged and skipped"""
+    metrics = DEFAULT_METRICS if metrics is None else metrics
+    unknown = sorted(set(metrics) - set(AVAILABLE_METRICS))
+    if unknown:
+        logger.warning(f"Skipping unknown metrics {unknown}; available: {AVAILABLE_METRICS}")
+    return [name for name in metrics if name in AVAILABLE_METRICS]
+
+
+def json_safe(value):
+    """`value` with NaN / inf floats (also inside dicts and lists) replaced by None, i.e. JSON null"""
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _ratio(numerator, denominator):
+    if denominator is None or denominator == 0 or not math.isfinite(denominator):
+        return None
+    return float(numerator / denominator)
+
+
+def _cagr(total_return, first_time, last_time):
+    if first_time is None or last_time is None:
+        return None
+    years = (pd.Timestamp(last_time) - pd.Timestamp(first_time)).total_seconds() / (365.25 * 86400)
+    if years <= 0 or total_return <= -1:
+        return None
+    return (1 + total_return) ** (1 / years) - 1
+
+
+def compute_metrics(equity, profits=None, exit_dates=None, timestamps=None, metrics=None,
+                    periods_per_year: int = 252) -> dict:
+    """
+    Computes the requested metrics over the equity and trade arrays in one vectorized pass.
+
+    Parameters:
+      - equity: equity value per bar.
+      - profits: profit per closed trade.
+      - exit_dates: exit timestamp per closed trade (for weekday_stats).
+      - timestamps: timestamp per bar (for calmar_ratio's annualized return).
+      - metrics: names from AVAILABLE_METRICS (others are skipped); DEFAULT_METRICS if None.
+      - periods_per_year: annualization factor applied to the per-bar return ratios.
+    """
+    metrics = _known_metrics(metrics)
+
+    equity = np.asarray(equity, dtype=float)
+    profits = np.asarray(profits if profits is not None else [], dtype=float)
+    results = {}
+
+    # Shared equity intermediates, computed once for every equity-based metric
+    if len(equity):
+        returns = np.zeros(len(equity))
+        returns[1:] = equity[1:] / equity[:-1] - 1
+        running_max = np.maximum.accumulate(equity)
+        drawdown = equity / running_max - 1
+        max_drawdown = float(drawdown.min())
+        total_return = float(equity[-1] / equity[0] - 1)
+    else:
+        returns = drawdown = np.empty(0)
+        max_drawdown = total_return = None
+    std = float(returns.std(ddof=1)) if len(returns) > 1 else None
+    annualization = math.sqrt(periods_per_year)
+
+    for name in metrics:
+        if name == "total_return":
+            results[name] = total_return
+        elif name == "sharpe_ratio":
+            mean = float(returns.mean()) if len(returns) else 0.0
+            results[name] = None if std is None else _ratio(annualization * mean, std)
+        elif name == "sortino_ratio":
+            mean = float(returns.mean()) if len(returns) else 0.0
+            downside = float(np.sqrt(np.mean(np.minimum(returns, 0) ** 2))) if len(returns) else None
+            results[name] = _ratio(annualization * mean, downside)
+        elif name == "max_drawdown":
+            results[name] = max_drawdown
+        elif name == "max_drawdown_duration":
+            # Longest run of consecutive bars spent below the running peak
+            underwater = drawdown < 0
+            if underwater.any():
+                run_ids = np.cumsum(~underwater)
+                results[name] = int(np.bincount(run_ids[underwater]).max())
+            else:
+                results[name] = 0
+        elif name == "calmar_ratio":
+            first, last = (timestamps[0], timestamps[-1]) if timestamps is not None and len(timestamps) else (None, None)
+            cagr = _cagr(total_return, first, last) if total_return is not None else None
+            results[name] = None if cagr is None or not max_drawdown else _ratio(cagr, abs(max_drawdown))
+        elif name == "win_rate":
+            results[name] = float((profits > 0).mean()) if len(profits) else None
+        elif name == "profit_factor":
+            gross_loss = -profits[profits < 0].sum()
+            results[name] = _ratio(profits[profits > 0].sum(), gross_loss) if len(profits) else None
+        elif name == "expectancy":
+            results[name] = float(profits.mean()) if len(profits) else None
+        elif name == "weekday_stats":
+            weekdays = pd.DatetimeIndex(exit_dates if exit_dates is not None else []).weekday.to_numpy()
+            counts = np.bincount(weekdays, minlength=7)
+            totals = np.bincount(weekdays, weights=profits, minlength=7) if len(profits) else np.zeros(7)
+            results[name] = _weekday_stats(counts, totals)
+    return results
+
+
+def _weekday_stats(counts, totals) -> dict:
+    return {
+        day: {
+            "count": int(counts[i]),
+            "total": float(totals[i]),
+            "mean": float(totals[i] / counts[i]) if counts[i] else 0.0,
+        }
+        for i, day in enumerate(DAY_NAMES)
+    }
+
+
+class MetricsAccumulator:
+    """
+    Incremental counterpart of `compute_metrics`: feed it every bar's equity and every
+    closed trade as they happen and call `snapshot()` at any time (mid-run, or per
+    variant in a sweep) for the same metrics without keeping or rebuilding any frames.
+    """
+
+    def __init__(self, metrics=None, periods_per_year: int = 252):
+        self.metrics = _known_metrics(metrics)
+        self.periods_per_year = periods_per_year
+        # equity state
+        self.n_bars = 0
+        self.first_equity = None
+        self.last_equity = None
+        self.first_time = None
+        self.last_time = None
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+        self.downside_sq = 0.0
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.underwater_bars = 0
+        self.max_underwater_bars = 0
+        # trade state
+        self.n_trades = 0
+        self.wins = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.profit_sum = 0.0
+        self.weekday_counts = np.zeros(7, dtype=np.int64)
+        self.weekday_totals = np.zeros(7)
+
+    def update_equity(self, equity: float, timestamp=None) -> None:
+        if self.n_bars == 0:
+            self.first_equity = equity
+            self.first_time = timestamp
+            self.peak = equity
+            ret = 0.0
+        else:
+            ret = equity / self.last_equity - 1
+        self.last_equity = equity
+        self.last_time = timestamp
+        self.n_bars += 1
+
+        # Welford update of the return mean / variance
+        delta = ret - self.return_mean
+        self.return_mean += delta / self.n_bars
+        self.return_m2 += delta * (ret - self.return_mean)
+        if ret < 0:
+            self.downside_sq += ret * ret
+
+        if equity > self.peak:
+            self.peak = equity
+        drawdown = equity / self.peak - 1
+        if drawdown < self.max_drawdown:
+            self.max_drawdown = drawdown
+        if drawdown < 0:
+            self.underwater_bars += 1
+            self.max_underwater_bars = max(self.max_underwater_bars, self.underwater_bars)
+        else:
+            self.underwater_bars = 0
+
+    def update_trade(self, profit: float, exit_date=None) -> None:
+        self.n_trades += 1
+        self.profit_sum += profit
+        if profit > 0:
+            self.wins += 1
+            self.gross_profit += profit
+        elif profit < 0:
+            self.gross_loss -= profit
+        if exit_date is not None:
+            weekday = pd.Timestamp(exit_date).weekday()
+            self.weekday_counts[weekday] += 1
+            self.weekday_totals[weekday] += profit
+
+    def snapshot(self) -> dict:
+        annualization = math.sqrt(self.periods_per_year)
+        has_bars = self.n_bars > 0
+        total_return = float(self.last_equity / self.first_equity - 1) if has_bars else None
+        max_drawdown = float(self.max_drawdown) if has_bars else None
+        std = math.sqrt(self.return_m2 / (self.n_bars - 1)) if self.n_bars > 1 else None
+        results = {}
+        for name in self.metrics:
+            if name == "total_return":
+                results[name] = total_return
+            elif name == "sharpe_ratio":
+                results[name] = None if std is None else _ratio(annualization * self.return_mean, std)
+            elif name == "sortino_ratio":
+                downside = math.sqrt(self.downside_sq / self.n_bars) if has_bars else None
+                results[name] = _ratio(annualization * self.return_mean, downside)
+            elif name == "max_drawdown":
+                results[name] = max_drawdown
+            elif name == "max_drawdown_duration":
+                results[name] = self.max_underwater_bars
+            elif name == "calmar_ratio":
+                cagr = _cagr(total_return, self.first_time, self.last_time) if has_bars else None
+                results[name] = None if cagr is None or not max_drawdown else _ratio(cagr, abs(max_drawdown))
+            elif name == "win_rate":
+                results[name] = self.wins / self.n_trades if self.n_trades else None
+            elif name == "profit_factor":
+                results[name] = _ratio(self.gross_profit, self.gross_loss) if self.n_trades else None
+            elif name == "expectancy":
+                results[name] = self.profit_sum / self.n_trades if self.n_trades else None
+            elif name == "weekday_stats":
+                results[name] = _weekday_stats(self.weekday_counts, self.weekday_totals)
+        return results
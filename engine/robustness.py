@@ -0,0 +1,108 @@
+# engine/robustness.py
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Upper bound on the elements of one resample matrix; larger jobs are processed in blocks
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+
+def _paths_stats(pnl: np.ndarray, initial_capital: float) -> tuple:
+    """Final equity and max drawdown of every row of a (resamples x trades) PnL matrix"""
+    equity = initial_capital + np.cumsum(pnl, axis=1)
+    running_max = np.maximum(np.maximum.accumulate(equity, axis=1), initial_capital)
+    max_drawdown = np.minimum((equity / running_max - 1).min(axis=1), 0.0)
+    return equity[:, -1], max_drawdown
+
+
+def _sharpe_rows(returns: np.ndarray, periods_per_year: int) -> np.ndarray:
+    std = returns.std(axis=1, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = math.sqrt(periods_per_year) * returns.mean(axis=1) / std
+    return np.where(std > 0, sharpe, np.nan)
+
+
+def _blocks(n_resamples: int, row_length: int):
+    size = max(1, MAX_BLOCK_ELEMENTS // max(row_length, 1))
+    for start in range(0, n_resamples, size):
+        yield min(size, n_resamples - start)
+
+
+def simulate(profits, returns, initial_capital: float, n_resamples: int, seed=None,
+             periods_per_year: int = 252) -> dict:
+    """
+    Raw samples of the three resampling schemes, each drawn as 2-D index matrices:
+      - trade bootstrap: trades drawn with replacement -> final equity, max drawdown
+      - trade permutation: trade order shuffled -> max drawdown (final equity is fixed)
+      - return bootstrap: per-bar equity returns drawn with replacement -> Sharpe ratio
+    """
+    rng = np.random.default_rng(seed)
+    profits = np.asarray(profits, dtype=float)
+    returns = np.asarray(returns, dtype=float)
+    n_trades, n_returns = len(profits), len(returns)
+    samples = {name: [] for name in ("bootstrap_final_equity", "bootstrap_max_drawdown",
+                                     "permutation_max_drawdown", "bootstrap_sharpe_ratio")}
+    if n_trades:
+        for block in _blocks(n_resamples, n_trades):
+            final_equity, max_drawdown = _paths_stats(
+                profits[rng.integers(0, n_trades, size=(block, n_trades))], initial_capital)
+            samples["bootstrap_final_equity"].append(final_equity)
+            samples["bootstrap_max_drawdown"].append(max_drawdown)
+            # argsort of uniform noise gives an independent permutation per row
+            order = np.argsort(rng.random((block, n_trades)), axis=1)
+            samples["permutation_max_drawdown"].append(_paths_stats(profits[order], initial_capital)[1])
+    if n_returns > 1:
+        for block in _blocks(n_resamples, n_returns):
+            resampled = returns[rng.integers(0, n_returns, size=(block, n_returns))]
+            samples["bootstrap_sharpe_ratio"].append(_sharpe_rows(resampled, periods_per_year))
+    return {name: np.concatenate(parts) if parts else np.empty(0) for name, parts in samples.items()}
+
+
+def _interval(values: np.ndarray, confidence: float) -> dict:
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {"mean": None, "lower": None, "median": None, "upper": None}
+    tail = (1 - confidence) / 2 * 100
+    lower, median, upper = np.percentile(values, [tail, 50, 100 - tail])
+    return {"mean": float(values.mean()), "lower": float(lower), "median": float(median), "upper": float(upper)}
+
+
+def robustness_report(profits, equity, initial_capital: float, n_resamples: int = 10_000,
+                      confidence: float = 0.95, seed=None, n_jobs: int = 1,
+                      periods_per_year: int = 252) -> dict:
+    """
+    Confidence intervals for final equity, max drawdown and Sharpe ratio from bootstrap
+    resamples and trade-order permutations of a run's trade PnL and equity returns.
+
+    Parameters:
+      - profits: PnL per closed trade, in order.
+      - equity: equity value per bar (returns are taken from it).
+      - n_jobs: processes to split the resamples across (-1: all CPUs); each gets an
+        independent child seed, so results are reproducible for a given `seed` and `n_jobs`.
+    """
+    equity = np.asarray(equity, dtype=float)
+    returns = equity[1:] / equity[:-1] - 1 if len(equity) > 1 else np.empty(0)
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    shares = [n_resamples // n_jobs + (i < n_resamples % n_jobs) for i in range(n_jobs)]
+
+    if n_jobs == 1:
+        parts = [simulate(profits, returns, initial_capital, n_resamples, seeds[0], periods_per_year)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            parts = list(executor.map(simulate, [profits] * n_jobs, [returns] * n_jobs,
+                                      [initial_capital] * n_jobs, shares, seeds, [periods_per_year] * n_jobs))
+    samples = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    return {
+        "n_resamples": n_resamples,
+        "confidence": confidence,
+        "n_trades": len(profits),
+        "final_equity": _interval(samples["bootstrap_final_equity"], confidence),
+        "max_drawdown": _interval(samples["bootstrap_max_drawdown"], confidence),
+        "max_drawdown_permuted": _interval(samples["permutation_max_drawdown"], confidence),
+        "sharpe_ratio": _interval(samples["bootstrap_sharpe_ratio"], confidence),
+    }
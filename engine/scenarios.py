@@ -0,0 +1,170 @@
+# engine/scenarios.py
+
+import itertools
+import logging
+
+import numpy as np
+import pandas as pd
+
+from engine.greeks import MIN_VOL, bs_price, implied_volatility, time_to_expiry
+from utils.helpers import get_next_weekly_expiry, get_strike_price
+
+SCENARIO_FIELDS = ("spot_shock", "iv_shift", "days_forward", "path_vol_scale")
+# Default stress grid: +-10% spot gaps, -10..+20 vol points, up to 3 days of decay
+DEFAULT_GRID = {
+    "spot_shock": (-0.10, -0.05, -0.03, -0.02, -0.01, 0.0, 0.01, 0.02, 0.03, 0.05, 0.10),
+    "iv_shift": (-0.10, -0.05, 0.0, 0.05, 0.10, 0.20),
+    "days_forward": (0, 1, 3),
+    "path_vol_scale": (1.0,),
+}
+# Keeps the broadcast (scenarios x paths x legs) arrays within a few hundred MB
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+logger = logging.getLogger(__name__)
+
+
+def scenario_grid(**axes) -> pd.DataFrame:
+    """
+    One row per combination of the given shock values (missing axes take DEFAULT_GRID):
+      - spot_shock: relative gap of the underlying (-0.05: 5% gap down).
+      - iv_shift: added to every leg's implied volatility (0.05: +5 vol points).
+      - days_forward: calendar days of time decay before repricing.
+      - path_vol_scale: multiplier on the intraday path perturbations (0: none).
+    """
+    values = [axes.get(field, DEFAULT_GRID[field]) for field in SCENARIO_FIELDS]
+    return pd.DataFrame(list(itertools.product(*values)), columns=list(SCENARIO_FIELDS))
+
+
+def _legs(position: list, strikes, is_call, units, entry_prices, spots, t, iv) -> dict:
+    return {
+        "position": np.asarray(position, dtype=int),
+        "strike": np.asarray(strikes, dtype=float),
+        "is_call": np.asarray(is_call, dtype=bool),
+        "units": np.asarray(units, dtype=float),  # signed: + bought, - sold
+        "entry_price": np.asarray(entry_prices, dtype=float),
+        "spot": np.asarray(spots, dtype=float),
+        "t": np.asarray(t, dtype=float),
+        "iv": np.asarray(iv, dtype=float),
+    }
+
+
+def positions_from_trades(engine, rate: float = 0.0) -> dict:
+    """
+    Legs of every trade of a finished BacktestEngine run as stress-test positions, each at
+    its entry: entry spot and option prices, expiry from the engine's calendar and the IV
+    implied by the entry price. Positions are numbered by trade id. A trade with any leg
+    lacking an entry price or IV is left out whole (its PnL stays 0): stressing the rest
+    of a spread would stress a different position.
+    """
+    trades = engine.trades.to_frame()
+    legs = engine.trades.legs_frame()
+    underlying = engine.config["underlying_asset"]
+    quantities = [leg.quantity for leg in engine.strategy.option_legs]
+    expiries = []
+    for entry in trades["entry_date"]:
+        if underlying.get("option_expiry", "").upper() == "WEEKLY":
+            expiries.append(get_next_weekly_expiry(entry, underlying.get("expiry_day", "THU"), engine._trading_days))
+        else:
+            expiries.append(engine.config["backtest_settings"].get("expiry_date", ""))
+
+    trade_ids = legs["trade_id"].to_numpy()
+    leg_numbers = legs.groupby("trade_id").cumcount().to_numpy()
+    spots = trades["entry_underlying_price"].to_numpy()[trade_ids]
+    t = np.array([time_to_expiry(trades["entry_date"].iat[i], expiries[i]) for i in trade_ids])
+    is_call = legs["leg_type"].str.upper().to_numpy() == "CE"
+    sign = np.where(legs["action"].str.lower().to_numpy() == "buy", 1.0, -1.0)
+    units = sign * engine.lot_size * np.array([quantities[n] if n < len(quantities) else 1 for n in leg_numbers])
+    entry_prices = legs["entry_option_price"].to_numpy(dtype=float)
+    strikes = legs["strike"].to_numpy(dtype=float)
+    iv = implied_volatility(entry_prices, spots, strikes, t, rate, is_call)
+    incomplete = np.unique(trade_ids[~np.isfinite(iv)])
+    if len(incomplete):
+        logger.warning(f"Left out of the stress test, legs without an implied volatility: trades {incomplete.tolist()}")
+    keep = ~np.isin(trade_ids, incomplete)
+    return _legs(trade_ids[keep], strikes[keep], is_call[keep], units[keep], entry_prices[keep],
+                 spots[keep], t[keep], iv[keep])
+
+
+def position_from_strategy(strategy, config: dict, spot: float, timestamp, expiry_date: str, iv: float,
+                           rate: float = 0.0) -> dict:
+    """
+    A position opened now with the legs of an OptionStrategy (create_strategy_from_config):
+    strikes from get_strike_price around `spot`, every leg priced with Black-Scholes at `iv`.
+    """
+    multiplier = config["underlying_asset"].get("multiplier", 50)
+    lot_size = config["underlying_asset"].get("lot_size", 75)
+    legs = strategy.option_legs
+    strikes = [get_strike_price(leg, spot, multiplier) for leg in legs]
+    is_call = [leg.option_type.upper() == "CE" for leg in legs]
+    t = time_to_expiry(timestamp, expiry_date)
+    entry_prices = bs_price(spot, np.asarray(strikes, dtype=float), t, rate, iv, np.asarray(is_call))
+    units = [(1.0 if leg.action == "buy" else -1.0) * lot_size * leg.quantity for leg in legs]
+    return _legs([0] * len(legs), strikes, is_call, units, entry_prices, [spot] * len(legs),
+                 [t] * len(legs), [iv] * len(legs))
+
+
+def path_shocks(n_paths: int, path_returns=None, path_bars: int = 75, bar_vol: float = 0.001, seed=None) -> np.ndarray:
+    """
+    Log return of `n_paths` intraday paths of `path_bars` bars each: bootstrapped from
+    historical bar returns `path_returns` when given, Gaussian with `bar_vol` per bar otherwise.
+    """
+    rng = np.random.default_rng(seed)
+    if path_returns is not None and len(path_returns):
+        path_returns = np.asarray(path_returns, dtype=float)
+        return path_returns[rng.integers(0, len(path_returns), size=(n_paths, path_bars))].sum(axis=1)
+    return rng.normal(0.0, bar_vol, size=(n_paths, path_bars)).sum(axis=1)
+
+
+def reprice(legs: dict, scenarios: pd.DataFrame, paths: np.ndarray, rate: float = 0.0) -> np.ndarray:
+    """
+    PnL of every leg under every (scenario, path): a (scenarios x paths x legs) array from
+    one broadcast Black-Scholes evaluation. Legs at or past expiry are worth their intrinsic value.
+    """
+    spot_shock, iv_shift, days_forward, vol_scale = (scenarios[field].to_numpy(dtype=float)[:, None, None]
+                                                     for field in SCENARIO_FIELDS)
+    spot = legs["spot"] * (1.0 + spot_shock) * np.exp(vol_scale * paths[None, :, None])
+    sigma = np.maximum(legs["iv"] + iv_shift, MIN_VOL)
+    t = legs["t"] - days_forward / 365.0
+    live = t > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price = bs_price(spot, legs["strike"], np.where(live, t, 1.0), rate, sigma, legs["is_call"])
+    intrinsic = np.where(legs["is_call"], np.maximum(spot - legs["strike"], 0.0), np.maximum(legs["strike"] - spot, 0.0))
+    price = np.where(live, price, intrinsic)
+    return (price - legs["entry_price"]) * legs["units"]
+
+
+def stress_test(legs: dict, scenarios: pd.DataFrame = None, n_paths: int = 200, path_returns=None,
+                path_bars: int = 75, rate: float = 0.0, seed=None) -> dict:
+    """
+    Reprices all legs of all positions under every scenario and intraday path, and
+    summarizes the book's PnL distribution (over the paths) per scenario.
+
+    Each path moves the shocked spot by its total log return before repricing; PnL is
+    against each leg's entry price.
+
+    Returns:
+      - "summary": the scenarios with mean / std / 5% / median / 95% / min / max PnL and
+        the probability of a loss.
+      - "pnl": (scenarios x paths x positions) PnL array.
+    """
+    scenarios = scenario_grid() if scenarios is None else scenarios.reset_index(drop=True)
+    paths = path_shocks(n_paths, path_returns, path_bars, seed=seed) if n_paths else np.zeros(1)
+    n_positions = int(legs["position"].max()) + 1 if len(legs["position"]) else 0
+    # Legs -> positions: the sum over each position's legs as a matrix product
+    membership = np.zeros((len(legs["position"]), n_positions))
+    membership[np.arange(len(legs["position"])), legs["position"]] = 1.0
+
+    pnl = np.empty((len(scenarios), len(paths), n_positions))
+    block = max(1, MAX_BLOCK_ELEMENTS // max(len(paths) * len(legs["position"]), 1))
+    for start in range(0, len(scenarios), block):
+        rows = scenarios.iloc[start:start + block]
+        pnl[start:start + len(rows)] = reprice(legs, rows, paths, rate) @ membership
+
+    book = pnl.sum(axis=2)
+    percentiles = np.percentile(book, [5, 50, 95], axis=1)
+    summary = scenarios.assign(
+        mean_pnl=book.mean(axis=1), std_pnl=book.std(axis=1),
+        p5_pnl=percentiles[0], median_pnl=percentiles[1], p95_pnl=percentiles[2],
+        min_pnl=book.min(axis=1), max_pnl=book.max(axis=1), prob_loss=(book < 0).mean(axis=1),
+    )
+    return {"summary": summary, "pnl": pnl}
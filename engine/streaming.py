@@ -0,0 +1,132 @@
+# engine/streaming.py
+
+import numpy as np
+import pandas as pd
+
+from engine.backtest_engine import BacktestEngine
+from utils.data_cleaning import prepare_underlying_data
+
+
+def day_bounds(day) -> tuple:
+    """Epoch seconds of the first and last second of an IST calendar day"""
+    start = int(pd.Timestamp(day).tz_localize("Asia/Kolkata").timestamp())
+    return start, start + 86400 - 1
+
+
+def load_day(accessor, symbol: str, day, resolution=None) -> pd.DataFrame:
+    """Cleaned underlying bars of one IST calendar day (empty on non-trading days)"""
+    df = accessor.get_equity_data_by_date(symbol, *day_bounds(day), resolution)
+    if df.empty:
+        return pd.DataFrame({"Price": []}, index=pd.DatetimeIndex([], name="DateTime"))
+    return prepare_underlying_data(df)
+
+
+def iter_underlying_days(accessor, symbol: str, start_date, end_date, resolution=None):
+    """(date, bars) for every day from start_date to end_date with data, read one day at a time"""
+    for day in pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), freq="D"):
+        frame = load_day(accessor, symbol, day, resolution)
+        if not frame.empty:
+            yield day.date(), frame
+
+
+class StreamingCalendar:
+    """
+    Set-like view of a symbol's trading days for expiry lookups (see get_next_weekly_expiry).
+    Days delivered by the stream are known; any other day is checked with a one-day read,
+    once, so the full calendar is never loaded.
+    """
+
+    def __init__(self, accessor, symbol: str, resolution=None):
+        self.accessor = accessor
+        self.symbol = symbol
+        self.resolution = resolution
+        self._known = {}
+
+    def add(self, day) -> None:
+        self._known[day] = True
+
+    def __contains__(self, day) -> bool:
+        if day not in self._known:
+            self._known[day] = not load_day(self.accessor, self.symbol, day, self.resolution).empty
+        return self._known[day]
+
+
+class StreamingBacktestEngine(BacktestEngine):
+    """
+    BacktestEngine that pulls the underlying from the accessor one day at a time instead of
+    taking the whole history up front. Besides the current day only the last
+    `history_bars` bars the conditions declare (Condition.history_bars) are kept, so input
+    memory is bounded by one day plus that lookback whatever the date range; the outputs
+    (equity and price per bar, trades) grow with the run as usual. Results match
+    BacktestEngine over the same range. `days` may supply the (date, bars) chunks directly.
+    """
+
+    INITIAL_CAPACITY = 4096
+    # Future bars are not loaded yet, so stops and targets are checked bar by bar
+    vectorized_exits = False
+
+    def __init__(self, strategy, accessor, config: dict, benchmark_data: pd.DataFrame = None, days=None):
+        empty = pd.DataFrame({"Price": []}, index=pd.DatetimeIndex([], name="DateTime"))
+        super().__init__(empty, strategy, accessor, config, benchmark_data=benchmark_data)
+        self.symbol = config["underlying_asset"]["symbol"]
+        self.start_date = pd.to_datetime(config["backtest_settings"]["start_date"])
+        self.end_date = pd.to_datetime(config["backtest_settings"]["end_date"])
+        self.days = days
+        self.history_bars = max((condition.history_bars for condition in self._conditions()), default=0)
+        self._trading_days = StreamingCalendar(accessor, self.symbol, self.resolution)
+        # Per-bar outputs, doubled when full
+        self._equity = np.full(self.INITIAL_CAPACITY, np.nan)
+        self._times = np.empty(self.INITIAL_CAPACITY, dtype="datetime64[ns]")
+        self._prices = np.full(self.INITIAL_CAPACITY, np.nan)
+        self._n_days = len(pd.date_range(self.start_date.normalize(), self.end_date.normalize(), freq="D"))
+        self._days_done = 0
+
+    def run_backtest(self, checkpoint_path: str = None):
+        if checkpoint_path:
+            raise ValueError("Checkpoints need the full underlying data; use BacktestEngine")
+        self._start_run()
+        self._days_done = 0
+        days = self.days if self.days is not None else iter_underlying_days(
+            self.accessor, self.symbol, self.start_date, self.end_date, self.resolution)
+        history = self.underlying_data.iloc[0:0]
+        for day, frame in days:
+            self._trading_days.add(day)
+            frame = frame.loc[(frame.index >= self.start_date) & (frame.index <= self.end_date)]
+            # Conditions see the declared lookback from earlier days plus today's bars
+            self.underlying_data = pd.concat([history, frame]) if len(history) else frame
+            for timestamp, row in frame.iterrows():
+                self._process_bar(timestamp, row)
+            history = self.underlying_data.iloc[len(self.underlying_data) - self.history_bars:] \
+                if self.history_bars else frame.iloc[0:0]
+            self._days_done += 1
+        self._days_done = self._n_days
+        # Afterwards `underlying_data` is the recorded per-bar price, for charts and reports
+        self.underlying_data = pd.DataFrame({"Price": self._prices[:self._n_bars]},
+                                            index=pd.DatetimeIndex(self._times[:self._n_bars], name="DateTime"))
+        return self.trades
+
+    def _process_bar(self, timestamp, row):
+        super()._process_bar(timestamp, row)
+        self._prices[self._n_bars - 1] = row["Price"]
+
+    def _record_equity(self, equity: float, timestamp) -> None:
+        if self._n_bars == len(self._equity):
+            capacity = 2 * len(self._equity)
+            for name, fill in (("_equity", np.nan), ("_times", None), ("_prices", np.nan)):
+                old = getattr(self, name)
+                grown = np.empty(capacity, dtype=old.dtype) if fill is None else np.full(capacity, fill)
+                grown[:len(old)] = old
+                setattr(self, name, grown)
+        self._times[self._n_bars] = pd.Timestamp(timestamp).to_datetime64()
+        super()._record_equity(equity, timestamp)
+
+    @property
+    def progress(self) -> float:
+        return self._days_done / self._n_days if self._n_days else 1.0
+
+    @property
+    def equity_curve(self) -> pd.Series:
+        values = self._equity[:self._n_bars]
+        values.flags.writeable = False
+        return pd.Series(values, index=pd.DatetimeIndex(self._times[:self._n_bars], name="date"),
+                         name="equity", copy=False)
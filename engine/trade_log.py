@@ -0,0 +1,195 @@
+# engine/trade_log.py
+
+import json
+
+import numpy as np
+import pandas as pd
+
+
+class TradeLog:
+    """
+    Columnar record of closed trades.
+
+    Each trade field lives in its own preallocated NumPy array that doubles in size when
+    full, and option legs are kept in a separate table keyed by trade id. `to_frame` and
+    `legs_frame` wrap the filled part of the arrays without copying, and `to_json_bytes`
+    serializes straight from the arrays instead of going through per-trade dicts.
+    """
+
+    TRADE_FIELDS = {
+        "entry_date": "datetime64[ns]",
+        "exit_date": "datetime64[ns]",
+        "entry_underlying_price": "float64",
+        "exit_underlying_price": "float64",
+        "profit": "float64",
+    }
+    LEG_FIELDS = {
+        "trade_id": "int64",
+        "leg_type": object,
+        "action": object,
+        "strike": "float64",
+        "entry_option_price": "float64",
+        "exit_option_price": "float64",
+        "pnl": "float64",
+    }
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(int(capacity), 1)
+        self._trades = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.TRADE_FIELDS.items()}
+        self._legs = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.LEG_FIELDS.items()}
+        self._n_trades = 0
+        self._n_legs = 0
+
+    @staticmethod
+    def _grow(arrays: dict, needed: int) -> None:
+        capacity = len(next(iter(arrays.values())))
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, arr in arrays.items():
+            grown = np.empty(capacity, dtype=arr.dtype)
+            grown[:len(arr)] = arr
+            arrays[name] = grown
+
+    def append(self, entry_date, exit_date, entry_underlying_price, exit_underlying_price, profit, legs=()) -> int:
+        """Record a closed trade and its leg dicts (keys of LEG_FIELDS minus trade_id). Returns the trade id."""
+        trade_id = self._n_trades
+        self._grow(self._trades, trade_id + 1)
+        self._trades["entry_date"][trade_id] = pd.Timestamp(entry_date).to_datetime64()
+        self._trades["exit_date"][trade_id] = pd.Timestamp(exit_date).to_datetime64()
+        self._trades["entry_underlying_price"][trade_id] = entry_underlying_price
+        self._trades["exit_underlying_price"][trade_id] = exit_underlying_price
+        self._trades["profit"][trade_id] = profit
+        self._n_trades += 1
+
+        legs = list(legs)
+        self._grow(self._legs, self._n_legs + len(legs))
+        for leg in legs:
+            i = self._n_legs
+            self._legs["trade_id"][i] = trade_id
+            for name in self.LEG_FIELDS:
+                if name != "trade_id":
+                    value = leg.get(name)
+                    self._legs[name][i] = np.nan if value is None and self._legs[name].dtype != object else value
+            self._n_legs += 1
+        return trade_id
+
+    def __len__(self) -> int:
+        return self._n_trades
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one trade field over the recorded trades"""
+        view = self._trades[name][:self._n_trades]
+        view.flags.writeable = False
+        return view
+
+    def leg_column(self, name: str) -> np.ndarray:
+        """Read-only view of one leg field over the recorded legs"""
+        view = self._legs[name][:self._n_legs]
+        view.flags.writeable = False
+        return view
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per trade, backed by the trade arrays (no copy)"""
+        return pd.DataFrame({name: self.column(name) for name in self.TRADE_FIELDS}, copy=False)
+
+    def snapshot(self) -> pd.DataFrame:
+        """
+        Copy of `to_frame` that is safe to take while another thread appends: the trade
+        count is read once, so every column is cut at the same row.
+        """
+        n = self._n_trades
+        return pd.DataFrame({name: self._trades[name][:n].copy() for name in self.TRADE_FIELDS})
+
+    def legs_frame(self) -> pd.DataFrame:
+        """One row per leg with its trade_id, backed by the leg arrays (no copy)"""
+        return pd.DataFrame({name: self.leg_column(name) for name in self.LEG_FIELDS}, copy=False)
+
+    def _leg_bounds(self) -> np.ndarray:
+        # Legs are appended in trade order, so each trade's legs are one contiguous slice
+        return np.searchsorted(self.leg_column("trade_id"), np.arange(self._n_trades + 1))
+
+    def to_records(self) -> list:
+        """Trades as the nested dicts the engine used to keep (legs inline), for display and compatibility"""
+        dates = {name: pd.DatetimeIndex(self.column(name)) for name in ("entry_date", "exit_date")}
+        trade_values = {name: self.column(name).tolist() for name in self.TRADE_FIELDS if name not in dates}
+        leg_values = {name: self.leg_column(name).tolist() for name in self.LEG_FIELDS if name != "trade_id"}
+        bounds = self._leg_bounds()
+        records = []
+        for i in range(self._n_trades):
+            records.append({
+                "entry_date": dates["entry_date"][i],
+                "exit_date": dates["exit_date"][i],
+                "entry_underlying_price": trade_values["entry_underlying_price"][i],
+                "exit_underlying_price": trade_values["exit_underlying_price"][i],
+                "profit": trade_values["profit"][i],
+                "legs": [{name: values[j] for name, values in leg_values.items()}
+                         for j in range(bounds[i], bounds[i + 1])],
+            })
+        return records
+
+    def __iter__(self):
+        return iter(self.to_records())
+
+    @staticmethod
+    def _encode_json(values: np.ndarray) -> list:
+        """JSON literal for every element; float columns are formatted in bulk and NaN/inf become null"""
+        if values.dtype.kind == "f":
+            if not len(values):
+                return []
+            # One C-level dumps of the whole column, split back into per-element literals
+            literals = json.dumps(values.tolist()).removeprefix("[").removesuffix("]").split(", ")
+            if not np.isfinite(values).all():
+                literals = ["null" if literal in ("NaN", "Infinity", "-Infinity") else literal for literal in literals]
+            return literals
+        # Leg labels repeat heavily, so encode each distinct value once
+        encoded = {}
+        return [encoded[v] if v in encoded else encoded.setdefault(v, json.dumps(v)) for v in values.tolist()]
+
+    def to_json_bytes(self) -> bytes:
+        """
+        UTF-8 JSON array of trades with nested legs, same layout as `to_records`, with
+        ISO-8601 dates. Columns are formatted in bulk and the output is assembled from
+        per-trade string fragments instead of encoding a dict per trade.
+        """
+        dates = {name: np.datetime_as_string(self.column(name), unit="s") for name in ("entry_date", "exit_date")}
+        trade_values = {name: self._encode_json(self.column(name)) for name in self.TRADE_FIELDS if name not in dates}
+        leg_names = [name for name in self.LEG_FIELDS if name != "trade_id"]
+        template = "{{" + ",".join(f"{json.dumps(name)}:{{}}" for name in leg_names) + "}}"
+        leg_strings = [template.format(*values)
+                       for values in zip(*(self._encode_json(self.leg_column(name)) for name in leg_names))]
+        bounds = self._leg_bounds()
+        parts = []
+        for i in range(self._n_trades):
+            parts.append(
+                f'{{"entry_date":"{dates["entry_date"][i]}","exit_date":"{dates["exit_date"][i]}",'
+                f'"entry_underlying_price":{trade_values["entry_underlying_price"][i]},'
+                f'"exit_underlying_price":{trade_values["exit_underlying_price"][i]},'
+                f'"profit":{trade_values["profit"][i]},'
+                f'"legs":[{",".join(leg_strings[bounds[i]:bounds[i + 1]])}]}}'
+            )
+        return ("[" + ",".join(parts) + "]").encode("utf-8")
+
+    def to_arrow(self):
+        """
+        pyarrow Table with one row per trade and the legs as a list<struct> column,
+        built from the arrays and leg offsets. Requires the optional `pyarrow` package.
+        """
+        import pyarrow as pa
+        legs = pa.StructArray.from_arrays(
+            [pa.array(self.leg_column(name)) for name in self.LEG_FIELDS if name != "trade_id"],
+            names=[name for name in self.LEG_FIELDS if name != "trade_id"],
+        )
+        columns = {name: self.column(name) for name in self.TRADE_FIELDS}
+        columns["legs"] = pa.ListArray.from_arrays(pa.array(self._leg_bounds(), type=pa.int32()), legs)
+        return pa.table(columns)
+
+    def to_arrow_bytes(self) -> bytes:
+        """Arrow IPC stream of `to_arrow`"""
+        import pyarrow as pa
+        table = self.to_arrow()
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
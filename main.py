@@ -1,17 +1,20 @@
 # main.py
 
 import os
+import sys
+
 import pandas as pd
 from config.config_parser import get_strategy_config, update_underlying_asset_config
-from utils.data_cleaning import clean_underlying_data
+from utils.data_cleaning import prepare_underlying_data
 from engine.backtest_engine import BacktestEngine
 from strategies.strategy import OptionStrategy, OptionLeg
 from conditions.time_conditions import EntryTimeCondition, EntryDateCondition
 from conditions.technical_conditions import MovingAverageCondition, StopLossCondition, VIXCondition, \
     TakeProfitCondition, TrailingStoplossCondition
-# Import your data access layer (using your existing panda.py)
-from data.panda import PandaAccessor
-from data.constants import OPTION_DB_PATH, OUTPUT_PATH
+# Import your data access layer (memory -> columnar cache -> SQLite -> remote)
+from data.tiered_accessor import create_default_accessor
+from data.constants import OUTPUT_PATH
+from data.bars import parse_frequency
 
 
 def create_strategy_from_config(config: dict) -> OptionStrategy:
@@ -47,11 +50,16 @@ def create_strategy_from_config(config: dict) -> OptionStrategy:
         strategy.add_exit_condition(EntryTimeCondition(exit_conf["time_exit"]))
     if "stoploss" in exit_conf:
         sl = exit_conf["stoploss"]
-        if "%" in sl:
+        if isinstance(sl, dict):
+            # e.g. {"account_stop_loss_pct": "2%", "absolute_stop_loss": "1000"}
+            strategy.add_exit_condition(StopLossCondition(**{
+                key: float(str(value).replace("%", "")) / 100.0 if "%" in str(value) else float(value)
+                for key, value in sl.items()}))
+        elif "%" in sl:
             pct = float(sl.replace("%", "")) / 100.0
-            strategy.add_exit_condition(StopLossCondition(stoploss_pct=pct))
+            strategy.add_exit_condition(StopLossCondition(account_stop_loss_pct=pct))
         else:
-            strategy.add_exit_condition(StopLossCondition(stoploss_abs=float(sl)))
+            strategy.add_exit_condition(StopLossCondition(absolute_stop_loss=float(sl)))
     if "take_profit" in exit_conf:
         tp = exit_conf["take_profit"]
         if "%" in tp:
@@ -76,33 +84,30 @@ def create_strategy_from_config(config: dict) -> OptionStrategy:
     return strategy
 
 
-def main():
-    accessor = PandaAccessor(OPTION_DB_PATH)
+def load_underlying(accessor, symbol: str, resolution=None) -> pd.DataFrame:
+    """Cleaned underlying bars of `symbol`, indexed by naive IST timestamps (empty if none)"""
+    underlying_df = accessor.get_equity_data(symbol, resolution)
+    return prepare_underlying_data(underlying_df) if not underlying_df.empty else underlying_df
+
+
+def save_results(engine: BacktestEngine, output_path: str = OUTPUT_PATH) -> None:
+    os.makedirs(output_path, exist_ok=True)
+    engine.equity_curve.to_csv(os.path.join(output_path, "equity_curve.csv"))
+    engine.trades.to_frame().to_csv(os.path.join(output_path, "trades.csv"), index_label="trade_id")
+    engine.trades.legs_frame().to_csv(os.path.join(output_path, "trade_legs.csv"), index=False)
+
+
+def main(plot: bool = True):
+    accessor = create_default_accessor()
 
     config = get_strategy_config()
     config = update_underlying_asset_config(config)
     bs = config["backtest_settings"]
     symbol = config["underlying_asset"]["symbol"]
-    start_date = bs["start_date"]
-    end_date = bs["end_date"]
+    resolution = parse_frequency(bs.get("data_frequency"))
 
     try:
-        #TODO: Fetch underlying data from your data source
-        # read_file = "./data/stocks/" + symbol+'.csv'
-        underlying_df = accessor.get_equity_data(symbol)
-        underlying_df = underlying_df.rename(columns={'timestamp': 'DateTime', 'price': 'Price', 'symbol': 'Symbol'})
-        underlying_df["DateTime"] = pd.to_datetime(underlying_df["DateTime"], unit='s', utc=True).dt.tz_convert('Asia/Kolkata').dt.tz_localize(None)
-        # underlying_df = underlying_df[underlying_df['DateTime'].between(start_date, end_date)]
-        # underlying_df['Symbol'] = symbol
-        # underlying_df = accessor._query(
-        #     """
-        #     SELECT Symbol, DateTime, Price
-        #     FROM EquityTick
-        #     WHERE Symbol = ? AND DateTime BETWEEN ? AND ?
-        #     ORDER BY DateTime;
-        #     """,
-        #     params=(symbol, start_date, end_date)
-        # )
+        underlying_df = load_underlying(accessor, symbol, resolution)
     except Exception as e:
         print(f"Error fetching underlying data: {e}")
         return
@@ -111,8 +116,6 @@ def main():
         print("No underlying data fetched.")
         return
 
-    underlying_df = clean_underlying_data(underlying_df, time_col="DateTime", price_col="Price")
-
     # (Optional) Fetch benchmark data similarly if available.
     benchmark_df = None
 
@@ -123,21 +126,21 @@ def main():
     metrics = engine.performance_metrics()
 
     print("Performance Metrics:", metrics)
+    n_resamples = config.get("reporting", {}).get("robustness_resamples", 0)
+    if n_resamples:
+        print("Robustness:", engine.robustness_report(n_resamples=n_resamples))
     print("Trades executed:")
     for t in trades:
         print(t)
 
-    engine.plot_results()
+    if plot:
+        engine.plot_results()
 
     log_conf = config.get("logging", {})
     if log_conf.get("save_results", False):
-        output_path = OUTPUT_PATH
-        if not os.path.exists(output_path):
-            os.makedirs(output_path)
-        engine.equity_curve.to_csv(os.path.join(output_path, "equity_curve.csv"))
-        trades_df = pd.DataFrame(trades)
-        trades_df.to_csv(os.path.join(output_path, "trades.csv"), index=False)
+        save_results(engine)
 
 
 if __name__ == "__main__":
-    main()
+    # For headless runs, config files, sweeps and benchmarks use cli.py
+    main(plot="--no-plot" not in sys.argv[1:])
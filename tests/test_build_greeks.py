@@ -0,0 +1,49 @@
+# tests/test_build_greeks.py
+import sqlite3
+
+import pytest
+
+import build_greeks
+
+START = 1654140600  # 2022-06-02 09:00 IST
+EXPIRY = 1654732800
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "options.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE EquityTick(Symbol text, DateTime int, Price real);
+        CREATE TABLE OptionsContract(Id integer primary key, ExpiryDate int, Type text, StrikePrice real, Symbol text);
+        CREATE TABLE OptionsTick(ContractId int, DateTime int, Open real, High real, Low real, Close real, Volume int, OI int);
+    """)
+    conn.executemany("INSERT INTO OptionsContract VALUES (?, ?, ?, ?, ?)",
+                     [(1, EXPIRY, "CE", 16000.0, "NIFTY"), (2, EXPIRY, "PE", 16000.0, "NIFTY"),
+                      (3, EXPIRY, "CE", 16100.0, "NIFTY")])
+    conn.executemany("INSERT INTO OptionsTick VALUES (?, ?, 0, 0, 0, ?, 0, 0)",
+                     [(contract, START + 60 * i, 150.0 + i) for contract in (1, 2, 3) for i in range(30)
+                      if contract != 1 or i < 20])
+    conn.executemany("INSERT INTO EquityTick VALUES ('NIFTY', ?, ?)", [(START + 60 * i, 16000.0) for i in range(30)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def greeks_count(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT ContractId, COUNT(*) FROM OptionsGreeks GROUP BY ContractId").fetchall())
+
+
+def test_incremental_build_resumes_each_contract_from_its_own_watermark(db_path, monkeypatch):
+    monkeypatch.setattr(build_greeks, "CONTRACTS_PER_TASK", 1)
+    build_greeks.build_greeks(db_path, workers=1)
+    assert greeks_count(db_path) == {1: 20, 2: 30, 3: 30}
+
+    with sqlite3.connect(db_path) as conn:
+        # Contract 2's task never finished; contract 1's late ticks are older than contract 3's newest greeks
+        conn.execute("DELETE FROM OptionsGreeks WHERE ContractId = 2")
+        conn.executemany("INSERT INTO OptionsTick VALUES (1, ?, 0, 0, 0, 170.0, 0, 0)",
+                         [(START + 60 * i,) for i in range(20, 25)])
+    build_greeks.build_greeks(db_path, workers=1)
+    assert greeks_count(db_path) == {1: 25, 2: 30, 3: 30}
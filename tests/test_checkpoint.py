@@ -0,0 +1,80 @@
+# tests/test_checkpoint.py
+import copy
+
+import numpy as np
+import pandas as pd
+
+from engine.backtest_engine import BacktestEngine
+from main import create_strategy_from_config
+from utils.data_cleaning import prepare_underlying_data
+
+IST_OFFSET = pd.Timedelta(hours=5, minutes=30)
+DAY = pd.Timestamp("2022-06-01")
+STRIKE = 34500.0
+
+CONFIG = {
+    "underlying_asset": {"symbol": "BANKNIFTY", "option_expiry": "WEEKLY", "expiry_day": "THU",
+                         "lot_size": 25, "multiplier": 100},
+    "legs": [{"type": "CE", "action": "BUY", "strike_selection": {"method": "ATM"}, "lots": 1}],
+    "entry_conditions": {"time": "9:45"},
+    "exit_conditions": {"time_exit": "14:45"},
+    "backtest_settings": {"capital": "100000", "data_frequency": "intraday",
+                          "start_date": "2022-06-01", "end_date": "2022-06-01 23:59"},
+}
+
+
+def epochs(start: str, end: str) -> np.ndarray:
+    """Epoch seconds of every minute from `start` to `end` (IST times of DAY)"""
+    minutes = pd.date_range(DAY + pd.Timedelta(f"{start}:00"), DAY + pd.Timedelta(f"{end}:00"), freq="min")
+    return ((minutes - IST_OFFSET) - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
+
+class ListedTicksAccessor:
+    """Stand-in accessor serving one listed call whose ticks can be appended between runs"""
+
+    def __init__(self):
+        self.ticks = []
+
+    def add_ticks(self, times: np.ndarray, price: float) -> None:
+        self.ticks.append(pd.DataFrame({"DateTime": np.asarray(times, dtype=np.int64), "Close": price}))
+
+    def get_contract_by_symbol_and_expiry(self, symbol, expiry_date):
+        return pd.DataFrame({"ExpiryDate": [expiry_date], "Type": ["CE"], "StrikePrice": [STRIKE], "Symbol": [symbol]})
+
+    def get_contract_prices(self, symbol, option_type, strike_price, expiry_date, resolution=None):
+        if (option_type, strike_price) != ("CE", STRIKE):
+            raise ValueError("Contract not found for the given parameters.")
+        ticks = pd.concat(self.ticks, ignore_index=True)
+        close = ticks["Close"].astype(float)
+        return pd.DataFrame({"DateTime": ticks["DateTime"], "Open": close, "High": close,
+                             "Low": close, "Close": close, "Volume": 0, "OI": 0})
+
+
+def run(accessor, end_date, checkpoint_path=None):
+    config = copy.deepcopy(CONFIG)
+    config["backtest_settings"]["end_date"] = end_date
+    times = epochs("09:15", "15:30")
+    underlying = prepare_underlying_data(pd.DataFrame({"Symbol": "BANKNIFTY", "DateTime": times, "Price": STRIKE}))
+    engine = BacktestEngine(underlying, create_strategy_from_config(config), accessor, config)
+    engine.run_backtest(checkpoint_path)
+    return engine
+
+
+def test_resumed_open_position_exits_on_the_new_ticks(tmp_path):
+    accessor = ListedTicksAccessor()
+    accessor.add_ticks(epochs("09:15", "12:00"), 100.0)
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    first = run(accessor, "2022-06-01 12:00", checkpoint_path)
+    assert first._in_position and len(first.trades) == 0
+
+    # Ticks loaded after the first run; the open leg must exit on them, not on the 12:00 price
+    accessor.add_ticks(epochs("12:01", "15:30"), 150.0)
+    resumed = run(accessor, "2022-06-01 23:59", checkpoint_path)
+    assert resumed._n_bars == len(resumed.underlying_data)
+    legs = resumed.trades.legs_frame()
+    assert legs["entry_option_price"].tolist() == [100.0]
+    assert legs["exit_option_price"].tolist() == [150.0]
+    assert legs["strike"].tolist() == [STRIKE]
+
+    full = run(accessor, "2022-06-01 23:59")
+    np.testing.assert_allclose(resumed.equity_curve.to_numpy(), full.equity_curve.to_numpy())
@@ -0,0 +1,136 @@
+# tests/test_migrate_data.py
+import sqlite3
+import threading
+
+import pytest
+
+import migrate_data
+from migrate_data import UploadCheckpoint, migrate_equity_data, migrate_options_data
+
+
+class FakeSupabase:
+    """
+    Stand-in for the Supabase REST client: upserts land in per-table dicts keyed by the
+    on_conflict columns. After `fail_after` successful requests every request fails.
+    """
+
+    def __init__(self, fail_after=None):
+        self.tables = {}
+        self.sent = 0  # rows received, resends included
+        self.fail_after = fail_after
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return _FakeTable(self, name)
+
+
+class _FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def upsert(self, rows, on_conflict):
+        return _FakeRequest(self.client, self.name, rows, on_conflict.split(","))
+
+    def insert(self, rows):
+        raise AssertionError("rows must be upserted so resent batches are idempotent")
+
+
+class _FakeRequest:
+    def __init__(self, client, name, rows, key_columns):
+        self.client = client
+        self.name = name
+        self.rows = rows
+        self.key_columns = key_columns
+
+    def execute(self):
+        client = self.client
+        with client._lock:
+            if client.fail_after is not None and client._requests >= client.fail_after:
+                raise ConnectionError("service unavailable")
+            client._requests += 1
+            table = client.tables.setdefault(self.name, {})
+            for row in self.rows:
+                table[tuple(row[column] for column in self.key_columns)] = row
+            client.sent += len(self.rows)
+
+
+@pytest.fixture
+def sqlite_conn():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.executescript("""
+        CREATE TABLE EquityTick(Symbol text, DateTime int, Price real);
+        CREATE TABLE OptionsContract(Id integer primary key, ExpiryDate int, Type text, StrikePrice real, Symbol text);
+        CREATE TABLE OptionsTick(ContractId int, DateTime int, Open real, High real, Low real, Close real, Volume int, OI int);
+    """)
+    conn.executemany("INSERT INTO OptionsContract VALUES (?, ?, ?, ?, ?)",
+                     [(1, 1654732800, "CE", 16000.0, "NIFTY"), (2, 1654732800, "PE", 16000.0, "NIFTY"),
+                      (3, 1654732800, "CE", 16100.0, "NIFTY")])
+    # Contract 4 is unknown, so its ticks are dropped by process_options_data
+    conn.executemany("INSERT INTO OptionsTick VALUES (?, ?, 0, 0, 0, ?, 0, 0)",
+                     [(contract, 1654140600 + 60 * i, 100.0 + i) for contract in (1, 2, 3, 4) for i in range(40)])
+    conn.executemany("INSERT INTO EquityTick VALUES (?, ?, ?)",
+                     [(symbol, 1654140600 + 60 * i, 16000.0 + i) for symbol in ("BANKNIFTY", "NIFTY") for i in range(90)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(migrate_data, "BATCH_SIZE", 7)
+    monkeypatch.setattr(migrate_data, "CHUNK_SIZE", 25)
+    monkeypatch.setattr(migrate_data, "MAX_IN_FLIGHT", 3)
+    monkeypatch.setattr(migrate_data, "MAX_RETRIES", 1)
+
+
+def test_options_migration_resumes_after_last_committed_key(sqlite_conn, tmp_path):
+    supabase = FakeSupabase(fail_after=9)
+    checkpoint = UploadCheckpoint("option_data", until=1654143000, checkpoint_dir=tmp_path)
+    assert not migrate_options_data(sqlite_conn, supabase, 160, until=1654143000, checkpoint=checkpoint)
+    assert checkpoint.last_key is not None
+
+    # A new run (new process) picks the checkpoint up from disk
+    resumed = UploadCheckpoint("option_data", until=None, checkpoint_dir=tmp_path)
+    assert resumed.last_key == checkpoint.last_key and resumed.until == 1654143000
+    supabase.fail_after = None
+    sent_before = supabase.sent
+    assert migrate_options_data(sqlite_conn, supabase, 160, until=resumed.until, checkpoint=resumed)
+
+    rows = supabase.tables["option_data"]
+    assert len(rows) == 120  # every tick of contracts 1-3, none skipped or duplicated
+    assert sorted({(row["strike"], row["option_type"]) for row in rows.values()}) == \
+        [(16000.0, "CE"), (16000.0, "PE"), (16100.0, "CE")]
+    assert supabase.sent - sent_before < 120  # resumed rather than restarted
+    assert not (tmp_path / "option_data.json").exists()
+
+
+def test_equity_migration_resumes_after_last_committed_key(sqlite_conn, tmp_path):
+    supabase = FakeSupabase(fail_after=10)
+    checkpoint = UploadCheckpoint("equity_data", checkpoint_dir=tmp_path)
+    assert not migrate_equity_data(sqlite_conn, supabase, checkpoint=checkpoint)
+    symbol, last_time = checkpoint.last_key
+    assert symbol in ("BANKNIFTY", "NIFTY") and isinstance(last_time, int)
+
+    supabase.fail_after = None
+    sent_before = supabase.sent
+    resumed = UploadCheckpoint("equity_data", checkpoint_dir=tmp_path)
+    assert migrate_equity_data(sqlite_conn, supabase, checkpoint=resumed)
+    assert len(supabase.tables["equity_data"]) == 180
+    assert supabase.sent - sent_before < 180
+    assert not (tmp_path / "equity_data.json").exists()
+
+
+def test_delta_migration_picks_up_late_ticks_within_the_overlap(sqlite_conn):
+    supabase = FakeSupabase()
+    watermark = 1654140600 + 60 * 39
+    assert migrate_options_data(sqlite_conn, supabase, 160, until=watermark, delta=True)
+    assert len(supabase.tables["option_data"]) == 120
+
+    # Written after that run, but stamped before its watermark
+    sqlite_conn.execute("INSERT INTO OptionsTick VALUES (1, ?, 0, 0, 0, 99.5, 0, 0)", (watermark - 90,))
+    until = migrate_data.get_max_datetime(sqlite_conn, "OptionsTick")
+    assert migrate_options_data(sqlite_conn, supabase, 1, since=migrate_data.delta_since(watermark),
+                                until=until, delta=True)
+    assert len(supabase.tables["option_data"]) == 121
@@ -0,0 +1,56 @@
+# tests/test_panda.py
+import sqlite3
+
+import pytest
+
+import data.query as queries
+from clean_db import clean_database
+from data.panda import PandaAccessor
+
+START = 1654140600
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "options.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE EquityTick(Symbol text, DateTime int, Price real);
+            CREATE TABLE OptionsContract(Id integer primary key, ExpiryDate int, Type text, StrikePrice real, Symbol text);
+            CREATE TABLE OptionsTick(ContractId int, DateTime int, Open real, High real, Low real, Close real, Volume int, OI int);
+        """)
+        conn.executemany("INSERT INTO EquityTick VALUES ('NIFTY', ?, ?)", [(START + 60 * i, 16000.0 + i) for i in range(10)])
+    return path
+
+
+def test_metadata_is_reread_after_the_db_changes(db_path):
+    accessor = PandaAccessor(db_path)
+    assert not accessor.get_equity_data("NIFTY").attrs.get("clean")
+    assert accessor.get_contract_greeks("NIFTY", "CE", 16000.0, 1654732800).empty
+
+    # clean_db.py and build_greeks.py run against the DB while the accessor is alive
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(queries.CREATE_CLEAN_MARK)
+        conn.execute(queries.UPSERT_CLEAN_MARK, ("EquityTick", START + 60 * 9, 10))
+        conn.execute(queries.CREATE_OPTIONS_GREEKS)
+        conn.execute("INSERT INTO OptionsContract VALUES (1, 1654732800, 'CE', 16000.0, 'NIFTY')")
+        conn.execute(queries.INSERT_OPTIONS_GREEKS, (1, START, 16000.0, 0.2, 0.5, 0.001, -5.0, 10.0))
+    assert accessor.get_equity_data("NIFTY").attrs.get("clean")
+    assert len(accessor.get_contract_greeks("NIFTY", "CE", 16000.0, 1654732800)) == 1
+
+
+def test_clean_mark_is_void_once_rows_are_added_before_it(db_path):
+    with sqlite3.connect(db_path) as conn:
+        clean_database(conn)
+    accessor = PandaAccessor(db_path)
+    assert accessor.get_equity_data("NIFTY").attrs.get("clean")
+
+    # A duplicate of an old tick loaded after the clean run
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO EquityTick VALUES ('NIFTY', ?, 16003.5)", (START + 60 * 3,))
+    assert not accessor.get_equity_data("NIFTY").attrs.get("clean")
+
+    with sqlite3.connect(db_path) as conn:
+        clean_database(conn)
+    df = accessor.get_equity_data("NIFTY")
+    assert df.attrs.get("clean") and len(df) == 10
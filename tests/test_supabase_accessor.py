@@ -0,0 +1,124 @@
+# tests/test_supabase_accessor.py
+import pandas as pd
+import pytest
+
+from data.constants import REMOTE_UNIQUE_KEYS
+from data.supabase_accessor import SupabaseAccessor
+
+EXPIRY = "2022-06-09T00:00:00.000000Z"
+
+
+class FakeRest:
+    """
+    Stand-in for the Supabase REST client: select/filter/order/range requests are answered
+    from in-memory rows, `option_contracts` being derived from `option_data` like the view.
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.requests = []  # (table, range) of every executed request
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+
+class _FakeQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.filters = []
+        self.orders = []
+        self.count = None
+        self.bounds = None
+
+    def select(self, columns, count=None):
+        self.columns = columns.split(",")
+        self.count = count
+        return self
+
+    def _filter(self, test, column, value):
+        self.filters.append(lambda row: test(row[column], value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda a, b: a == b, column, value)
+
+    def gte(self, column, value):
+        return self._filter(lambda a, b: a >= b, column, value)
+
+    def lte(self, column, value):
+        return self._filter(lambda a, b: a <= b, column, value)
+
+    def order(self, column):
+        self.orders.append(column)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        if self.name == "option_contracts":
+            keys = REMOTE_UNIQUE_KEYS["option_contracts"].split(",")
+            rows = [dict(zip(keys, key)) for key in
+                    {tuple(row[k] for k in keys) for row in self.client.tables["option_data"]}]
+        else:
+            rows = self.client.tables[self.name]
+        rows = sorted((row for row in rows if all(test(row) for test in self.filters)),
+                      key=lambda row: tuple(row[column] for column in self.orders))
+        total = len(rows)
+        if self.bounds is not None:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        self.client.requests.append((self.name, self.bounds))
+        data = [{column: row[column] for column in self.columns} for row in rows]
+        return type("Response", (), {"data": data, "count": total if self.count == "exact" else None})
+
+
+def option_rows(strike, option_type, n, expiry=EXPIRY):
+    return [{"symbol": "NIFTY", "expiry_date": expiry, "strike": strike, "option_type": option_type,
+             "timestamp": f"2022-06-02T{4 + i // 60:02d}:{i % 60:02d}:00.000000Z", "price": 100.0 + i}
+            for i in range(n)]
+
+
+@pytest.fixture
+def rest():
+    return FakeRest({
+        "option_data": (option_rows(16000.0, "CE", 11) + option_rows(16000.0, "PE", 4)
+                        + option_rows(16100.0, "CE", 3, expiry="2022-06-16T00:00:00.000000Z")),
+        "migration_watermarks": [{"table_name": "option_data", "value": 1}],
+    })
+
+
+def test_contract_prices_are_paged_in_order_and_filtered_on_the_server(rest, tmp_path):
+    accessor = SupabaseAccessor(client=rest, cache_dir=str(tmp_path), page_size=3, max_workers=2)
+    prices = accessor.get_contract_prices("NIFTY", "CE", 16000.0, "2022-06-09")
+    assert prices["Close"].tolist() == [100.0 + i for i in range(11)]
+    assert prices["DateTime"].is_monotonic_increasing
+    ranges = sorted(bounds for table, bounds in rest.requests if table == "option_data")
+    assert ranges == [(0, 2), (3, 5), (6, 8), (9, 11)]
+
+    with pytest.raises(ValueError):
+        accessor.get_contract_prices("NIFTY", "PE", 16100.0, "2022-06-09")
+    assert accessor.get_contract_id("NIFTY", "PE", 16000.0, "2022-06-09") is not None
+    assert accessor.get_contract_id("NIFTY", "PE", 16100.0, "2022-06-09") is None
+
+
+def test_cache_is_served_until_the_remote_data_version_changes(rest, tmp_path, monkeypatch):
+    monkeypatch.setattr("data.supabase_accessor.REMOTE_VERSION_TTL_SECONDS", 0)
+    accessor = SupabaseAccessor(client=rest, cache_dir=str(tmp_path), page_size=5)
+    accessor.get_contract_prices("NIFTY", "PE", 16000.0, "2022-06-09")
+    assert not list(tmp_path.glob("*.pkl")) and list(tmp_path.glob("*.npz"))
+
+    def fetches():
+        return sum(table == "option_data" for table, _ in rest.requests)
+
+    before = fetches()
+    cached = accessor.get_contract_prices("NIFTY", "PE", 16000.0, "2022-06-09")
+    assert fetches() == before and len(cached) == 4
+
+    # A delta migration appends a tick and moves the watermark
+    rest.tables["option_data"].append({**option_rows(16000.0, "PE", 5)[-1]})
+    rest.tables["migration_watermarks"][0]["value"] = 2
+    refreshed = accessor.get_contract_prices("NIFTY", "PE", 16000.0, "2022-06-09")
+    assert fetches() > before
+    pd.testing.assert_series_equal(refreshed["Close"], pd.Series([100.0, 101.0, 102.0, 103.0, 104.0], name="Close"))
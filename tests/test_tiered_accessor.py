@@ -0,0 +1,33 @@
+# tests/test_tiered_accessor.py
+import pandas as pd
+
+from data.tiered_accessor import AccessorTier, ColumnarFileTier, MemoryTier, TieredAccessor
+
+
+class VersionedSource:
+    """Stand-in source accessor whose symbols and data version can change between lookups"""
+
+    def __init__(self):
+        self.symbols = ["NIFTY"]
+        self.version = 1
+        self.calls = 0
+
+    def data_version(self):
+        return f"v{self.version}"
+
+    def get_symbols(self):
+        self.calls += 1
+        return pd.DataFrame({"Symbol": self.symbols})
+
+
+def test_cache_tiers_drop_frames_of_older_data_versions(tmp_path):
+    source = VersionedSource()
+    accessor = TieredAccessor([MemoryTier(), ColumnarFileTier(str(tmp_path)), AccessorTier(source, "sqlite")])
+    assert accessor.get_symbols()["Symbol"].tolist() == ["NIFTY"]
+    assert accessor.get_symbols()["Symbol"].tolist() == ["NIFTY"]
+    assert source.calls == 1
+
+    source.symbols, source.version = ["BANKNIFTY", "NIFTY"], 2
+    assert accessor.get_symbols()["Symbol"].tolist() == ["BANKNIFTY", "NIFTY"]
+    assert source.calls == 2
+    assert accessor.stats()["memory"]["hits"] == 1
@@ -0,0 +1,22 @@
+# tests/test_trade_log.py
+import threading
+
+from engine.trade_log import TradeLog
+
+
+def test_snapshot_while_appending_is_consistent():
+    log = TradeLog(capacity=1)
+    done = threading.Event()
+
+    def append():
+        for i in range(20000):
+            log.append("2022-06-01 09:45", "2022-06-01 14:45", 100.0, 101.0, float(i))
+        done.set()
+
+    writer = threading.Thread(target=append)
+    writer.start()
+    while not done.is_set():
+        frame = log.snapshot()
+        assert frame["profit"].tolist() == list(map(float, range(len(frame))))
+    writer.join()
+    assert len(log.snapshot()) == 20000
@@ -0,0 +1,67 @@
+# tests/test_work_queue.py
+import threading
+import time
+
+from utils.work_queue import DirectoryWorkQueue
+
+
+def make_queue(path, n_units=3):
+    queue = DirectoryWorkQueue(str(path))
+    queue.create({"base": {}}, {f"unit-{i}": {"n": i} for i in range(n_units)})
+    return queue
+
+
+def test_concurrent_claims_hand_out_each_unit_once(tmp_path):
+    queue = make_queue(tmp_path, n_units=40)
+    claimed = {}
+    start = threading.Barrier(8)
+
+    def work(worker):
+        start.wait()
+        while (unit := queue.claim(worker)) is not None:
+            claimed.setdefault(unit[0], []).append(worker)
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(f"unit-{i}" for i in range(40))
+    assert all(len(workers) == 1 for workers in claimed.values())
+
+
+def test_units_of_silent_workers_are_requeued(tmp_path):
+    queue = make_queue(tmp_path, n_units=2)
+    unit_a, _ = queue.claim("silent")
+    unit_b, _ = queue.claim("live")
+    queue.heartbeat("silent")
+    queue.heartbeat("live")
+
+    assert queue.requeue_lost(timeout=0.2) == []  # first sighting of both heartbeats
+    time.sleep(0.3)
+    queue.heartbeat("live")
+    assert queue.requeue_lost(timeout=0.2) == [unit_a]
+    assert queue.live_workers(timeout=0.2) == ["live"]
+    assert queue.claim("other")[0] == unit_a
+    assert queue.claim("other") is None  # unit_b is still owned by the live worker
+
+
+def test_unit_finished_twice_keeps_one_result(tmp_path):
+    queue = make_queue(tmp_path, n_units=1)
+    unit_id, _ = queue.claim("slow")
+    queue.requeue_lost(timeout=0)  # "slow" never heartbeats
+    assert queue.claim("fast")[0] == unit_id
+
+    queue.complete("fast", unit_id, {"rows": [1]})
+    queue.complete("slow", unit_id, {"rows": [1]})  # its claim is gone; must not raise
+    assert queue.progress() == (1, 1)
+    assert queue.results() == [{"rows": [1]}]
+
+
+def test_claim_skips_requeued_unit_that_already_has_a_result(tmp_path):
+    queue = make_queue(tmp_path, n_units=1)
+    unit_id, _ = queue.claim("slow")
+    queue.requeue_lost(timeout=0)
+    queue.complete("slow", unit_id, {"rows": []})  # finished after being requeued
+    assert queue.claim("other") is None
+    assert queue.progress() == (1, 1)
@@ -2,11 +2,38 @@
 
 import pandas as pd
 
+from data.constants import IST_OFFSET_SECONDS
+
+
+def epoch_to_ist(epochs: pd.Series) -> pd.Series:
+    """Epoch seconds as naive IST timestamps (a fixed +05:30 shift, no tz database lookups)"""
+    return pd.to_datetime(epochs + IST_OFFSET_SECONDS, unit='s')
+
+
+def clean_by_time(df: pd.DataFrame, time_col: str, value_col: str) -> pd.DataFrame:
+    """
+    Drops duplicate timestamps, sorts by time and forward-fills missing values, skipping
+    each pass the data does not need: frames flagged `attrs["clean"]` by the accessor
+    (see clean_db.py) skip all of them, strictly increasing times skip dedupe and sort.
+    """
+    if df.attrs.get("clean"):
+        return df
+    times = df[time_col].to_numpy()
+    if len(times) > 1 and not (times[1:] > times[:-1]).all():
+        df = df.drop_duplicates(subset=time_col).sort_values(by=time_col)
+    if df[value_col].isna().any():
+        df[value_col] = df[value_col].ffill()
+    return df
+
+
 def clean_underlying_data(df: pd.DataFrame, time_col: str = "DateTime", price_col: str = "Price") -> pd.DataFrame:
-    df[time_col] = pd.to_datetime(df[time_col])
-    df = df.drop_duplicates(subset=time_col)
-    df = df.sort_values(by=time_col)
-    df = df.set_index(time_col)
-    df[price_col] = df[price_col].ffill()
+    if not pd.api.types.is_datetime64_any_dtype(df[time_col]):
+        df[time_col] = pd.to_datetime(df[time_col])
+    return clean_by_time(df, time_col, price_col).set_index(time_col)
+
 
-    return df
\ No newline at end of file
+def prepare_underlying_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Accessor equity rows (epoch-second DateTime) as cleaned bars indexed by naive IST timestamps"""
+    df = df.rename(columns={'timestamp': 'DateTime', 'price': 'Price', 'symbol': 'Symbol'})
+    df["DateTime"] = epoch_to_ist(df["DateTime"])
+    return clean_underlying_data(df, time_col="DateTime", price_col="Price")
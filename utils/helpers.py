@@ -1,5 +1,6 @@
 # utils/helpers.py
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
@@ -16,18 +17,40 @@ DAY_MAP = {
 def get_timestamp(date: str) -> int:
     return int(datetime.strptime(date, "%Y-%m-%d").timestamp())
 
+def get_date(timestamp: int) -> str:
+    """Inverse of get_timestamp"""
+    return datetime.fromtimestamp(int(timestamp)).strftime("%Y-%m-%d")
+
 def get_nearest_option_price(option_df: pd.DataFrame, timestamp: pd.Timestamp) -> float:
     option_df["DateTime"] = pd.to_datetime(option_df["DateTime"])
     diffs = (option_df["DateTime"] - timestamp).abs()
     idx = diffs.idxmin()
     return option_df.loc[idx, "Close"]
 
+def get_nearest_option_prices(option_df: pd.DataFrame, timestamps) -> np.ndarray:
+    """
+    get_nearest_option_price for many timestamps at once: a binary search over the
+    DateTime-sorted option frame instead of a full scan per timestamp. NaN if option_df is empty.
+    """
+    timestamps = pd.DatetimeIndex(timestamps).to_numpy(dtype="datetime64[ns]")
+    if option_df.empty:
+        return np.full(len(timestamps), np.nan)
+    times = pd.to_datetime(option_df["DateTime"]).to_numpy(dtype="datetime64[ns]")
+    closes = option_df["Close"].to_numpy(dtype=float)
+    after = np.clip(np.searchsorted(times, timestamps), 1, len(times) - 1) if len(times) > 1 \
+        else np.zeros(len(timestamps), dtype=int)
+    before = np.maximum(after - 1, 0)
+    # Ties go to the earlier tick, like idxmin over the absolute differences
+    nearest = np.where(np.abs(timestamps - times[before]) <= np.abs(times[after] - timestamps), before, after)
+    return closes[nearest]
+
 def get_strike_price(leg, underlying_price: float, multiplier: float = 50) -> float:
     """
     Computes the strike price based on the leg's strike_selection method using the provided multiplier.
       - ATM: rounds the underlying price to the nearest multiple of multiplier.
       - offset: adds the numeric offset from a string like "+200 pts" to the ATM strike.
-      - delta: uses a placeholder adjustment by subtracting one multiplier.
+      - delta: one multiplier below ATM; only a fallback, the engine picks delta strikes
+        from the option chain (engine.greeks.DeltaStrikeSelector) when it has prices.
     """
     method = leg.strike_selection.get("method", "").lower()
     if method == "atm":
@@ -48,8 +71,8 @@ def fetch_option_data_for_leg(accessor, underlying_symbol: str, leg, expiry_date
 
 def get_next_weekly_expiry(entry_time: datetime, expiry_day_str: str, trading_dates: pd.DatetimeIndex) -> str:
     """
-    Given an entry time, an expiry day (e.g. "THU" or "FRI"), and a sorted pd.DatetimeIndex of trading days,
-    compute the next weekly expiry date. If the candidate expiry day is a holiday (i.e. no data for that day),
+    Given an entry time, an expiry day (e.g. "THU" or "FRI"), and a sorted pd.DatetimeIndex of trading days
+    (or any container of datetime.date supporting `in`, e.g. a prebuilt set), compute the next weekly expiry date. If the candidate expiry day is a holiday (i.e. no data for that day),
     decrement day-by-day until a trading day is found.
 
     Returns the expiry date as a string in "YYYY-MM-DD" format.
@@ -62,7 +85,10 @@ def get_next_weekly_expiry(entry_time: datetime, expiry_day_str: str, trading_da
     candidate_expiry = entry_time + timedelta(days=days_until_target)
 
     # Build a set of trading days (as date objects) from the underlying trading_dates
-    trading_dates_set = {d.date() for d in trading_dates}
+    if isinstance(trading_dates, pd.DatetimeIndex):
+        trading_dates_set = {d.date() for d in trading_dates}
+    else:
+        trading_dates_set = trading_dates
 
     # If the candidate expiry date is not in the trading days (i.e. holiday),
     # move backward one day at a time until you find a trading day.
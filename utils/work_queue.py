@@ -0,0 +1,177 @@
+# utils/work_queue.py
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+# How often workers touch their heartbeat file, and how long the coordinator waits for a
+# heartbeat to change before handing a worker's claimed units to someone else
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_TIMEOUT = 60.0
+
+
+def _write_json(path: str, payload) -> None:
+    """Writes `payload` to `path` atomically (temp file in the same directory, then rename)"""
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+class DirectoryWorkQueue:
+    """
+    Work queue kept in a shared directory (NFS, SMB, a synced volume, or just a local path),
+    so a coordinator and workers on any number of hosts only need to see the same files:
+
+      manifest.json        shared payload for every unit (e.g. the base config)
+      pending/<unit>.json  units nobody has claimed
+      claimed/<unit>@<worker>.json
+                           units being worked on; claiming is an atomic rename out of pending/
+      heartbeats/<worker>  touched periodically by each live worker
+      results/<unit>.json  finished units
+      DONE                 written by the coordinator once every result is in; workers exit
+
+    A unit whose worker stops heartbeating is renamed back into pending/. Heartbeats are
+    judged by the coordinator's own clock (when it last saw the file change), so hosts with
+    skewed clocks are fine. A unit can therefore run twice, but its result is the same.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.pending_dir = os.path.join(path, "pending")
+        self.claimed_dir = os.path.join(path, "claimed")
+        self.heartbeat_dir = os.path.join(path, "heartbeats")
+        self.results_dir = os.path.join(path, "results")
+        self._heartbeats_seen = {}  # worker -> (heartbeat mtime, local time it was first seen)
+
+    # ---------- Coordinator ----------
+    def create(self, manifest: dict, units: dict) -> None:
+        """Starts a new queue: `units` maps unit ids to their JSON payloads"""
+        if os.path.exists(os.path.join(self.path, "manifest.json")):
+            raise ValueError(f"{self.path} already holds a queue; use an empty directory")
+        for directory in (self.pending_dir, self.claimed_dir, self.heartbeat_dir, self.results_dir):
+            os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(self.path, "manifest.json"), {**manifest, "units": sorted(units)})
+        for unit_id, payload in units.items():
+            _write_json(os.path.join(self.pending_dir, f"{unit_id}.json"), payload)
+
+    def requeue_lost(self, timeout: float = HEARTBEAT_TIMEOUT) -> list:
+        """Moves units claimed by workers silent for `timeout` seconds back to pending; returns their ids"""
+        now = time.time()
+        requeued = []
+        for name in os.listdir(self.claimed_dir):
+            unit_id, _, worker = name[:-len(".json")].partition("@")
+            if self._worker_alive(worker, now, timeout) or self._has_result(unit_id):
+                continue
+            try:
+                os.rename(os.path.join(self.claimed_dir, name), os.path.join(self.pending_dir, f"{unit_id}.json"))
+                requeued.append(unit_id)
+            except FileNotFoundError:
+                continue  # finished (or requeued) in the meantime
+        return requeued
+
+    def _worker_alive(self, worker: str, now: float, timeout: float) -> bool:
+        try:
+            mtime = os.stat(os.path.join(self.heartbeat_dir, worker)).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        seen = self._heartbeats_seen.get(worker)
+        if seen is None or seen[0] != mtime:
+            self._heartbeats_seen[worker] = seen = (mtime, now)
+        return now - seen[1] < timeout
+
+    def live_workers(self, timeout: float = HEARTBEAT_TIMEOUT) -> list:
+        """Workers whose heartbeat changed within the last `timeout` seconds"""
+        now = time.time()
+        return [worker for worker in os.listdir(self.heartbeat_dir) if self._worker_alive(worker, now, timeout)]
+
+    def progress(self) -> tuple:
+        """(finished units, total units)"""
+        return len(self._result_files()), len(self.manifest()["units"])
+
+    def results(self) -> list:
+        """Payloads of the finished units, in unit id order"""
+        return [_read_json(os.path.join(self.results_dir, name)) for name in sorted(self._result_files())]
+
+    def finish(self) -> None:
+        open(os.path.join(self.path, "DONE"), "w").close()
+
+    # ---------- Workers ----------
+    def manifest(self) -> dict:
+        return _read_json(os.path.join(self.path, "manifest.json"))
+
+    def ready(self) -> bool:
+        return os.path.exists(os.path.join(self.path, "manifest.json"))
+
+    def done(self) -> bool:
+        return os.path.exists(os.path.join(self.path, "DONE"))
+
+    def claim(self, worker: str):
+        """(unit id, payload) of a pending unit now owned by `worker`, or None if none is left"""
+        for name in sorted(os.listdir(self.pending_dir)):
+            unit_id = name[:-len(".json")]
+            claimed_path = os.path.join(self.claimed_dir, f"{unit_id}@{worker}.json")
+            try:
+                os.rename(os.path.join(self.pending_dir, name), claimed_path)
+            except FileNotFoundError:
+                continue  # another worker got there first
+            if self._has_result(unit_id):
+                os.remove(claimed_path)
+                continue
+            return unit_id, _read_json(claimed_path)
+        return None
+
+    def complete(self, worker: str, unit_id: str, result) -> None:
+        _write_json(os.path.join(self.results_dir, f"{unit_id}.json"), result)
+        try:
+            os.remove(os.path.join(self.claimed_dir, f"{unit_id}@{worker}.json"))
+        except FileNotFoundError:
+            pass  # requeued while we worked on it; the result is in regardless
+
+    def heartbeat(self, worker: str) -> None:
+        path = os.path.join(self.heartbeat_dir, worker)
+        with open(path, "a"):
+            os.utime(path)
+
+    def _has_result(self, unit_id: str) -> bool:
+        return os.path.exists(os.path.join(self.results_dir, f"{unit_id}.json"))
+
+    def _result_files(self) -> list:
+        return [name for name in os.listdir(self.results_dir) if name.endswith(".json")]
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class Heartbeat:
+    """Context manager touching a worker's heartbeat file from a background thread"""
+
+    def __init__(self, queue: DirectoryWorkQueue, worker: str, interval: float = HEARTBEAT_INTERVAL) -> None:
+        self.queue = queue
+        self.worker = worker
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.queue.heartbeat(self.worker)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.queue.heartbeat(self.worker)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()